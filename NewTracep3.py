@@ -18,6 +18,7 @@ NewTraceFac14 trace module
                                 updated  20160921
                                 updated  20170127
                                 updated  20170129
+                                updated  20261019
                                 
   Copyright (C) 2008,2009,2014,2015,2016,2017 Richard Landau.  All rights reserved.
   
@@ -53,8 +54,9 @@ NewTraceFac14 trace module
   EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
 
-from time       import localtime, sleep
-from os         import getenv
+from time       import localtime, sleep, time
+from os         import getenv, getpid
+from os.path    import splitext
 from re         import findall
 from functools  import wraps
 '''
@@ -164,6 +166,16 @@ from functools  import wraps
                     If "YES" then nothing will be traced, and the 
                      trace functions and decorators will attempt 
                      to use as little CPU resource as possible.
+    TRACE_SPLIT;    # If "YES" then each process (and worker) writes 
+                     its own trace file instead of appending to the 
+                     shared TRACE_FILE.  The file name is derived from
+                     TRACE_FILE, e.g., newtrace_p12345_w0.log.  
+                    Lines in split files carry a microsecond timestamp
+                     and the p<pid>w<worker> tag so that tracemerge.py
+                     can put them back into one ordered trace.
+    TRACE_WORKER;   # worker ID to tag split trace files with.
+                    If null, defaults to "0".  Pool workers can 
+                     also call NTRC.setWorker(id) in their initializer.
 
 Python decorators:
 There are two new functions to use as Python decorators to
@@ -220,6 +232,10 @@ class CNewTrace:
             pass
         self.tracefile = getenv("TRACE_FILE", myfile)
         self.tracefacil = getenv("TRACE_FACIL", myfacil).upper()
+        self.tracesplit = (getenv("TRACE_SPLIT", "NO") == "YES")
+        self.traceworker = getenv("TRACE_WORKER", "0")
+        self.tracepid = None
+        self.tracefh = None
         if not self.traceproduction:
             if self.tracelevel > 0:
                 self.trace(1,"DEBUG info level %s targets %s facil %s" 
@@ -229,6 +245,49 @@ class CNewTrace:
     def isProduction(self):
         return self.traceproduction
 
+# s e t W o r k e r     name the worker for split trace files.
+    def setWorker(self, worker):
+        # Takes effect on the next trace line; closes any file already
+        #  open under the old worker name.  
+        self.traceworker = str(worker)
+        if self.tracefh:
+            self.tracefh.close()
+        self.tracefh = None
+
+# g e t S p l i t F i l e n a m e 
+    def getSplitFilename(self):
+        (base, ext) = splitext(self.tracefile)
+        return ("%s_p%s_w%s%s" 
+            % (base, getpid(), self.traceworker, ext or ".log"))
+
+# g e t T i m e s t a m p 
+    def getTimestamp(self):
+        # Split files need sub-second resolution so that the merge 
+        #  can interleave lines from several processes correctly.  
+        #  The fixed-width format sorts correctly as plain text.
+        if self.tracesplit:
+            fNow = time()
+            (yr,mo,da,hr,min,sec,x,y,z) = localtime(fNow)
+            return ("%4d%02d%02d_%02d%02d%02d.%06d p%sw%s" 
+                % (yr,mo,da,hr,min,sec,int((fNow % 1) * 1000000),
+                getpid(),self.traceworker))
+        (yr,mo,da,hr,min,sec,x,y,z) = localtime()
+        return "%4d%02d%02d_%02d%02d%02d" % (yr,mo,da,hr,min,sec)
+
+# w r i t e T r a c e F i l e 
+    def writeTraceFile(self, outline, retries):
+        # Shared file: open, append, close, with busy retries.
+        # Split file: private to this process, so keep it open and 
+        #  line-buffered; no contention, no retries.  Reopen if we 
+        #  have been forked since the last line.  
+        if not self.tracesplit:
+            self.fWriteCarefully(self.tracefile, 'a', outline, retries)
+            return
+        if self.tracefh is None or self.tracepid != getpid():
+            self.tracepid = getpid()
+            self.tracefh = open(self.getSplitFilename(), 'a', buffering=1)
+        self.tracefh.write(outline + "\n")
+
 # n t r a c e     trace with no identified facility name.
     # Old style, calls new style.
     def trace(self, level, line):
@@ -243,9 +302,7 @@ class CNewTrace:
             #  then send it to the appropriate target(s).
             if level <= self.tracelevel:
                 # Get a timestamp
-                self.vecT = localtime()
-                (yr,mo,da,hr,min,sec,x,y,z) = self.vecT
-                self.ascT = "%4d%02d%02d_%02d%02d%02d" % (yr,mo,da,hr,min,sec)
+                self.ascT = self.getTimestamp()
                 #linestart = ascT + " " + "%1d"%level + " "
                 self.linestart = "%s %1d %-4s " % (self.ascT,level,"    ")
                 
@@ -260,8 +317,7 @@ class CNewTrace:
                 
                 # Or append to trace file.
                 if (self.tracetarget & 4):
-                    self.fWriteCarefully(self.tracefile, 'a', 
-                        self.linestart+" "+line, 5)
+                    self.writeTraceFile(self.linestart+" "+line, 5)
         else:       # If in production mode and level > 0
             pass    #  go away.
 
@@ -293,11 +349,7 @@ class CNewTrace:
                     self.traceme = False
                 if self.traceme:
                     # Get a timestamp
-                    self.vecT = localtime()
-                    (self.yr,self.mo,self.da,self.hr,self.min,self.sec,
-                        self.x,self.y,self.z) = self.vecT
-                    self.ascT = ("%4d%02d%02d_%02d%02d%02d" 
-                        % (self.yr,self.mo,self.da,self.hr,self.min,self.sec))
+                    self.ascT = self.getTimestamp()
                     self.linestart = "%s %1d %-4s " % (self.ascT,level,facility)
                     # If console only, or console and others, print to stdout.
                     if (((self.tracetarget & 1) and not (self.tracetarget & 2)) 
@@ -310,8 +362,7 @@ class CNewTrace:
                     
                     # Or append to trace file.
                     if (self.tracetarget & 4):
-                        self.fWriteCarefully(self.tracefile, 'a', 
-                            self.linestart+" "+line, 10)
+                        self.writeTraceFile(self.linestart+" "+line, 10)
         else:       # If in production mode and level > 0
             pass    #  go away.
 
@@ -491,6 +542,11 @@ TRC = CNewTrace()
 #                (And optimize the tests for speed.)
 # 20170129  RBL V14: Add method to tell if production mode is turned on
 #                so that users can report it.  
+# 20261019  RBL Add TRACE_SPLIT mode: one trace file per process and 
+#                worker, tagged with PID and worker ID, with microsecond
+#                timestamps, kept open instead of reopened per line.  
+#                Several taxit runs no longer fight over newtrace.log.
+#                Use tracemerge.py to put the pieces back in order.
 # 
 # 
 
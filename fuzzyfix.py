@@ -0,0 +1,236 @@
+#/usr/bin/python3
+# fuzzyfix.py
+#
+#                               RBLandau 20261019
+#
+# Correct misspelled bio words to a taxonomy keyword before they are 
+#  stemmed, so that "vertibrate" or "economcs" still reaches the taxonomy.
+#
+
+'''
+theory:
+
+symmetric delete (the SymSpell idea):
+for every taxonomy keyword, list all the strings made by deleting up to
+ two of its letters (from its first few letters only: the prefix is 
+ enough to find it, and the index stays small); index the keyword by 
+ those strings
+to look up a token, make the same deletes of it and look them up: any
+ keyword within edit distance two shares at least one of those strings
+then check the real distance (with transpositions) of the few
+ candidates found; no search through the whole vocabulary
+
+corrections go only to taxonomy keywords: the point is to catch a
+ misspelled keyword, not to spell-check the bio; a correction to any
+ other word would change no category, and one to a keyword from a 
+ real word that the vocabulary lacks adds a wrong category 
+ (sourcedata/voc.txt has no "boston", "litigation" or "genomics")
+known words: the taxonomy keywords, sourcedata/voc.txt, the stopwords;
+ a token that is known (or not all letters) stays as is
+short tokens are fragile, and real words near a keyword are many: up
+ to 4 letters, no correction; up to 8, distance 1; longer, distance 2
+a correction is made only when there is one best candidate; otherwise
+ the token stays as it was
+every token looked up is cached, found or not, so each distinct word
+ costs one lookup per run
+
+'''
+
+import sys
+import re
+import argparse
+from NewTracep3 import NTRC, ntrace, ntracef
+
+
+# Letters of the prefix that are indexed, and the largest distance.
+nPrefixLength = 7
+nMaxDistance = 2
+
+
+# f n l D e l e t e s
+def fnlDeletes(mysWord, mynDistance):
+    ''' Return the set of strings made by deleting up to mynDistance
+         letters from the word, including the word itself.
+    '''
+    setDeletes = {mysWord}
+    setEdge = {mysWord}
+    for _ in range(mynDistance):
+        setEdge = {sWord[:nPos] + sWord[nPos + 1:]
+                    for sWord in setEdge if len(sWord) > 1
+                    for nPos in range(len(sWord))}
+        setDeletes |= setEdge
+    return setDeletes
+
+
+# f n n D i s t a n c e
+def fnnDistance(mysA, mysB, mynMax):
+    ''' Return the edit distance between the words, counting an
+         adjacent transposition as one edit, or mynMax + 1 if it is
+         more than mynMax.
+    '''
+    if abs(len(mysA) - len(mysB)) > mynMax:
+        return mynMax + 1
+    lPrev2 = None
+    lPrev = list(range(len(mysB) + 1))
+    for nI in range(1, len(mysA) + 1):
+        lCur = [nI] + [0] * len(mysB)
+        for nJ in range(1, len(mysB) + 1):
+            nCost = 0 if mysA[nI - 1] == mysB[nJ - 1] else 1
+            lCur[nJ] = min(lPrev[nJ] + 1, lCur[nJ - 1] + 1,
+                            lPrev[nJ - 1] + nCost)
+            if (lPrev2 and nI > 1 and nJ > 1
+                    and mysA[nI - 1] == mysB[nJ - 2]
+                    and mysA[nI - 2] == mysB[nJ - 1]):
+                lCur[nJ] = min(lCur[nJ], lPrev2[nJ - 2] + 1)
+        if min(lCur) > mynMax:
+            return mynMax + 1
+        (lPrev2, lPrev) = (lPrev, lCur)
+    return lPrev[-1]
+
+
+# f n n A l l o w e d D i s t a n c e
+def fnnAllowedDistance(mysWord):
+    ''' Return how far a token of this length may be corrected. '''
+    nLen = len(mysWord)
+    return 0 if nLen <= 4 else 1 if nLen <= 8 else nMaxDistance
+
+
+# c l a s s   C F u z z y F i x e r
+class CFuzzyFixer():
+    ''' Class that corrects misspelled words to taxonomy keywords. '''
+
+
+    @ntrace
+    def __init__(self, mylKeywords, mylVocabulary, mysetStoplist=None):
+        ''' CFuzzyFixer init: Build the delete index of the keywords.
+
+            mylKeywords are the taxonomy keywords, the only corrections.
+            Words of mylVocabulary and mysetStoplist are known, and are
+             never corrected, but nothing is corrected to them.
+        '''
+        self.setKeywords = {sWord.lower() for sWord in mylKeywords}
+        self.setKnown = self.setKeywords | {sWord.lower()
+                                            for sWord in mylVocabulary}
+        self.setKnown |= set(mysetStoplist or ())
+        self.dDeletes = dict()
+        for sWord in self.setKeywords:
+            if not sWord.isalpha():
+                continue
+            for sDelete in fnlDeletes(sWord[:nPrefixLength], nMaxDistance):
+                lWords = self.dDeletes.get(sDelete)
+                if lWords is None:
+                    self.dDeletes[sDelete] = [sWord]
+                else:
+                    lWords.append(sWord)
+        self.dCache = dict()
+        self.nLookups = 0
+        self.nFixed = 0
+        NTRC.ntrace(3, "proc fuzzy known|%d| deletes|%d|"
+                    % (len(self.setKnown), len(self.dDeletes)))
+
+
+# m s F i x W o r d
+    def msFixWord(self, mysWord):
+        ''' Return the word, or its correction.  Cached. '''
+        sFixed = self.dCache.get(mysWord)
+        if sFixed is None:
+            sFixed = self.dCache[mysWord] = self.msLookup(mysWord)
+        return sFixed
+
+
+# m l F i x W o r d s
+    def mlFixWords(self, mylWords):
+        ''' Return the list of words, with corrections. '''
+        dCache = self.dCache
+        return [dCache.get(sWord) or self.msFixWord(sWord)
+                for sWord in mylWords]
+
+
+# m s L o o k u p
+    def msLookup(self, mysWord):
+        ''' Find the correction for one word, the hard way. '''
+        if mysWord in self.setKnown or not mysWord.isalpha():
+            return mysWord
+        nAllowed = fnnAllowedDistance(mysWord)
+        if not nAllowed:
+            return mysWord
+        self.nLookups += 1
+        setCandidates = set()
+        for sDelete in fnlDeletes(mysWord[:nPrefixLength], nAllowed):
+            setCandidates.update(self.dDeletes.get(sDelete, ()))
+        nBest = nAllowed + 1
+        lBest = []
+        for sCandidate in setCandidates:
+            nDistance = fnnDistance(mysWord, sCandidate, nAllowed)
+            if nDistance > nAllowed:
+                continue
+            if nDistance < nBest:
+                (nBest, lBest) = (nDistance, [sCandidate])
+            elif nDistance == nBest:
+                lBest.append(sCandidate)
+        if len(lBest) != 1:
+            return mysWord
+        self.nFixed += 1
+        NTRC.ntrace(3, "proc fuzzy fix|%s| to|%s| dist|%d|"
+                    % (mysWord, lBest[0], nBest))
+        return lBest[0]
+
+
+# f n l R e a d W o r d s
+def fnlReadWords(mysFilename):
+    ''' Return the words of a word list file, one or more to a line;
+         ignore blank lines and comment lines.
+    '''
+    lWords = []
+    with open(mysFilename, "r", errors="replace") as fhIn:
+        for sLine in fhIn:
+            sLine = sLine.strip()
+            if sLine and not sLine.startswith("#"):
+                lWords.extend(sLine.split())
+    return lWords
+
+
+# f n l T a x o n o m y K e y w o r d s
+def fnlTaxonomyKeywords(mysFilename):
+    ''' Return the keywords of a taxonomy file (all but the first word of
+         each line, which is the category name).
+    '''
+    lWords = []
+    with open(mysFilename, "r") as fhIn:
+        for sLine in fhIn:
+            sLine = sLine.strip()
+            if sLine and not sLine.startswith("#"):
+                lWords.extend(re.split(r'\s+', sLine)[1:])
+    return lWords
+
+
+# M A I N
+def main():
+    ''' MAIN: Show the corrections for the words on the command line. '''
+    cParse = argparse.ArgumentParser(
+        description="Show what the fuzzy word correction would do.")
+    cParse.add_argument("lWords", metavar="word", nargs="+")
+    cParse.add_argument("--taxonomy", default="TaxonomyList.txt")
+    cParse.add_argument("--vocabulary", default="sourcedata/voc.txt")
+    dCli = vars(cParse.parse_args())
+    cFixer = CFuzzyFixer(fnlTaxonomyKeywords(dCli["taxonomy"]),
+                        fnlReadWords(dCli["vocabulary"]))
+    for sWord in dCli["lWords"]:
+        print("%-20s %s" % (sWord, cFixer.msFixWord(sWord.lower())))
+    return 0
+
+
+# E N T R Y   P O I N T
+if __name__ == "__main__":
+    sys.exit(main())
+
+
+# Edit history:
+# 20261019  RBL Original version.
+#               Correct only to taxonomy keywords, and only longer words:
+#                real words missing from voc.txt were being "fixed".
+#                Candidates beyond the allowed distance were taken, too.
+#
+#
+
+#END
@@ -0,0 +1,246 @@
+#/usr/bin/python3
+# memberdb.py
+#
+#                               RBLandau 20261019
+#
+# Read member bios from, and write taxonomy categories back to, the
+#  SQLite database that holds the canonical member list, instead of
+#  exporting CSV for taxit and importing its output again.
+#
+
+'''
+theory:
+
+the member table has (at least) the bio and taxonomy columns, named as
+ in the CSV exports: "Short bio" and "Taxonomy terms"
+read only what taxify needs: rowid, bio (and the change marker)
+sanitize the bio to ASCII-7 as the export reader does, before it is
+ hashed or stemmed, so a member gets the same categories either way
+keyset pagination on rowid: each page is a fresh SELECT of the rows
+ after the last rowid seen, taken in fetchmany batches; no cursor
+ lives longer than one page while the same table is being updated
+write back with executemany UPDATEs, by rowid, in batches, inside big
+ transactions (one commit per many thousand rows, not per row)
+
+changed-only runs, two ways:
+hash: a "Bio hash" column (added if missing) holds a hash of the bio
+ as of the last taxify; rows whose bio hashes differently are done
+ again, the others are skipped
+timestamp: a column that the application sets when a member record
+ changes; rows newer than the newest one seen on the last run are
+ done; that high-water mark is kept in a taxit_runs table, and saved
+ only when the run finishes
+
+'''
+
+import sqlite3
+import hashlib
+import itertools
+from NewTracep3 import NTRC, ntrace, ntracef
+from memberio import fnsSanitize
+
+
+# Rows per page (one SELECT), per fetchmany, per executemany, and per
+#  transaction.
+nPageRows = 16384
+nFetchRows = 256
+nUpdateRows = 1024
+nCommitRows = 65536
+
+# Column for the hash of the bio as of the last run.
+sHashColumn = "Bio hash"
+
+
+# f n s B i o H a s h
+def fnsBioHash(mysBio):
+    ''' Return a short, stable hash of the bio text. '''
+    return hashlib.blake2b((mysBio or "").encode("utf-8"),
+                            digest_size=8).hexdigest()
+
+
+# f n s Q u o t e
+def fnsQuote(mysName):
+    ''' Return the name quoted as an SQL identifier. '''
+    return '"' + mysName.replace('"', '""') + '"'
+
+
+# c l a s s   C M e m b e r D b
+class CMemberDb():
+    ''' Class that reads bios from a member table and writes categories
+         back to it.
+    '''
+
+
+    @ntrace
+    def __init__(self, mysDbFilename, mysTable="members",
+                mysBioColumn="Short bio", mysTaxColumn="Taxonomy terms"):
+        ''' CMemberDb init: Open the database, check the columns. '''
+        # Transactions are begun and committed here, not by sqlite3.
+        self.db = sqlite3.connect(mysDbFilename, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.sTable = fnsQuote(mysTable)
+        self.sTableName = mysTable
+        self.sBio = fnsQuote(mysBioColumn)
+        self.sTax = fnsQuote(mysTaxColumn)
+        self.lColumns = [tRow[1] for tRow in
+                    self.db.execute("PRAGMA table_info(%s)" % self.sTable)]
+        lMissing = [sColumn for sColumn in (mysBioColumn, mysTaxColumn)
+                    if sColumn not in self.lColumns]
+        if not self.lColumns or lMissing:
+            raise ValueError("table %s has no column(s) %s"
+                            % (mysTable, lMissing or "at all"))
+        self.bHash = False
+        self.sSinceColumn = None
+        self.xHighWater = None
+        self.xNewHighWater = None
+        self.nRead = 0
+        self.nSkipped = 0
+        self.nUpdated = 0
+
+
+# m v U s e H a s h
+    @ntrace
+    def mvUseHash(self):
+        ''' Changed-only by bio hash: add the hash column if need be. '''
+        if sHashColumn not in self.lColumns:
+            self.db.execute("ALTER TABLE %s ADD COLUMN %s TEXT"
+                            % (self.sTable, fnsQuote(sHashColumn)))
+            self.lColumns.append(sHashColumn)
+        self.bHash = True
+
+
+# m v U s e S i n c e
+    @ntrace
+    def mvUseSince(self, mysSinceColumn):
+        ''' Changed-only by timestamp column: get the last high-water
+             mark for it.
+        '''
+        if mysSinceColumn not in self.lColumns:
+            raise ValueError("table %s has no column %s"
+                            % (self.sTableName, mysSinceColumn))
+        self.db.execute("CREATE TABLE IF NOT EXISTS taxit_runs ("
+                        "tbl TEXT, col TEXT, stamp, "
+                        "PRIMARY KEY (tbl, col))")
+        self.sSinceColumn = mysSinceColumn
+        tRow = self.db.execute("SELECT stamp FROM taxit_runs "
+                        "WHERE tbl = ? AND col = ?",
+                        (self.sTableName, mysSinceColumn)).fetchone()
+        self.xHighWater = tRow[0] if tRow else None
+        NTRC.ntrace(3, "proc since col|%s| last|%s|"
+                    % (mysSinceColumn, self.xHighWater))
+
+
+# m g R e a d B i o s
+    def mgReadBios(self):
+        ''' Generate (rowid, bio, hash) for the rows to be done, in rowid
+             order.  The hash is None unless changed-only by hash.
+        '''
+        bHash = self.bHash
+        lSelect = ["rowid", self.sBio]
+        if bHash:
+            lSelect.append(fnsQuote(sHashColumn))
+        if self.sSinceColumn:
+            lSelect.append(fnsQuote(self.sSinceColumn))
+        sSql = "SELECT %s FROM %s WHERE rowid > ?" % (", ".join(lSelect),
+                                                        self.sTable)
+        lArgs = []
+        if self.sSinceColumn and self.xHighWater is not None:
+            sSql += " AND %s > ?" % fnsQuote(self.sSinceColumn)
+            lArgs.append(self.xHighWater)
+        sSql += " ORDER BY rowid LIMIT %d" % nPageRows
+        nLastRowid = -(2 ** 63)
+        while True:
+            cCursor = self.db.execute(sSql, [nLastRowid] + lArgs)
+            nPage = 0
+            while True:
+                ltRows = cCursor.fetchmany(nFetchRows)
+                if not ltRows:
+                    break
+                nPage += len(ltRows)
+                for tRow in ltRows:
+                    (nRowid, sBio) = tRow[0:2]
+                    # ASCII-7, as the bio of the same member in an export.
+                    sBio = fnsSanitize((sBio or "").encode("utf-8"))
+                    self.nRead += 1
+                    if self.sSinceColumn:
+                        xStamp = tRow[-1]
+                        if xStamp is not None and (
+                                self.xNewHighWater is None
+                                or xStamp > self.xNewHighWater):
+                            self.xNewHighWater = xStamp
+                    sHash = None
+                    if bHash:
+                        sHash = fnsBioHash(sBio)
+                        if sHash == tRow[2]:
+                            self.nSkipped += 1
+                            continue
+                    yield (nRowid, sBio, sHash)
+                nLastRowid = ltRows[-1][0]
+            if nPage < nPageRows:
+                break
+
+
+# m n W r i t e T a x o n s
+    @ntrace
+    def mnWriteTaxons(self, myitRows):
+        ''' Write back the categories.  Return count of rows updated.
+
+            myitRows generates (rowid, categories string, hash); the hash
+             is stored too, if changed-only by hash.
+            Batches of executemany, a commit every nCommitRows; whatever
+             was committed stays if the run dies.  The timestamp
+             high-water mark is saved with the last commit.
+        '''
+        bHash = self.bHash
+        if bHash:
+            sSql = ("UPDATE %s SET %s = ?, %s = ? WHERE rowid = ?"
+                    % (self.sTable, self.sTax, fnsQuote(sHashColumn)))
+        else:
+            sSql = "UPDATE %s SET %s = ? WHERE rowid = ?" % (self.sTable,
+                                                            self.sTax)
+        nInTransaction = 0
+        self.db.execute("BEGIN")
+        try:
+            while True:
+                ltBatch = list(itertools.islice(myitRows, nUpdateRows))
+                if not ltBatch:
+                    break
+                if bHash:
+                    ltArgs = [(sTaxons, sHash, nRowid)
+                                for (nRowid, sTaxons, sHash) in ltBatch]
+                else:
+                    ltArgs = [(sTaxons, nRowid)
+                                for (nRowid, sTaxons, sHash) in ltBatch]
+                self.db.executemany(sSql, ltArgs)
+                self.nUpdated += len(ltBatch)
+                nInTransaction += len(ltBatch)
+                if nInTransaction >= nCommitRows:
+                    self.db.execute("COMMIT")
+                    self.db.execute("BEGIN")
+                    nInTransaction = 0
+            if self.xNewHighWater is not None:
+                self.db.execute("INSERT OR REPLACE INTO taxit_runs "
+                            "VALUES (?, ?, ?)", (self.sTableName,
+                            self.sSinceColumn, self.xNewHighWater))
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        NTRC.ntrace(3, "proc db read|%d| skipped|%d| updated|%d|"
+                    % (self.nRead, self.nSkipped, self.nUpdated))
+        return self.nUpdated
+
+
+# m v C l o s e
+    def mvClose(self):
+        self.db.close()
+
+
+# Edit history:
+# 20261019  RBL Original version.
+#               Sanitize bios to ASCII-7, as memberio does for exports.
+#
+#
+
+#END
@@ -0,0 +1,778 @@
+#/usr/bin/python3
+# memberio.py
+#
+#                               RBLandau 20261019
+#
+# Reading and writing member export files, shared by taxit and showstems.
+#
+
+'''
+theory:
+
+map the export file into memory instead of reading it line by line
+take it in big slices, each ending at a line boundary
+do the per-line work on the whole slice at once, in C:
+ split it, strip the lines and drop the blank ones, join it back
+ sanitize to ASCII-7 with one bytes.translate and one decode
+then split the slice into the text lines the CSV parser wants
+(A regex to strip all the lines of a slice at once is much slower 
+ than split/strip/join: it tries a match at every blank in the text.)
+
+The page cache holds the mapped file, so a second run over the same
+ export does not read it from disk again.
+
+several input files:
+a small pool of reader threads parses them at the same time, each into 
+ its own short queue of batches of member dicts
+the caller takes the members file by file, in command line order, so
+ the output order does not depend on which reader is faster
+
+compressed input (gzip, bz2, xz, known by their magic bytes):
+can't map it; a helper thread decompresses big blocks into a short
+ queue while the caller works on the lines of the previous block
+ (zlib, bz2 and lzma let go of the GIL while they work)
+the blocks are cut at line boundaries and then handled like slices
+
+writing:
+write through a big buffer into a temp file in the target's directory
+if the target is named .gz, .bz2 or .xz, the buffer is handed to a 
+ helper thread that compresses it, again overlapping with the caller
+at the end, flush, fsync, and rename it over the target in one step
+on any error, remove the temp file; the target is never half-written
+chunked output: a new file every N records, each one written and
+ renamed into place the same way; the header, if any, starts every chunk
+
+JSON Lines (.jsonl or .ndjson, maybe compressed), one member per line:
+the lines are sanitized like CSV lines, then each is one json.loads
+the columns are the keys of the first member
+values are kept as they come (a list stays a list), except that a 
+ string with unicode escapes in it is sanitized again after decoding
+
+'''
+
+import os
+import io
+import re
+import csv
+import json
+import itertools
+import mmap
+import time
+import tempfile
+import threading
+import queue
+import gzip
+import bz2
+import lzma
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Translation tables for sanitizing: printable ASCII-7 stays, every
+#  other byte becomes an underscore.  The line table keeps newlines,
+#  so that a whole slice can be sanitized before it is split.
+bSanitizeTable = bytes(c if 32 <= c <= 126 else ord("_") for c in range(256))
+bLineTable = bytes(c if (32 <= c <= 126 or c == 10) else ord("_")
+                    for c in range(256))
+
+# Default slice size for the mapped file, and buffer size for output.
+nSliceBytes = 16 * 1024 * 1024
+nBufferBytes = 4 * 1024 * 1024
+
+# Compressed formats: magic bytes at the start of the file, the usual 
+#  file name extension, how to open one (by name or file object) as a
+#  binary file, and any options for writing.  Level 6, not 9, for gzip:
+#  much faster for nearly the same size.
+ltCompressions = [
+    ("gzip", b"\x1f\x8b",              ".gz",  gzip.open, 
+                                            {"compresslevel": 6}),
+    ("bz2",  b"BZh",                   ".bz2", bz2.open,  {}),
+    ("xz",   b"\xfd7zXZ\x00",           ".xz",  lzma.open, {}),
+]
+
+# How many blocks the helper threads may get ahead of the caller.
+nQueueBlocks = 4
+# Members per batch, and batches per queue, for the reader threads.
+nMemberBatch = 256
+nQueueBatches = 16
+
+# File name extensions of JSON Lines files.
+lJsonExtensions = [".jsonl", ".ndjson"]
+
+# A CSV record whose quote marks all make whole quoted fields, and the 
+#  start of one whose last quoted field goes on to the next line.  A 
+#  record that is neither has a quote inside an unquoted field.
+sQuotedField = r'"[^"]*(?:""[^"]*)*'
+sField = r'(?:%s"|[^",]*)' % sQuotedField
+reWholeRecord = re.compile(r'%s(?:,%s)*' % (sField, sField))
+reOpenRecord = re.compile(r'(?:%s,)*%s' % (sField, sQuotedField))
+
+
+# f n s S a n i t i z e
+def fnsSanitize(mysInput):
+    ''' Ensure that the input string becomes pure ASCII-7 for easy handling.
+
+        Map any higher characters into underscores.  This is necessary to
+         avoid problems with ISO Latin-1 and Unicode typographic characters
+         that are put into the text by word processors, especially on Macs.
+        Input is bytes (or any buffer); output is str.
+    '''
+    return bytes(mysInput).translate(bSanitizeTable).decode("ascii")
+
+
+# f n g S l i c e s
+def fngSlices(mymBuffer, mynSize, mynSliceBytes=nSliceBytes, mynStart=0):
+    ''' Generate slices of about mynSliceBytes of the buffer, as bytes,
+         each ending just after a newline (or at the end of the buffer),
+         starting at mynStart (which must be the start of a line).
+
+        Each slice is copied out of the map once, as a whole.  (Not as 
+         memoryviews: a map cannot be closed while views of it are alive,
+         which makes quitting early from a reader a trap.)
+    '''
+    nStart = mynStart
+    while nStart < mynSize:
+        nEnd = nStart + mynSliceBytes
+        if nEnd >= mynSize:
+            nEnd = mynSize
+        else:
+            nNewline = mymBuffer.find(b"\n", nEnd - 1)
+            nEnd = mynSize if nNewline < 0 else nNewline + 1
+        yield mymBuffer[nStart:nEnd]
+        nStart = nEnd
+
+
+# f n l S l i c e L i n e s
+def fnlSliceLines(mybSlice):
+    ''' Return the sanitized text lines of one slice of whole lines,
+         each stripped; drop lines that are empty after stripping.
+        So the CSV parser joins the lines of a quoted field that goes on
+         for several lines with nothing between them, for taxit and 
+         showstems alike.
+    '''
+    lKeep = [bLine for bLine in map(bytes.strip, mybSlice.split(b"\n")) 
+                if bLine]
+    if not lKeep:
+        return []
+    sText = b"\n".join(lKeep).translate(bLineTable).decode("ascii")
+    return sText.split("\n")
+
+
+# f n g R e a d S a n i t i z e d L i n e s
+def fngReadSanitizedLines(mysFilename, mynSliceBytes=nSliceBytes):
+    ''' Generate the non-blank lines of a member export file, sanitized to
+         ASCII-7 str, from a memory map of the file.  See fnlSliceLines.
+        A compressed file is decompressed on the fly instead.
+    '''
+    with open(mysFilename, "rb") as fhIn:
+        tCompression = fntCompression(fhIn.read(8))
+        if tCompression:
+            for bSlice in fngDecompressedSlices(mysFilename, tCompression, 
+                                                mynSliceBytes):
+                yield from fnlSliceLines(bSlice)
+            return
+        nSize = os.fstat(fhIn.fileno()).st_size
+        if nSize == 0:
+            return
+        with mmap.mmap(fhIn.fileno(), 0, access=mmap.ACCESS_READ) as mMap:
+            for bSlice in fngSlices(mMap, nSize, mynSliceBytes):
+                yield from fnlSliceLines(bSlice)
+
+
+# f n s F o r m a t
+def fnsFormat(mysFilename):
+    ''' Return "jsonl" or "csv", from the name of an export file, 
+         ignoring any compression extension.
+    '''
+    sName = mysFilename.lower()
+    for tCompression in ltCompressions:
+        if sName.endswith(tCompression[2]):
+            sName = sName[:-len(tCompression[2])]
+    if any(sName.endswith(sExt) for sExt in lJsonExtensions):
+        return "jsonl"
+    return "csv"
+
+
+# f n b P l a i n C s v
+def fnbPlainCsv(mysFilename):
+    ''' Return True if the export file is CSV, by its name, and is not
+         compressed, by its first bytes: one whose records can be read
+         from a byte offset, as after a checkpoint.
+    '''
+    if fnsFormat(mysFilename) != "csv":
+        return False
+    with open(mysFilename, "rb") as fhIn:
+        return fntCompression(fhIn.read(8)) is None
+
+
+# f n l R e a d C o l u m n s
+def fnlReadColumns(mysFilename):
+    ''' Return the list of column names from the header of an export,
+         or the keys of the first member of a JSON Lines file.
+    '''
+    itLines = fngReadSanitizedLines(mysFilename, mynSliceBytes=64 * 1024)
+    sHeader = next(itLines, "")
+    itLines.close()
+    if fnsFormat(mysFilename) == "jsonl":
+        return list(fndJsonMember(sHeader)) if sHeader else []
+    return sHeader.split(",") if sHeader else []
+
+
+# f n d J s o n M e m b e r
+def fndJsonMember(mysLine):
+    ''' Return the member dict from one sanitized JSON line. '''
+    dMember = json.loads(mysLine)
+    if "\\u" in mysLine:
+        # Escapes may have brought back what the sanitizer took out.
+        for sKey, xValue in dMember.items():
+            if isinstance(xValue, str) and not xValue.isascii():
+                dMember[sKey] = fnsSanitize(xValue.encode("utf-8"))
+    return dMember
+
+
+# f n g R e a d M e m b e r s
+def fngReadMembers(mysFilename):
+    ''' Generate the member dicts of one export file, CSV or JSON Lines. 
+    '''
+    if fnsFormat(mysFilename) == "jsonl":
+        return map(fndJsonMember, fngReadSanitizedLines(mysFilename))
+    return csv.DictReader(fngReadSanitizedLines(mysFilename))
+
+
+# f n b W h o l e R e c o r d
+def fnbWholeRecord(mysRecord):
+    ''' Return True if the text is a whole CSV record, False if its last
+         quoted field goes on to the next line, or None if it has a quote
+         inside an unquoted field.  
+        The CSV parser takes such a stray quote as it is, so counting 
+         quote marks no longer tells where a record ends.  
+    '''
+    if '"' not in mysRecord or reWholeRecord.fullmatch(mysRecord):
+        return True
+    if reOpenRecord.fullmatch(mysRecord):
+        return False
+    return None
+
+
+# f n g R e a d R e c o r d s
+def fngReadRecords(mysFilename):
+    ''' Generate the member records of one export file as sanitized 
+         text, without parsing them; skip the header.
+        A quoted field can go on for several lines.  Those lines are 
+         joined, with nothing between them, as the CSV parser would
+         have done with the stripped lines.  
+        From a record with a stray quote in it on, the rest of the file
+         is parsed by the CSV parser, and comes as member dicts: the
+         records so far were the same either way.  
+    '''
+    itLines = fngReadSanitizedLines(mysFilename)
+    sHeader = next(itLines, None)
+    for sLine in itLines:
+        lRecord = [sLine]
+        bWhole = fnbWholeRecord(sLine)
+        while bWhole is False:
+            sMore = next(itLines, None)
+            if sMore is None:
+                break
+            lRecord.append(sMore)
+            sLine = "".join(lRecord)
+            bWhole = fnbWholeRecord(sLine)
+        if bWhole is None:
+            yield from csv.DictReader(itertools.chain(lRecord, itLines),
+                                        fieldnames=sHeader.split(","))
+            return
+        yield sLine
+
+
+# f n g R e c o r d S l i c e s
+def fngRecordSlices(mysFilename, mynStart=0, mynSliceBytes=nSliceBytes):
+    ''' Generate (offset, records) for each slice of an uncompressed 
+         export file, from byte offset mynStart, which must be 0 or an 
+         offset from here.  Records are as from fngReadRecords (member
+         dicts after a stray quote); the header is skipped when starting
+         at 0.
+        The offset is where the next slice begins, if no record goes on 
+         past the end of this slice, else None: only at such an offset 
+         can reading start again, as after a checkpoint.
+    '''
+    with open(mysFilename, "rb") as fhIn:
+        if fntCompression(fhIn.read(8)):
+            raise ValueError("cannot resume in a compressed file: %s" 
+                            % mysFilename)
+        nSize = os.fstat(fhIn.fileno()).st_size
+        if nSize <= mynStart:
+            return
+        with mmap.mmap(fhIn.fileno(), 0, access=mmap.ACCESS_READ) as mMap:
+            nOffset = mynStart
+            bHeader = (mynStart == 0)
+            lPending = []
+            itSlices = fngSlices(mMap, nSize, mynSliceBytes, mynStart)
+            for bSlice in itSlices:
+                nOffset += len(bSlice)
+                lRecords = []
+                itLines = iter(fnlSliceLines(bSlice))
+                for sLine in itLines:
+                    if lPending:
+                        lPending.append(sLine)
+                        sLine = "".join(lPending)
+                    bWhole = fnbWholeRecord(sLine)
+                    if bWhole is None:
+                        break
+                    if not bWhole:
+                        lPending = lPending or [sLine]
+                        continue
+                    lPending = []
+                    if bHeader:
+                        bHeader = False
+                    else:
+                        lRecords.append(sLine)
+                else:
+                    yield (None if lPending else nOffset, lRecords)
+                    continue
+                # A stray quote: the CSV parser takes the rest of the 
+                #  file, and there is no offset to resume at until its 
+                #  end.
+                yield (None, lRecords)
+                itRest = itertools.chain([sLine], itLines, 
+                            itertools.chain.from_iterable(
+                                fnlSliceLines(bMore) 
+                                for bMore in itSlices))
+                itMembers = csv.DictReader(itRest, fieldnames=None 
+                                if bHeader else fnlReadColumns(mysFilename))
+                for lBatch in iter(lambda: list(itertools.islice(
+                                    itMembers, nMemberBatch)), []):
+                    yield (None, lBatch)
+                yield (nSize, [])
+                return
+            if lPending:
+                yield (nOffset, ["".join(lPending)])
+
+
+# f n g C o n c u r r e n t M e m b e r s
+def fngConcurrentMembers(mylFilenames, mynReaders=4, mylbRaw=None):
+    ''' Generate (file index, member dict) for all the files, in order,
+         while up to mynReaders threads read and parse them ahead.
+        For files flagged in mylbRaw, generate (file index, record line)
+         instead, and leave the parsing to the caller.
+        An error in a reader is raised here.
+    '''
+    evStop = threading.Event()
+    lQueues = [queue.Queue(maxsize=nQueueBatches) for _ in mylFilenames]
+
+    def fnvPut(myqBatches, myItem):
+        # Give up if the caller has stopped listening.
+        while not evStop.is_set():
+            try:
+                myqBatches.put(myItem, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def fnvReadFile(mysFilename, myqBatches, mybRaw):
+        try:
+            itMembers = (fngReadRecords(mysFilename) if mybRaw
+                            else fngReadMembers(mysFilename))
+            while True:
+                lBatch = list(itertools.islice(itMembers, nMemberBatch))
+                if not lBatch or not fnvPut(myqBatches, lBatch):
+                    break
+        except Exception as eErr:
+            fnvPut(myqBatches, eErr)
+        fnvPut(myqBatches, None)
+
+    with ThreadPoolExecutor(max_workers=max(1, mynReaders), 
+                            thread_name_prefix="reader") as cPool:
+        try:
+            lbRaw = mylbRaw or [False] * len(mylFilenames)
+            for sFile, qBatches, bRaw in zip(mylFilenames, lQueues, lbRaw):
+                cPool.submit(fnvReadFile, sFile, qBatches, bRaw)
+            for nFile, qBatches in enumerate(lQueues):
+                while True:
+                    lBatch = qBatches.get()
+                    if lBatch is None:
+                        break
+                    if isinstance(lBatch, Exception):
+                        raise lBatch
+                    for dMember in lBatch:
+                        yield (nFile, dMember)
+        finally:
+            evStop.set()
+
+
+# f n t C o m p r e s s i o n
+def fntCompression(mybHead):
+    ''' Return the ltCompressions entry for a file that starts with these
+         bytes, or None if it is not compressed.
+    '''
+    for tCompression in ltCompressions:
+        if mybHead.startswith(tCompression[1]):
+            return tCompression
+    return None
+
+
+# f n f h O p e n I n p u t
+def fnfhOpenInput(mysFilename):
+    ''' Open a member export file to read as binary, decompressing
+         transparently if need be.
+    '''
+    with open(mysFilename, "rb") as fhIn:
+        tCompression = fntCompression(fhIn.read(8))
+    if tCompression:
+        return tCompression[3](mysFilename, "rb")
+    return open(mysFilename, "rb")
+
+
+# f n g D e c o m p r e s s e d S l i c e s
+def fngDecompressedSlices(mysFilename, mytCompression, mynSliceBytes):
+    ''' Generate blocks of whole lines from a compressed file.  
+
+        A helper thread decompresses the next blocks while the caller
+         works on this one.  An error in the thread is raised here.
+    '''
+    qBlocks = queue.Queue(maxsize=nQueueBlocks)
+    evStop = threading.Event()
+
+    def fnvPump():
+        try:
+            with mytCompression[3](mysFilename, "rb") as fhIn:
+                while not evStop.is_set():
+                    bBlock = fhIn.read(mynSliceBytes)
+                    if not bBlock:
+                        break
+                    qBlocks.put(bBlock)
+        except Exception as eErr:
+            qBlocks.put(eErr)
+        qBlocks.put(None)
+
+    thPump = threading.Thread(target=fnvPump, daemon=True, 
+                                name="decompress")
+    thPump.start()
+    bCarry = b""
+    try:
+        while True:
+            bBlock = qBlocks.get()
+            if bBlock is None:
+                break
+            if isinstance(bBlock, Exception):
+                raise bBlock
+            # Cut at the last newline; the rest waits for the next block.
+            nNewline = bBlock.rfind(b"\n")
+            if nNewline < 0:
+                bCarry += bBlock
+                continue
+            yield bCarry + bBlock[:nNewline + 1]
+            bCarry = bBlock[nNewline + 1:]
+        if bCarry:
+            yield bCarry
+    finally:
+        # If the caller quits early, let the thread go, too.
+        evStop.set()
+        while thPump.is_alive():
+            try:
+                qBlocks.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+
+# c l a s s   C C o m p r e s s o r S i n k
+class CCompressorSink(io.RawIOBase):
+    ''' Write-only raw stream that compresses in a helper thread.
+
+        Blocks written here are queued; the thread feeds them to the
+         compressor, which writes to the file.  Closing waits for the
+         thread to finish and raises any error it had.
+    '''
+
+
+    def __init__(self, myfhFile, mytCompression):
+        ''' CCompressorSink init: Start the compressor thread. '''
+        super().__init__()
+        self.fhCompressed = mytCompression[3](myfhFile, "wb", 
+                                                **mytCompression[4])
+        self.qBlocks = queue.Queue(maxsize=nQueueBlocks)
+        self.eErr = None
+        self.nBytesIn = 0
+        self.thCompress = threading.Thread(target=self.mvPump, daemon=True,
+                                            name="compress")
+        self.thCompress.start()
+
+
+    def writable(self):
+        return True
+
+
+    def write(self, mybData):
+        if self.eErr:
+            raise self.eErr
+        bData = bytes(mybData)
+        self.qBlocks.put(bData)
+        self.nBytesIn += len(bData)
+        return len(bData)
+
+
+# m v P u m p
+    def mvPump(self):
+        ''' Thread: compress queued blocks until the None at the end. '''
+        while True:
+            bData = self.qBlocks.get()
+            if bData is None:
+                break
+            if self.eErr is None:
+                try:
+                    self.fhCompressed.write(bData)
+                except Exception as eErr:
+                    self.eErr = eErr
+
+
+    def close(self):
+        if self.closed:
+            return
+        self.qBlocks.put(None)
+        self.thCompress.join()
+        super().close()
+        # Writes the compressor's trailer; does not close the file.
+        self.fhCompressed.close()
+        if self.eErr:
+            raise self.eErr
+
+
+# c l a s s   C A t o m i c W r i t e r
+class CAtomicWriter():
+    ''' Text output file that appears, complete, only when committed. 
+
+        Use as a context manager: commit on normal exit, abort (remove 
+         the temp file, leave any old target alone) on an exception.
+        If the file name ends in .gz, .bz2 or .xz, the output is 
+         compressed that way, in a helper thread.
+        With mysTmpFilename, the temp file has that fixed name, so that a
+         later run can pick it up again (mynResumeAt: truncate it to that
+         many bytes and go on from there); on an exception it is kept, 
+         not removed.  mnCheckpoint makes what was written so far durable.
+         No compression then: offsets are in the uncompressed text.
+        Afterwards, nBytes and fSeconds tell how much and how fast:
+         nBytes is the size before compression, nFileBytes after;
+         fSeconds is the time spent in write() and in the commit, not 
+         the time the caller spent making the text.
+    '''
+
+
+    def __init__(self, mysFilename, mynBufferBytes=nBufferBytes,
+                mysTmpFilename=None, mynResumeAt=None):
+        ''' CAtomicWriter init: Open a temp file next to the target. '''
+        self.sFilename = mysFilename
+        ltCompressed = [tCompression for tCompression in ltCompressions
+                        if mysFilename.endswith(tCompression[2])]
+        self.bKeep = bool(mysTmpFilename)
+        if mysTmpFilename:
+            if ltCompressed:
+                raise ValueError("cannot checkpoint compressed output: %s"
+                                % mysFilename)
+            self.sTmpFilename = mysTmpFilename
+            nFd = os.open(mysTmpFilename, os.O_RDWR | os.O_CREAT, 0o666)
+            os.ftruncate(nFd, mynResumeAt or 0)
+            os.lseek(nFd, 0, os.SEEK_END)
+        else:
+            sDir = os.path.dirname(os.path.abspath(mysFilename))
+            (nFd, self.sTmpFilename) = tempfile.mkstemp(dir=sDir, 
+                    prefix="." + os.path.basename(mysFilename) + ".", 
+                    suffix=".tmp")
+            # mkstemp makes the file private; give it the usual permissions.
+            nUmask = os.umask(0)
+            os.umask(nUmask)
+            os.chmod(self.sTmpFilename, 0o666 & ~nUmask)
+        if ltCompressed:
+            self.fhFile = io.open(nFd, "wb")
+            self.cSink = CCompressorSink(self.fhFile, ltCompressed[0])
+            fhRaw = io.BufferedWriter(self.cSink, 
+                                        buffer_size=mynBufferBytes)
+        else:
+            self.fhFile = fhRaw = io.open(nFd, "wb", 
+                                        buffering=mynBufferBytes)
+            self.cSink = None
+        # newline="" so that the CSV "\r\n" line endings go out as is.
+        self.fhOut = io.TextIOWrapper(fhRaw, encoding="utf-8", newline="")
+        self.nBytes = 0
+        self.nFileBytes = 0
+        self.fSeconds = 0.0
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, myExcType, myExcValue, myTraceback):
+        if myExcType is None:
+            self.mvCommit()
+        else:
+            self.mvAbort()
+        return False
+
+
+# w r i t e
+    def write(self, mysText):
+        fStart = time.perf_counter()
+        nLen = self.fhOut.write(mysText)
+        self.fSeconds += time.perf_counter() - fStart
+        return nLen
+
+
+# m n C h e c k p o i n t
+    def mnCheckpoint(self):
+        ''' Flush and fsync the temp file.  Return its size in bytes. '''
+        fStart = time.perf_counter()
+        self.fhOut.flush()
+        self.fhFile.flush()
+        os.fsync(self.fhFile.fileno())
+        self.fSeconds += time.perf_counter() - fStart
+        return self.fhFile.tell()
+
+
+# m v C o m m i t
+    def mvCommit(self):
+        ''' Flush, fsync, and rename the temp file over the target. '''
+        fStart = time.perf_counter()
+        self.fhOut.flush()
+        if self.cSink:
+            # Closing the text stream finishes the compressor thread.
+            self.fhOut.close()
+            self.nBytes = self.cSink.nBytesIn
+        else:
+            self.nBytes = self.fhFile.tell()
+        self.fhFile.flush()
+        self.nFileBytes = self.fhFile.tell()
+        os.fsync(self.fhFile.fileno())
+        self.fhFile.close()
+        self.fhOut.close()
+        os.replace(self.sTmpFilename, self.sFilename)
+        # And make the rename itself durable.
+        nDirFd = os.open(os.path.dirname(os.path.abspath(self.sFilename)), 
+                            os.O_RDONLY)
+        try:
+            os.fsync(nDirFd)
+        finally:
+            os.close(nDirFd)
+        self.fSeconds += time.perf_counter() - fStart
+
+
+# m v A b o r t
+    def mvAbort(self):
+        ''' Throw away the temp file, unless it is to be resumed. '''
+        try:
+            self.fhOut.close()
+            self.fhFile.close()
+        finally:
+            if not self.bKeep:
+                os.unlink(self.sTmpFilename)
+
+
+# c l a s s   C C h u n k e d W r i t e r
+class CChunkedWriter():
+    ''' Output split into files of at most mynRows records each. 
+
+        Each write() must be one whole record, as csv and the JSON Lines
+         writer do it.  With mybHeader, the first write() is the header 
+         instead, and it goes at the top of every chunk.
+        Chunk files are named for the target with a sequence number 
+         before the extension: members.jsonl.gz gives members.00001.jsonl.gz,
+         members.00002.jsonl.gz, ...  Each one is a CAtomicWriter, 
+         committed when it is full; on an error, the chunks already 
+         committed stay, and the one being written is thrown away.
+        Afterwards, lFilenames, nBytes, nFileBytes and fSeconds are the 
+         totals over all chunks.
+    '''
+
+
+    def __init__(self, mysFilename, mynRows, mybHeader=False):
+        ''' CChunkedWriter init: No file yet, until the first record. '''
+        (sBase, sExt) = (mysFilename, "")
+        for tCompression in ltCompressions:
+            if sBase.endswith(tCompression[2]):
+                (sBase, sExt) = (sBase[:-len(tCompression[2])], 
+                                tCompression[2])
+        (sBase, sFormatExt) = os.path.splitext(sBase)
+        self.sPattern = sBase + ".%05d" + sFormatExt + sExt
+        self.nRows = max(1, mynRows)
+        self.sHeader = None if mybHeader else ""
+        self.cChunk = None
+        self.nChunkRows = 0
+        self.lFilenames = []
+        self.nBytes = 0
+        self.nFileBytes = 0
+        self.fSeconds = 0.0
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, myExcType, myExcValue, myTraceback):
+        if myExcType is None:
+            self.mvCommit()
+        elif self.cChunk:
+            self.cChunk.mvAbort()
+        return False
+
+
+# w r i t e
+    def write(self, mysText):
+        if self.sHeader is None:
+            self.sHeader = mysText
+            return len(mysText)
+        if self.cChunk and self.nChunkRows >= self.nRows:
+            self.mvCommitChunk()
+        if not self.cChunk:
+            self.mvOpenChunk()
+        self.nChunkRows += 1
+        return self.cChunk.write(mysText)
+
+
+# m v O p e n C h u n k
+    def mvOpenChunk(self):
+        sFilename = self.sPattern % (len(self.lFilenames) + 1)
+        self.cChunk = CAtomicWriter(sFilename)
+        self.lFilenames.append(sFilename)
+        self.nChunkRows = 0
+        if self.sHeader:
+            self.cChunk.write(self.sHeader)
+
+
+# m v C o m m i t C h u n k
+    def mvCommitChunk(self):
+        self.cChunk.mvCommit()
+        self.nBytes += self.cChunk.nBytes
+        self.nFileBytes += self.cChunk.nFileBytes
+        self.fSeconds += self.cChunk.fSeconds
+        self.cChunk = None
+
+
+# m v C o m m i t
+    def mvCommit(self):
+        ''' Commit the last chunk.  No records at all still makes one
+             chunk, with just the header.
+        '''
+        if not self.cChunk and not self.lFilenames:
+            self.mvOpenChunk()
+        if self.cChunk:
+            self.mvCommitChunk()
+
+
+# Edit history:
+# 20261019  RBL Original version: mmap reader, translate-table sanitizer.
+#               Add CAtomicWriter.
+#               Add transparent gzip/bz2/xz input and output, with the
+#                (de)compression in helper threads.
+#               Add fngConcurrentMembers: a pool of reader threads for
+#                several input files, members delivered in file order.
+#               Readers can deliver raw record lines instead of dicts.
+#               Read JSON Lines exports.  Add CChunkedWriter.
+#               Add fngRecordSlices and CAtomicWriter checkpoints, for
+#                resuming an interrupted run.
+#               Add fnbPlainCsv, to check inputs before checkpointing.
+#               A quote inside an unquoted field no longer joins records;
+#                the CSV parser takes the rest of that file instead.
+#               Lines are always stripped: showstems breaks the lines of
+#                a quoted bio the same way taxit does.
+#
+#
+
+#END
@@ -20,15 +20,47 @@ tokenize
 stem words
 add word to dict list for that stem
 
+Each distinct word is stemmed only once; after that it is just counted.
+
+For corpora too big to count in memory (--spill-words N):
+when N distinct words are held, write them out as a sorted run
+ of (word, count, stem) lines to a temp file and start over
+at the end, k-way merge the runs, summing the counts for each word,
+ straight into the listing
+
+To keep the results (--store DB --export-id ID):
+instead of the listing, upsert the (word, count, stem, suffix) rows into
+ the stemstore.py database under that export ID; query them there
+
+To look at just some of the words (--top K, --min-count N, 
+ --stem-prefix P):
+filter the words as they come out of the counts, no sort
+top K: keep a heap of size K, O(n log K); list by count, highest first
+otherwise sort only the words that got through the filters
+
+In parallel (--jobs N):
+map: workers each take chunks of raw lines, sanitize, parse, stem, count;
+ a chunk ends only at the end of a record (quotes balanced)
+reduce: merge the partial counts and stem->word sets pairwise, 
+ in a tree, in the parent, as they arrive
+
 '''
 
 from nltk.stem import PorterStemmer
-from collections import defaultdict
+from collections import defaultdict, Counter
 import sys
 import csv
 import re
+import heapq
+import tempfile
+import argparse
+import itertools
+import multiprocessing
 # Sorry, NewTrace is not python3 yet.  This is experimental.
 from NewTracep3 import NTRC, ntrace, ntracef
+from stemstore import CStemStore
+from stoplist import fntLoadStoplist
+from memberio import fngReadSanitizedLines, fnsSanitize, fnfhOpenInput
 
 
 class CStemWords():
@@ -36,28 +68,33 @@ class CStemWords():
 
 
     @ntrace
-    def __init__(self, mysStopwordFilename):
+    def __init__(self, mysStopwordFilename, mynSpillWords=0, 
+                        mysTmpDir=None):
         ''' CStemWords init: Initialize the empty stemword dict.  
              Get the stopword list from user-specified file.  
 
-            Store stopwords as a dict because it's faster to lookup.
-            Ignore blank lines and comment lines in stopword file.
+            Stopwords come as a frozenset, from the compiled artifact
+             if there is one (see stoplist).
+
+            The words for each stem are kept as the keys of a dict, which
+             is an insertion-ordered set: O(1) to test and add.  
+            Each word is stemmed once, when first seen; its stem is 
+             remembered in dWord2Stem.  After that only its count in 
+             cWordsNocc changes.  
+            If mynSpillWords is nonzero, that many distinct words is the 
+             memory budget; beyond it, counts are spilled to sorted runs
+             in temp files (in mysTmpDir, if given).  
         '''
-        self.dWords = defaultdict(list)
-        self.dWordsNocc = defaultdict(int)
-        self.dWordStemCrop = {}
-        self.dStoplist = dict()
-        with open(mysStopwordFilename, "r") as fhIn:
-            for sLine in fhIn:
-                sWord = sLine.strip()
-                if sWord and not sWord.startswith("#"):
-                    self.dStoplist[sWord] = len(sWord)
-            # Yes, this could be done as a one-liner, but uuuuugly.
-            #dStoplist = {w.strip():len(w.strip()) for w in fhIn
-            #               if w.strip() and not w.strip().startswith("#")}
-            # And slower, too, going thru .strip() four times.
+        self.dWords = defaultdict(dict)
+        self.dWord2Stem = dict()
+        self.cWordsNocc = Counter()
+        self.nSpillWords = mynSpillWords
+        self.sTmpDir = mysTmpDir
+        self.lRunFiles = []
+        (self.setStoplist, _) = fntLoadStoplist(mysStopwordFilename)
         self.ps = PorterStemmer()
-        NTRC.ntrace(3, "proc CStemWords.init dStop|%s|" % (self.dStoplist))
+        NTRC.ntrace(3, "proc CStemWords.init setStop|%s|" 
+                    % (sorted(self.setStoplist)))
 
 
 # m s C l e a n S t r i n g 
@@ -72,7 +109,7 @@ class CStemWords():
         lTokens1 = [w.strip(',.!?()(:;\"\'-') for w in lTokens0]
         lTokens2 = [word for word in lTokens1 
                     if word and word[0] not in ',.' ]
-        lTokens3 = [word for word in lTokens2 if word not in self.dStoplist]
+        lTokens3 = [word for word in lTokens2 if word not in self.setStoplist]
         sResult = ' '.join(lTokens3)
         return sResult
 
@@ -80,27 +117,160 @@ class CStemWords():
 # m l P r o c e s s S t r i n g 
     @ntrace
     def mlProcessString(self, mysInput):
-        ''' Find the stem of each word.  For each stem, keep a list of
+        ''' Find the stem of each word.  For each stem, keep a set of
              the unique words that translate to that stem.  
         '''
-        lStemPairs = [(self.ps.stem(word), word) for word in mysInput.split()]
-        for sStem, sWord in lStemPairs:
-            if sWord not in self.dWords[sStem]:
-                self.dWords[sStem].append(sWord)
-            self.dWordsNocc[sWord] += 1
-            self.dWordStemCrop[sWord] = (self.dWordsNocc[sWord]
-                                    , sWord[:len(sStem)]
-                                    , sStem
-                                    , sWord[len(sStem):])
+        lWords = mysInput.split()
+        dWord2Stem = self.dWord2Stem
+        lStemPairs = []
+        for sWord in lWords:
+            sStem = dWord2Stem.get(sWord)
+            if sStem is None:
+                sStem = self.ps.stem(sWord)
+                dWord2Stem[sWord] = sStem
+                self.dWords[sStem][sWord] = None
+            lStemPairs.append((sStem, sWord))
+        self.cWordsNocc.update(lWords)
+        if self.nSpillWords and len(self.cWordsNocc) >= self.nSpillWords:
+            self.mvSpillRun()
         return lStemPairs
 
 
+# m v S p i l l R u n 
+    @ntrace
+    def mvSpillRun(self):
+        ''' Write the words counted so far as a sorted run to a temp file,
+             then forget them to free the memory.  
+            
+            Run line format is <word> tab <count> tab <stem>.  Words never
+             contain whitespace, since they come from split().  
+        '''
+        fhRun = tempfile.TemporaryFile("w+", dir=self.sTmpDir)
+        for sWord, nOcc in sorted(self.cWordsNocc.items()):
+            fhRun.write("%s\t%d\t%s\n" % (sWord, nOcc, self.dWord2Stem[sWord]))
+        fhRun.seek(0)
+        self.lRunFiles.append(fhRun)
+        NTRC.ntrace(3, "proc spilled run|%s| words|%s|" 
+                    % (len(self.lRunFiles), len(self.cWordsNocc)))
+        self.dWords.clear()
+        self.dWord2Stem.clear()
+        self.cWordsNocc.clear()
+
+
+# m t T a k e P a r t i a l 
+    def mtTakePartial(self):
+        ''' Return the counts, stems and stem->word sets gathered so far
+             as a plain tuple (cheap to pickle), and start over empty.
+
+            The word->stem cache is kept, so that a worker does not 
+             re-stem words it has seen in earlier chunks; the partial
+             carries stems only for the words it counted.  
+        '''
+        dWord2Stem = self.dWord2Stem
+        tPartial = (self.cWordsNocc
+                    , {sWord: dWord2Stem[sWord] for sWord in self.cWordsNocc}
+                    , dict(self.dWords))
+        self.dWords = defaultdict(dict)
+        self.cWordsNocc = Counter()
+        return tPartial
+
+
+# m v M e r g e P a r t i a l 
+    @ntrace
+    def mvMergePartial(self, mytPartial):
+        ''' Add a partial from mtTakePartial or fntReducePartials. '''
+        (cWordsNocc, dWord2Stem, dWords) = mytPartial
+        self.cWordsNocc.update(cWordsNocc)
+        self.dWord2Stem.update(dWord2Stem)
+        for sStem, dStemWords in dWords.items():
+            self.dWords[sStem].update(dStemWords)
+        if self.nSpillWords and len(self.cWordsNocc) >= self.nSpillWords:
+            self.mvSpillRun()
+
+
 # m d G e t W o r d D i c t 
     @ntrace
     def mdGetWordStemCropDict(self):
         ''' Return the dictionary of words with their stems and 
-            cropped suffixes. '''
-        return self.dWordStemCrop
+            cropped suffixes. 
+            
+            The (nOcc, root, stem, suffix) tuples are built here, once
+             per word, rather than on every occurrence.  
+        '''
+        dWordStemCrop = {}
+        for sWord, nOcc in self.cWordsNocc.items():
+            dWordStemCrop[sWord] = fntStemCrop(sWord, nOcc, 
+                                                self.dWord2Stem[sWord])
+        return dWordStemCrop
+
+
+# m g G e t S o r t e d W o r d S t e m C r o p 
+    @ntrace
+    def mgGetSortedWordStemCrop(self, mybSorted=True):
+        ''' Generate (word, (nOcc, root, stem, suffix)) in word order.
+        
+            In memory if nothing was spilled; otherwise spill the rest, 
+             too, and merge the runs, summing counts of the same word.
+            If the caller does not need word order, an in-memory dict
+             is not sorted at all.  
+        '''
+        if not self.lRunFiles:
+            if mybSorted:
+                yield from sorted(self.mdGetWordStemCropDict().items())
+            else:
+                for sWord, nOcc in self.cWordsNocc.items():
+                    yield (sWord, fntStemCrop(sWord, nOcc, 
+                                                self.dWord2Stem[sWord]))
+            return
+        if self.cWordsNocc:
+            self.mvSpillRun()
+        lRuns = [fngReadRun(fhRun) for fhRun in self.lRunFiles]
+        sPrevWord, nPrevOcc, sPrevStem = None, 0, ""
+        for sWord, nOcc, sStem in heapq.merge(*lRuns):
+            if sWord == sPrevWord:
+                nPrevOcc += nOcc
+                continue
+            if sPrevWord is not None:
+                yield (sPrevWord, fntStemCrop(sPrevWord, nPrevOcc, sPrevStem))
+            sPrevWord, nPrevOcc, sPrevStem = sWord, nOcc, sStem
+        if sPrevWord is not None:
+            yield (sPrevWord, fntStemCrop(sPrevWord, nPrevOcc, sPrevStem))
+        for fhRun in self.lRunFiles:
+            fhRun.close()
+        self.lRunFiles = []
+
+
+# f n l S e l e c t W o r d s 
+@ntrace
+def fnlSelectWords(myitWords, mynTop=0, mynMinCount=0, mysStemPrefix=""):
+    ''' From (word, (nOcc, root, stem, suffix)) items in any order,
+         return the list of those with at least mynMinCount occurrences
+         and a stem that starts with mysStemPrefix.
+        If mynTop, return only the top that many by count, highest 
+         first (ties in word order), selected with a heap, not a sort.
+        Otherwise return them in word order.
+    '''
+    itSelected = (tItem for tItem in myitWords
+                    if tItem[1][0] >= mynMinCount 
+                    and tItem[1][2].startswith(mysStemPrefix))
+    if mynTop:
+        return heapq.nsmallest(mynTop, itSelected, 
+                                key=lambda tItem: (-tItem[1][0], tItem[0]))
+    return sorted(itSelected)
+
+
+# f n g R e a d R u n 
+def fngReadRun(myfhRun):
+    ''' Generate (word, count, stem) from one spilled run file. '''
+    for sLine in myfhRun:
+        (sWord, sOcc, sStem) = sLine.rstrip("\n").split("\t")
+        yield (sWord, int(sOcc), sStem)
+
+
+# f n t S t e m C r o p 
+def fntStemCrop(mysWord, mynOcc, mysStem):
+    ''' Return the (nOcc, root, stem, suffix) tuple for the listing. '''
+    return (mynOcc, mysWord[:len(mysStem)], mysStem, mysWord[len(mysStem):])
 
 
 # f n v P r o c e s s F i l e 
@@ -110,34 +280,124 @@ def fnvProcessFile(mysFilename, cStemmer):
          easier handling, extract the member bio from each line, 
          then clean it up a little and add its words to the stem dict.
     '''
-    # NB: File must be opened in read-binary mode.  This avoids UTF-8 decoding
-    #  problems and makes it easier to sanitize to pure ASCII-7.
-    with open(mysFilename, 'rb') as fhIn:
-        lLinesRaw = [sLine for sLine in fhIn]
-        lLines = [fnsSanitize(sLine) for sLine in lLinesRaw if sLine.strip()]
-        ldMembers = csv.DictReader(lLines)
-        for dMember in ldMembers:
-            NTRC.ntrace(3, "proc member|%s|" % (dMember))
-            if debug: print(".", end="")
-            sBioRaw = dMember["Short bio"].lower()
-            if sBioRaw:
-                sBio = cStemmer.msCleanString(sBioRaw)
-                lStem = cStemmer.mlProcessString(sBio)
-
-
-# f n s S a n i t i z e 
+    # NB: The file is read as bytes (memory-mapped).  This avoids UTF-8 
+    #  decoding problems and makes it easier to sanitize to pure ASCII-7.
+    # Lines are generated a slice at a time, so that memory stays bounded
+    #  by the stem dict (and its spill budget), not by the file size.  
+    itLines = fngReadSanitizedLines(mysFilename)
+    ldMembers = csv.DictReader(itLines)
+    for dMember in ldMembers:
+        NTRC.ntrace(3, "proc member|%s|" % (dMember))
+        if debug: print(".", end="")
+        sBioRaw = dMember["Short bio"].lower()
+        if sBioRaw:
+            sBio = cStemmer.msCleanString(sBioRaw)
+            lStem = cStemmer.mlProcessString(sBio)
+
+
+# f n v P r o c e s s F i l e P a r a l l e l 
+@ntrace
+def fnvProcessFileParallel(mysFilename, cStemmer, mycPool, mynChunkLines):
+    ''' Same result as fnvProcessFile, but the sanitize, parse and stem
+         work is mapped over a pool of worker processes in chunks of 
+         raw lines, and the partial counts are reduced here.  
+
+        Chunks are cut only between records (a quoted bio can go on for
+         several lines), so each can be parsed alone, given the header.
+        Chunks come back in order, and adjacent partials are merged as
+         they arrive, so the stem->word sets keep the same order as in a
+         serial run, and only a few partials are held at a time.  
+    '''
+    with fnfhOpenInput(mysFilename) as fhIn:
+        itLinesRaw = (sLine for sLine in fhIn if sLine.strip())
+        sHeader = fnsSanitize(next(itLinesRaw, b"").strip())
+        itChunks = ((sHeader, lChunk) for lChunk 
+                    in fngChunks(itLinesRaw, mynChunkLines))
+        tPartial = fntReducePartials(mycPool.imap(fntCountChunk, itChunks))
+    if tPartial:
+        cStemmer.mvMergePartial(tPartial)
+
+
+# f n g C h u n k s 
+def fngChunks(myitLines, mynLines):
+    ''' Generate lists of about mynLines raw lines from an iterator,
+         each ending at the end of a record: as in fngReadRecords, a 
+         record goes on until its count of quote marks is even.
+    '''
+    lChunk = []
+    nQuotes = 0
+    for bLine in myitLines:
+        lChunk.append(bLine)
+        nQuotes += bLine.count(b'"')
+        if len(lChunk) >= mynLines and not nQuotes % 2:
+            yield lChunk
+            lChunk = []
+            nQuotes = 0
+    if lChunk:
+        yield lChunk
+
+
+# f n t R e d u c e P a r t i a l s 
 @ntrace
-def fnsSanitize(mysInput):
-    ''' Ensure that the input string becomes pure ASCII-7 for easy handling.  
-    
-        Map any higher characters into underscores.  This is necessary to
-         avoid problems with ISO Latin-1 and Unicode typographic characters
-         that are put into the text by word processors, especially on Macs.
+def fntReducePartials(myitPartials):
+    ''' Tree reduction, as the partials arrive: merge adjacent pairs of
+         partials of the same size (in chunks), like carries in binary 
+         counting, so at most log2(chunks) of them are held.  At the 
+         end, merge what is left, right to left.  Return the one partial,
+         or None if there were none.  
     '''
-    lString = [chr(cint) if (cint>=32 and cint<=126) else "_"
-                for cint in mysInput]
-    sResult = "".join(lString)
-    return sResult
+    ltStack = []
+    for tPartial in myitPartials:
+        nSize = 1
+        while ltStack and ltStack[-1][0] == nSize:
+            (_, tLeft) = ltStack.pop()
+            tPartial = fntMergeTwoPartials(tLeft, tPartial)
+            nSize *= 2
+        ltStack.append((nSize, tPartial))
+    tPartial = None
+    while ltStack:
+        (_, tLeft) = ltStack.pop()
+        tPartial = (tLeft if tPartial is None 
+                    else fntMergeTwoPartials(tLeft, tPartial))
+    return tPartial
+
+
+# f n t M e r g e T w o P a r t i a l s 
+def fntMergeTwoPartials(mytLeft, mytRight):
+    ''' Merge the right partial into the left one.  Return the left. '''
+    (cWordsNocc, dWord2Stem, dWords) = mytLeft
+    cWordsNocc.update(mytRight[0])
+    dWord2Stem.update(mytRight[1])
+    for sStem, dStemWords in mytRight[2].items():
+        dWords.setdefault(sStem, {}).update(dStemWords)
+    return mytLeft
+
+
+# Each pool worker keeps its own stemmer, made once by the initializer.
+cWorkerStemmer = None
+
+# f n v I n i t W o r k e r 
+def fnvInitWorker(mysStopwordFilename):
+    ''' Pool initializer: load the stoplist once per worker process. '''
+    global cWorkerStemmer
+    NTRC.setWorker(multiprocessing.current_process().name)
+    cWorkerStemmer = CStemWords(mysStopwordFilename)
+
+
+# f n t C o u n t C h u n k 
+def fntCountChunk(mytChunk):
+    ''' Worker: sanitize, parse and stem one chunk of raw member lines.  
+        Return the partial counts for the parent to reduce.
+    '''
+    (sHeader, lLinesRaw) = mytChunk
+    itLines = itertools.chain([sHeader], 
+                (fnsSanitize(sLine.strip()) for sLine in lLinesRaw))
+    for dMember in csv.DictReader(itLines):
+        sBioRaw = dMember["Short bio"].lower()
+        if sBioRaw:
+            sBio = cWorkerStemmer.msCleanString(sBioRaw)
+            cWorkerStemmer.mlProcessString(sBio)
+    return cWorkerStemmer.mtTakePartial()
 
 
 # f n v D u m p W o r d s 
@@ -145,28 +405,101 @@ def fnsSanitize(mysInput):
 def fnvDumpWords(mydWords):
     ''' Dump resulting stem-to-word-list dictionary in readable form. '''
 #    print("\n\n====== FINAL DICT ======")
+    fnvDumpSortedWords(sorted(mydWords.items()))
+
+
+# f n v D u m p S o r t e d W o r d s 
+def fnvDumpSortedWords(myitWords, myfhOut=None):
+    ''' Dump (word, (nOcc, root, stem, suffix)) items, already in order,
+         to stdout or the given file.
+    '''
     print("%4s %-25s%-20s%-10s%s" 
-        % ('nOcc', 'Word', 'Stem', 'Suffix', 'Stem!=Root'))
-    for sWord, (nOcc, sRoot, sStem, sCrop) in sorted(mydWords.items()):
+        % ('nOcc', 'Word', 'Stem', 'Suffix', 'Stem!=Root'), file=myfhOut)
+    for sWord, (nOcc, sRoot, sStem, sCrop) in myitWords:
         sFlag = "" if sRoot == sStem else "*"
-        print("%4d %-25s%-20s%-10s%s" % (nOcc, sWord, sStem, sCrop, sFlag))
+        print("%4d %-25s%-20s%-10s%s" % (nOcc, sWord, sStem, sCrop, sFlag),
+                file=myfhOut)
+
+
+# f n d C l i P a r s e 
+def fndCliParse():
+    ''' Parse the command line.  Return a dict of the options. '''
+    cParse = argparse.ArgumentParser(
+        description="List all bio words with their stems and counts.")
+    cParse.add_argument("lFiles", metavar="file", nargs="*",
+        help="member export CSV file(s)")
+    cParse.add_argument("--spill-words", dest="nSpillWords", type=int, 
+        default=0, metavar="N",
+        help="memory budget: spill sorted runs to temp files "
+            "whenever N distinct words are held (default 0, never)")
+    cParse.add_argument("--tmpdir", dest="sTmpDir", default=None,
+        help="directory for spilled runs (default system temp)")
+    cParse.add_argument("--jobs", dest="nJobs", type=int, default=1,
+        metavar="N",
+        help="count in N worker processes (0 = one per CPU; "
+            "default 1, serial)")
+    cParse.add_argument("--chunk-lines", dest="nChunkLines", type=int,
+        default=1000, metavar="N",
+        help="member lines per parallel work unit (default 1000)")
+    cParse.add_argument("--top", dest="nTop", type=int, default=0,
+        metavar="K",
+        help="list only the K most frequent words, highest first")
+    cParse.add_argument("--min-count", dest="nMinCount", type=int, 
+        default=0, metavar="N",
+        help="list only words that occur at least N times")
+    cParse.add_argument("--stem-prefix", dest="sStemPrefix", default="",
+        metavar="P", help="list only words whose stem starts with P")
+    cParse.add_argument("--store", dest="sStore", default=None,
+        metavar="DB",
+        help="add the counts to this stem statistics store "
+            "instead of printing the listing")
+    cParse.add_argument("--export-id", dest="sExportId", default=None,
+        help="ID of this export in the store (default: first file name)")
+    cParse.add_argument("--export-date", dest="sExportDate", default=None,
+        metavar="YYYY-MM-DD",
+        help="date of this export in the store (default today)")
+    return vars(cParse.parse_args())
 
 
 # M A I N 
 @ntrace
-def main(cStemmer):
+def main(cStemmer, mydCli):
     ''' MAIN: Process any files on the command line.  Dump results. '''
-    for sFile in sys.argv[1:]:
-        fnvProcessFile(sFile, cStemmer)
-    dFinal = cStemmer.mdGetWordStemCropDict()
-    fnvDumpWords(dFinal)
+    nJobs = mydCli["nJobs"] or multiprocessing.cpu_count()
+    if nJobs > 1:
+        with multiprocessing.Pool(nJobs, fnvInitWorker, 
+                                    ("StopWordList.txt",)) as cPool:
+            for sFile in mydCli["lFiles"]:
+                fnvProcessFileParallel(sFile, cStemmer, cPool, 
+                                        mydCli["nChunkLines"])
+    else:
+        for sFile in mydCli["lFiles"]:
+            fnvProcessFile(sFile, cStemmer)
+    if mydCli["sStore"]:
+        cStore = CStemStore(mydCli["sStore"])
+        sSource = " ".join(mydCli["lFiles"])
+        nWords = cStore.mnAddExport(mydCli["sExportId"] or sSource, 
+                        cStemmer.mgGetSortedWordStemCrop(), 
+                        mydCli["sExportDate"], sSource)
+        cStore.mvClose()
+        NTRC.ntrace(0, "proc stored|%s| words in|%s|" 
+                    % (nWords, mydCli["sStore"]))
+    elif mydCli["nTop"] or mydCli["nMinCount"] or mydCli["sStemPrefix"]:
+        fnvDumpSortedWords(fnlSelectWords(
+                        cStemmer.mgGetSortedWordStemCrop(mybSorted=False), 
+                        mydCli["nTop"], mydCli["nMinCount"], 
+                        mydCli["sStemPrefix"]))
+    else:
+        fnvDumpSortedWords(cStemmer.mgGetSortedWordStemCrop())
 
 
 # E N T R Y   P O I N T 
 if __name__ == "__main__":
     debug = 0
-    cStem = CStemWords("StopWordList.txt")
-    sys.exit(main(cStem))
+    dCli = fndCliParse()
+    cStem = CStemWords("StopWordList.txt", dCli["nSpillWords"], 
+                        dCli["sTmpDir"])
+    sys.exit(main(cStem, dCli))
 
 
 # Edit history:
@@ -176,6 +509,26 @@ if __name__ == "__main__":
 # 20180118  RBL Reformulate for printing all the words and their stems 
 #                and suffixes.
 #               Change tokenizer to strip punctuation after splitting.  
+# 20261019  RBL Keep the words for each stem in insertion-ordered sets
+#                (dict keys) instead of lists, stem each word only once,
+#                count occurrences in a Counter, and build the output 
+#                tuples only when dumping.  
+#               Add --spill-words mode: bounded memory via sorted runs 
+#                in temp files, k-way merged at dump time.  
+#               Add --jobs mode: map chunks of member lines over a process
+#                pool, tree-reduce the partial counts.  
+#               Add --store mode: keep the counts in the stemstore.py 
+#                SQLite database, per export, instead of the listing.  
+#               Add --top, --min-count and --stem-prefix selections, by 
+#                heap and filter instead of sorting everything.  
+#               Read the export through the memberio mmap reader.  
+#               Read gzip/bz2/xz exports transparently (memberio).
+#               Stopwords from the compiled stoplist artifact.
+#               --jobs: cut chunks only between records, so a quoted
+#                bio on several lines stays whole; reduce the partials
+#                as they arrive.
+#               Strip each line, as taxit does, so a quoted bio on 
+#                several lines gives the same words to both.
 # 
 # 
 
@@ -0,0 +1,197 @@
+#/usr/bin/python3
+# stemstore.py
+#
+#                               RBLandau 20261019
+#
+# Keep word/stem statistics for each member export in an SQLite
+#  database, so that questions about stems can be answered from
+#  indexes instead of re-stemming every export and grepping
+#  stemlisting.txt.
+#
+
+'''
+theory:
+
+one row per (export, word): count, stem, suffix
+showstems.py --store adds an export: bulk upsert of its words
+queries:
+ top stems, summed over exports, optionally since some export date
+ words that map to a stem, summed over exports
+
+The export date is stored as text, so use YYYY-MM-DD (or YYYYMMDD, but
+ not both in the same store); "since 2018" then works as a prefix.
+
+'''
+
+import sys
+import sqlite3
+import argparse
+import datetime
+from NewTracep3 import NTRC, ntrace, ntracef
+
+
+# Schema.  The words table is clustered on (export, word) for the
+#  upserts, and indexed on stem with the count included, so that the
+#  stem queries never touch the table itself.
+lSchema = [
+    """CREATE TABLE IF NOT EXISTS exports (
+        export_id   TEXT PRIMARY KEY,
+        export_date TEXT NOT NULL,
+        source      TEXT,
+        loaded      TEXT)""",
+    """CREATE INDEX IF NOT EXISTS exports_date
+        ON exports (export_date, export_id)""",
+    """CREATE TABLE IF NOT EXISTS words (
+        export_id   TEXT NOT NULL,
+        word        TEXT NOT NULL,
+        count       INTEGER NOT NULL,
+        stem        TEXT NOT NULL,
+        suffix      TEXT NOT NULL,
+        PRIMARY KEY (export_id, word)) WITHOUT ROWID""",
+    """CREATE INDEX IF NOT EXISTS words_stem
+        ON words (stem, export_id, count, word)""",
+]
+
+
+# c l a s s   C S t e m S t o r e
+class CStemStore():
+    ''' Class that keeps per-export word/stem counts in SQLite. '''
+
+
+    @ntrace
+    def __init__(self, mysDbFilename):
+        ''' CStemStore init: Open (or create) the database. '''
+        self.db = sqlite3.connect(mysDbFilename)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        with self.db:
+            for sStmt in lSchema:
+                self.db.execute(sStmt)
+
+
+# m n A d d E x p o r t
+    @ntrace
+    def mnAddExport(self, mysExportId, myitWords, mysExportDate=None,
+                    mysSource=""):
+        ''' Store the words of one export.  Return count of words stored.
+
+            myitWords generates (word, (nOcc, root, stem, suffix)), as
+             CStemWords.mgGetSortedWordStemCrop does; it is streamed into
+             executemany, not listed.
+            Loading an export ID again replaces what was there.
+            All in one transaction.
+        '''
+        sDate = mysExportDate or datetime.date.today().isoformat()
+        sLoaded = datetime.datetime.now().isoformat(timespec="seconds")
+        itRows = ((mysExportId, sWord, nOcc, sStem, sCrop)
+                    for sWord, (nOcc, sRoot, sStem, sCrop) in myitWords)
+        with self.db:
+            self.db.execute("DELETE FROM words WHERE export_id = ?",
+                            (mysExportId,))
+            self.db.execute("INSERT OR REPLACE INTO exports "
+                            "VALUES (?, ?, ?, ?)",
+                            (mysExportId, sDate, mysSource, sLoaded))
+            cCursor = self.db.executemany(
+                            "INSERT INTO words VALUES (?, ?, ?, ?, ?) "
+                            "ON CONFLICT (export_id, word) DO UPDATE "
+                            "SET count = count + excluded.count",
+                            itRows)
+        NTRC.ntrace(3, "proc stored export|%s| words|%s|"
+                    % (mysExportId, cCursor.rowcount))
+        return cCursor.rowcount
+
+
+# m l T o p S t e m s
+    @ntrace
+    def mlTopStems(self, mynTop, mysSince=None):
+        ''' Return [(stem, nOcc, nWords)] for the most frequent stems,
+             summed over all exports, or those dated on or after mysSince.
+        '''
+        sSql = ("SELECT stem, SUM(count), COUNT(DISTINCT word) FROM words "
+                "WHERE export_id IN (SELECT export_id FROM exports "
+                "                    WHERE export_date >= ?) "
+                "GROUP BY stem ORDER BY 2 DESC, 1 LIMIT ?")
+        return self.db.execute(sSql, (mysSince or "", mynTop)).fetchall()
+
+
+# m l W o r d s F o r S t e m
+    @ntrace
+    def mlWordsForStem(self, mysStem, mysSince=None):
+        ''' Return [(word, nOcc)] for the words that map to the stem. '''
+        sSql = ("SELECT word, SUM(count) FROM words "
+                "WHERE stem = ? AND export_id IN (SELECT export_id "
+                "   FROM exports WHERE export_date >= ?) "
+                "GROUP BY word ORDER BY 2 DESC, 1")
+        return self.db.execute(sSql, (mysStem, mysSince or "")).fetchall()
+
+
+# m l E x p o r t s
+    @ntrace
+    def mlExports(self):
+        ''' Return [(export_id, date, source, loaded, nWords)]. '''
+        sSql = ("SELECT e.export_id, export_date, source, loaded, "
+                "   (SELECT COUNT(*) FROM words w "
+                "       WHERE w.export_id = e.export_id) "
+                "FROM exports e ORDER BY export_date, e.export_id")
+        return self.db.execute(sSql).fetchall()
+
+
+# m v C l o s e
+    def mvClose(self):
+        self.db.close()
+
+
+# f n d C l i P a r s e
+def fndCliParse():
+    ''' Parse the command line.  Return a dict of the options. '''
+    cParse = argparse.ArgumentParser(
+        description="Query the word/stem statistics store.  "
+            "Use showstems.py --store to add exports.")
+    cParse.add_argument("sDb", metavar="db", help="SQLite store file")
+    cParse.add_argument("--top", dest="nTop", type=int, default=0,
+        metavar="K", help="list the K most frequent stems")
+    cParse.add_argument("--stem", dest="sStem", default=None,
+        help="list the words that map to this stem")
+    cParse.add_argument("--since", dest="sSince", default=None,
+        metavar="DATE", help="only exports dated on or after DATE")
+    cParse.add_argument("--exports", dest="bExports", action="store_true",
+        help="list the exports in the store")
+    return vars(cParse.parse_args())
+
+
+# M A I N
+@ntrace
+def main(mydCli):
+    ''' MAIN: Answer whichever queries were asked. '''
+    cStore = CStemStore(mydCli["sDb"])
+    if mydCli["bExports"]:
+        print("%-20s %-12s %8s %-20s %s"
+            % ("Export", "Date", "Words", "Loaded", "Source"))
+        for (sId, sDate, sSource, sLoaded, nWords) in cStore.mlExports():
+            print("%-20s %-12s %8d %-20s %s"
+                % (sId, sDate, nWords, sLoaded, sSource))
+    if mydCli["nTop"]:
+        print("%6s %-20s%s" % ("nOcc", "Stem", "nWords"))
+        for (sStem, nOcc, nWords) in cStore.mlTopStems(mydCli["nTop"],
+                                                    mydCli["sSince"]):
+            print("%6d %-20s%d" % (nOcc, sStem, nWords))
+    if mydCli["sStem"]:
+        print("%6s %s" % ("nOcc", "Word"))
+        for (sWord, nOcc) in cStore.mlWordsForStem(mydCli["sStem"],
+                                                    mydCli["sSince"]):
+            print("%6d %s" % (nOcc, sWord))
+    cStore.mvClose()
+    return 0
+
+
+# E N T R Y   P O I N T
+if __name__ == "__main__":
+    sys.exit(main(fndCliParse()))
+
+
+# Edit history:
+# 20261019  RBL Original version.
+#
+#
+
+#END
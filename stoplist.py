@@ -0,0 +1,242 @@
+#/usr/bin/python3
+# stoplist.py
+#
+#                               RBLandau 20261019
+#
+# Compile the stopword list once, into a pickled artifact that taxit and
+#  showstems load as is, instead of each parsing the text file every run.
+#  Also merge and compare the lists in sourcedata/ that it came from.
+#
+
+'''
+theory:
+
+normalize: strip, lowercase, curly apostrophe to straight, dedupe
+StopWordList.txt is the curated list; the artifact is made from it,
+ and, with --merge, from the source lists, too
+the source lists are web pages saved as text; a line of a source is a
+ stop word only if it is one lowercase word (letters, apostrophes,
+ hyphens); the capitalized lines are the page around the list
+--diff: for each source, how many words, how many the curated list
+ lacks (and which), and which curated words are in no source
+
+the artifact, StopWordList.pickle beside StopWordList.txt, holds
+ frozensets of the words and of their Porter stems (so that stop
+ filtering can also be done after stemming), the size and time of
+ the text file it was made from, and whether the sources were merged in
+fntLoadStoplist() takes the name of the text file, as the classes
+ always have: it loads the artifact if it is there and was made from
+ the text file as it is now (same size and time); otherwise it reads
+ the text, as before
+a merged artifact has more words than the text file (871, not 671), so
+ it finds fewer categories; loading one gets a warning, on stderr
+
+'''
+
+import os
+import re
+import sys
+import pickle
+import argparse
+from NewTracep3 import NTRC, ntrace, ntracef
+
+
+# The lists that StopWordList.txt was merged from, by hand.
+lSourceFiles = [
+    "sourcedata/List of English Stop Words – XPO6.txt",
+    "sourcedata/Looong stopword lists.txt",
+    "sourcedata/StopWordList1.txt",
+    "sourcedata/StopWordList2.txt",
+    "sourcedata/Stopword List_01.txt",
+    ]
+
+# One stop word, as a line of a source list.
+reSourceWord = re.compile(r"[a-z][a-z'\-]*")
+
+
+# f n s N o r m a l i z e
+def fnsNormalize(mysWord):
+    ''' Return the word stripped, lowercased, with straight apostrophes. '''
+    return mysWord.strip().lower().replace("’", "'")
+
+
+# f n s e t R e a d S t o p l i s t
+def fnsetReadStoplist(mysFilename):
+    ''' Return the set of words of a stopword list text file, normalized.
+        Ignore blank lines and comment lines.
+    '''
+    setWords = set()
+    with open(mysFilename, "r") as fhIn:
+        for sLine in fhIn:
+            sWord = fnsNormalize(sLine)
+            if sWord and not sWord.startswith("#"):
+                setWords.add(sWord)
+    return setWords
+
+
+# f n s e t R e a d S o u r c e
+def fnsetReadSource(mysFilename):
+    ''' Return the set of stop words in a source list (a saved web page),
+         normalized.
+    '''
+    setWords = set()
+    with open(mysFilename, "r", errors="replace") as fhIn:
+        for sLine in fhIn:
+            sWord = sLine.strip().replace("’", "'")
+            if reSourceWord.fullmatch(sWord):
+                setWords.add(sWord)
+    return setWords
+
+
+# f n s e t S t e m S t o p l i s t
+def fnsetStemStoplist(mysetWords, mycStemmer=None):
+    ''' Return the frozenset of the Porter stems of the words. '''
+    if mycStemmer is None:
+        from nltk.stem import PorterStemmer
+        mycStemmer = PorterStemmer()
+    return frozenset(mycStemmer.stem(sWord) for sWord in mysetWords)
+
+
+# f n s A r t i f a c t N a m e
+def fnsArtifactName(mysFilename):
+    ''' Return the name of the compiled artifact for a stopword file. '''
+    return os.path.splitext(mysFilename)[0] + ".pickle"
+
+
+# f n t L o a d S t o p l i s t
+@ntrace
+def fntLoadStoplist(mysFilename):
+    ''' Return (frozenset of stop words, frozenset of their stems) for
+         the stopword file, from its compiled artifact if that is up to
+         date.  The stems are None if there is no artifact.
+    '''
+    sArtifact = fnsArtifactName(mysFilename)
+    if not os.path.exists(sArtifact):
+        return (frozenset(fnsetReadStoplist(mysFilename)), None)
+    with open(sArtifact, "rb") as fhIn:
+        dArtifact = pickle.load(fhIn)
+    try:
+        cStat = os.stat(mysFilename)
+    except FileNotFoundError:
+        cStat = None
+    if cStat is not None:
+        (_, nSize, nTime) = dArtifact.get("tMadeFrom", (None, None, None))
+        if (nSize, nTime) != (cStat.st_size, cStat.st_mtime_ns):
+            NTRC.ntrace(3, "proc stoplist artifact|%s| is stale" 
+                        % sArtifact)
+            return (frozenset(fnsetReadStoplist(mysFilename)), None)
+    if dArtifact.get("bMerged"):
+        # To stderr, not a trace: level 0 traces go to stdout, the CSV.
+        print("stoplist: warning: %s has the source lists merged in "
+                "(%d words)" % (sArtifact, len(dArtifact["setWords"])),
+                file=sys.stderr)
+    NTRC.ntrace(3, "proc stoplist from|%s| words|%d|"
+                % (sArtifact, len(dArtifact["setWords"])))
+    return (dArtifact["setWords"], dArtifact["setStems"])
+
+
+# f n v W r i t e A r t i f a c t
+@ntrace
+def fnvWriteArtifact(mysetWords, mysFilename, mysBaseFilename, 
+                        mybMerged=False):
+    ''' Write the artifact: the words, their stems, and what they were
+         made from (and whether the source lists were merged in); 
+         atomically.
+    '''
+    cStat = os.stat(mysBaseFilename)
+    dArtifact = {
+        "setWords": frozenset(mysetWords),
+        "setStems": fnsetStemStoplist(mysetWords),
+        "tMadeFrom": (mysBaseFilename, cStat.st_size, cStat.st_mtime_ns),
+        "bMerged": mybMerged,
+        }
+    sTmpFile = mysFilename + ".tmp"
+    with open(sTmpFile, "wb") as fhOut:
+        pickle.dump(dArtifact, fhOut, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(sTmpFile, mysFilename)
+
+
+# f n v W r i t e D i f f
+def fnvWriteDiff(mysetBase, mydSources, myfhOut=sys.stdout):
+    ''' Compare each source list with the curated list. '''
+    myfhOut.write("%6s %6s %6s  %s\n" % ("words", "inbase", "new",
+                    "source"))
+    for sSource, setWords in mydSources.items():
+        setNew = setWords - mysetBase
+        myfhOut.write("%6d %6d %6d  %s\n" % (len(setWords),
+                    len(setWords & mysetBase), len(setNew), sSource))
+        if setNew:
+            myfhOut.write("        new: %s\n" % " ".join(sorted(setNew)))
+    setOnlyBase = mysetBase.difference(*mydSources.values())
+    myfhOut.write("%6d in the curated list only: %s\n"
+                    % (len(setOnlyBase), " ".join(sorted(setOnlyBase))))
+
+
+# f n d C l i P a r s e
+def fndCliParse():
+    ''' Parse the command line.  Return a dict of the options. '''
+    cParse = argparse.ArgumentParser(
+        description="Compile the stopword list into the artifact that "
+            "taxit and showstems load; merge and compare the source lists.")
+    cParse.add_argument("lSources", metavar="source", nargs="*",
+        help="source stopword lists (default: the lists in sourcedata/)")
+    cParse.add_argument("--base", dest="sBaseFile",
+        default="StopWordList.txt", metavar="FILE",
+        help="the curated list (default StopWordList.txt)")
+    cParse.add_argument("--merge", dest="bMerge", action="store_true",
+        help="add the words of the sources to the curated list")
+    cParse.add_argument("--diff", dest="bDiff", action="store_true",
+        help="compare each source with the curated list")
+    cParse.add_argument("--text", dest="sTextFile", default=None,
+        metavar="FILE",
+        help="also write the list, normalized and sorted, to FILE")
+    cParse.add_argument("--output", dest="sOutputFile", default=None,
+        metavar="FILE",
+        help="the artifact (default: the --base name, .pickle)")
+    cParse.add_argument("--no-output", dest="bNoOutput",
+        action="store_true",
+        help="write no artifact (e.g., only --diff)")
+    dCli = vars(cParse.parse_args())
+    dCli["lSources"] = dCli["lSources"] or lSourceFiles
+    dCli["sOutputFile"] = (dCli["sOutputFile"]
+                            or fnsArtifactName(dCli["sBaseFile"]))
+    return dCli
+
+
+# M A I N
+def main(mydCli):
+    ''' MAIN: Read, merge, compare, write. '''
+    setBase = fnsetReadStoplist(mydCli["sBaseFile"])
+    dSources = dict()
+    if mydCli["bMerge"] or mydCli["bDiff"]:
+        dSources = {sSource: fnsetReadSource(sSource)
+                    for sSource in mydCli["lSources"]}
+    setWords = set(setBase)
+    if mydCli["bMerge"]:
+        setWords.update(*dSources.values())
+    if mydCli["bDiff"]:
+        fnvWriteDiff(setBase, dSources)
+    if mydCli["sTextFile"]:
+        with open(mydCli["sTextFile"], "w") as fhOut:
+            fhOut.writelines(sWord + "\n" for sWord in sorted(setWords))
+    if not mydCli["bNoOutput"]:
+        fnvWriteArtifact(setWords, mydCli["sOutputFile"],
+                        mydCli["sBaseFile"], mydCli["bMerge"])
+        print("%8d stop words, compiled to %s"
+                % (len(setWords), mydCli["sOutputFile"]), file=sys.stderr)
+    return 0
+
+
+# E N T R Y   P O I N T
+if __name__ == "__main__":
+    sys.exit(main(fndCliParse()))
+
+
+# Edit history:
+# 20261019  RBL Original version.
+#               The artifact is used only if made from the text file as
+#                it is; a merged one is loaded with a warning.
+#
+#
+
+#END
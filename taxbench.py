@@ -0,0 +1,316 @@
+#/usr/bin/python3
+# taxbench.py
+#
+#                               RBLandau 20261019
+#
+# Benchmark taxit and showstems on fixed synthetic exports, and their
+#  stages alone, and compare with stored baselines: exit non-zero if
+#  something got slower than the tolerance allows, and say what.
+#
+
+'''
+theory:
+
+synthetic exports, made from a fixed seed so they are the same every
+ time: small, medium and large (1k, 10k, 50k members), with bios of
+ words from sourcedata/voc.txt and the taxonomy keywords, some
+ punctuation, and now and then a quoted field with commas in it (the
+ slow path); made once in --workdir (a temp directory) and reused
+scenarios, each with a throughput (higher is better):
+ taxit-SIZE, showstems-SIZE: the whole program, in a subprocess, on
+  that export, output thrown away; members/s
+ sanitize: memberio's reading and sanitizing of the large export,
+  nothing else; MB/s
+ tokenize: CTaxify.msCleanString (the regex tokenizer and stop words)
+  on the bios of the medium export; bios/s
+ stem: CTaxify.mlStemWords, from a cold stem cache, on the tokens of
+  the medium export; tokens/s
+each scenario is run --repeat times; the best time counts (the least
+ disturbed by whatever else the machine was doing)
+
+results are JSON: throughput and unit per scenario, plus the Python
+ version, the machine, and whether tracing was off (TRACE_PRODUCTION;
+ runs with and without it are not comparable)
+--save FILE stores the results as a baseline; --baseline FILE compares
+ with one: a scenario whose throughput is below baseline x (1 -
+ tolerance) is a regression; the stage is reported, and the exit code
+ is 1
+
+'''
+
+import os
+import sys
+import csv
+import json
+import time
+import random
+import tempfile
+import platform
+import argparse
+import subprocess
+from NewTracep3 import NTRC, ntrace, ntracef
+from memberio import fngReadSanitizedLines, fngReadMembers
+from taxit_03 import CTaxify
+from fuzzyfix import fnlTaxonomyKeywords, fnlReadWords
+
+
+# Members in each synthetic export.
+dSizes = {"small": 1000, "medium": 10000, "large": 50000}
+lScenarioKinds = ["taxit", "showstems", "sanitize", "tokenize", "stem"]
+dPrograms = {"taxit": "taxit_03.py", "showstems": "showstems.py"}
+nSeed = 20261019
+
+
+# f n v M a k e E x p o r t
+@ntrace
+def fnvMakeExport(mysFilename, mynMembers, mynSeed=nSeed):
+    ''' Write a synthetic member export, the same for the same seed. '''
+    cRandom = random.Random(mynSeed + mynMembers)
+    lVocabulary = fnlReadWords("sourcedata/voc.txt")
+    lKeywords = fnlTaxonomyKeywords("TaxonomyList.txt")
+    sTmpFile = mysFilename + ".tmp"
+    with open(sTmpFile, "w", newline="") as fhOut:
+        cWriter = csv.writer(fhOut, lineterminator="\r\n")
+        cWriter.writerow(["First name", "Last name", "Email", "Short bio",
+                            "Taxonomy terms", "Class year"])
+        for nMember in range(mynMembers):
+            lWords = []
+            for _ in range(cRandom.randint(20, 120)):
+                sWord = (cRandom.choice(lKeywords) if cRandom.random() < 0.12
+                        else cRandom.choice(lVocabulary))
+                fPunct = cRandom.random()
+                if fPunct < 0.08:
+                    sWord += "."
+                elif fPunct < 0.12:
+                    sWord += ";"
+                lWords.append(sWord)
+            lWords[0] = lWords[0].capitalize()
+            if cRandom.random() < 0.05:
+                # Commas and quotes: this one goes the slow way.
+                lWords.insert(cRandom.randrange(len(lWords)),
+                                '"quoted, too",')
+            cWriter.writerow(["Fn%d" % nMember, "Ln%d" % nMember,
+                            "m%d@example.org" % nMember, " ".join(lWords),
+                            "", str(1990 + nMember % 35)])
+    os.replace(sTmpFile, mysFilename)
+
+
+# f n s E x p o r t
+def fnsExport(mysWorkdir, mysSize):
+    ''' Return the file name of the synthetic export; make it if need be. '''
+    sFilename = os.path.join(mysWorkdir, "taxbench_%s_%d_%d.csv"
+                            % (mysSize, dSizes[mysSize], nSeed))
+    if not os.path.exists(sFilename):
+        fnvMakeExport(sFilename, dSizes[mysSize])
+    return sFilename
+
+
+# f n f B e s t T i m e
+def fnfBestTime(myfnRun, mynRepeat):
+    ''' Return the least time of mynRepeat runs of the function. '''
+    fBest = float("inf")
+    for _ in range(mynRepeat):
+        fStart = time.perf_counter()
+        myfnRun()
+        fBest = min(fBest, time.perf_counter() - fStart)
+    return fBest
+
+
+# f n d R u n P r o g r a m
+def fndRunProgram(mylArgs, mynMembers, mynRepeat):
+    ''' Time a program on an export, output thrown away. '''
+    def fnvRun():
+        subprocess.run([sys.executable] + mylArgs, check=True,
+                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    fSeconds = fnfBestTime(fnvRun, mynRepeat)
+    return {"throughput": mynMembers / fSeconds, "unit": "members/s",
+            "seconds": fSeconds}
+
+
+# f n d R u n S a n i t i z e
+def fndRunSanitize(mysFilename, mynRepeat):
+    ''' Time reading and sanitizing an export, and nothing else. '''
+    def fnvRun():
+        for _ in fngReadSanitizedLines(mysFilename):
+            pass
+    fSeconds = fnfBestTime(fnvRun, mynRepeat)
+    return {"throughput": os.path.getsize(mysFilename) / 1e6 / fSeconds,
+            "unit": "MB/s", "seconds": fSeconds}
+
+
+# f n d R u n T o k e n i z e
+def fndRunTokenize(mylBios, mynRepeat):
+    ''' Time the tokenizer and stop word removal on the bios. '''
+    cTaxer = CTaxify("StopWordList.txt", "TaxonomyList.txt")
+    def fnvRun():
+        for sBio in mylBios:
+            cTaxer.msCleanString(sBio)
+    fSeconds = fnfBestTime(fnvRun, mynRepeat)
+    return {"throughput": len(mylBios) / fSeconds, "unit": "bios/s",
+            "seconds": fSeconds}
+
+
+# f n d R u n S t e m
+def fndRunStem(myllWords, mynRepeat):
+    ''' Time stemming the words of the bios, from a cold stem cache. '''
+    cTaxer = CTaxify("StopWordList.txt", "TaxonomyList.txt")
+    nTokens = sum(len(lWords) for lWords in myllWords)
+    def fnvRun():
+        cTaxer.dWord2Stem.clear()
+        for lWords in myllWords:
+            cTaxer.mlStemWords(lWords)
+    fSeconds = fnfBestTime(fnvRun, mynRepeat)
+    return {"throughput": nTokens / fSeconds, "unit": "tokens/s",
+            "seconds": fSeconds}
+
+
+# f n d R u n S c e n a r i o s
+@ntrace
+def fndRunScenarios(mylSizes, mylKinds, mynRepeat, mysWorkdir):
+    ''' Run the scenarios.  Return {scenario: result}. '''
+    dResults = dict()
+    for sKind in dPrograms:
+        if sKind not in mylKinds:
+            continue
+        for sSize in mylSizes:
+            sExport = fnsExport(mysWorkdir, sSize)
+            sScenario = "%s-%s" % (sKind, sSize)
+            print("running %s" % sScenario, file=sys.stderr)
+            dResults[sScenario] = fndRunProgram([dPrograms[sKind], sExport],
+                                                dSizes[sSize], mynRepeat)
+    if "sanitize" in mylKinds:
+        print("running sanitize", file=sys.stderr)
+        dResults["sanitize"] = fndRunSanitize(fnsExport(mysWorkdir, "large"),
+                                                mynRepeat)
+    if "tokenize" in mylKinds or "stem" in mylKinds:
+        cTaxer = CTaxify("StopWordList.txt", "TaxonomyList.txt")
+        lBios = [(dMember["Short bio"] or "").lower() for dMember
+                in fngReadMembers(fnsExport(mysWorkdir, "medium"))]
+        if "tokenize" in mylKinds:
+            print("running tokenize", file=sys.stderr)
+            dResults["tokenize"] = fndRunTokenize(lBios, mynRepeat)
+        if "stem" in mylKinds:
+            print("running stem", file=sys.stderr)
+            llWords = [cTaxer.msCleanString(sBio).split() for sBio in lBios]
+            dResults["stem"] = fndRunStem(llWords, mynRepeat)
+    return dResults
+
+
+# f n l C o m p a r e
+def fnlCompare(mydResults, mydBaseline, myfTolerance):
+    ''' Return the list of (scenario, unit, baseline, now, change, status)
+         for the scenarios run; status is "ok", "REGRESSED", or "new".
+    '''
+    ltRows = []
+    for sScenario, dNow in mydResults.items():
+        dBase = mydBaseline.get(sScenario)
+        if dBase is None:
+            ltRows.append((sScenario, dNow["unit"], None,
+                            dNow["throughput"], None, "new"))
+            continue
+        fChange = dNow["throughput"] / dBase["throughput"] - 1.0
+        sStatus = "REGRESSED" if fChange < -myfTolerance else "ok"
+        ltRows.append((sScenario, dNow["unit"], dBase["throughput"],
+                        dNow["throughput"], fChange, sStatus))
+    return ltRows
+
+
+# f n d C l i P a r s e
+def fndCliParse():
+    ''' Parse the command line.  Return a dict of the options. '''
+    cParse = argparse.ArgumentParser(
+        description="Benchmark taxit, showstems and their stages on "
+            "synthetic exports; compare with a baseline.")
+    cParse.add_argument("--sizes", dest="lSizes", nargs="+",
+        choices=list(dSizes), default=list(dSizes),
+        help="export sizes for taxit and showstems (default all)")
+    cParse.add_argument("--scenarios", dest="lKinds", nargs="+",
+        choices=lScenarioKinds, default=lScenarioKinds,
+        help="which kinds of scenario to run (default all)")
+    cParse.add_argument("--repeat", dest="nRepeat", type=int, default=3,
+        metavar="N",
+        help="run each scenario N times, keep the best (default 3)")
+    cParse.add_argument("--workdir", dest="sWorkdir",
+        default=os.path.join(tempfile.gettempdir(), "taxbench"),
+        metavar="DIR",
+        help="where the synthetic exports are made and kept "
+            "(default taxbench in the temp directory)")
+    cParse.add_argument("--baseline", dest="sBaselineFile",
+        default=None, metavar="FILE",
+        help="compare with the baseline in FILE")
+    cParse.add_argument("--tolerance", dest="fTolerance", type=float,
+        default=0.10, metavar="F",
+        help="a throughput more than F (a fraction) below the baseline "
+            "is a regression (default 0.10)")
+    cParse.add_argument("--save", dest="sSaveFile", default=None,
+        metavar="FILE",
+        help="store the results in FILE, as the next baseline")
+    dCli = vars(cParse.parse_args())
+    if dCli["nRepeat"] < 1:
+        cParse.error("--repeat must be at least 1")
+    return dCli
+
+
+# M A I N
+def main(mydCli):
+    ''' MAIN: Run, report, compare, save.  Return 1 on a regression. '''
+    bProduction = os.getenv("TRACE_PRODUCTION", "NO") == "YES"
+    if not bProduction:
+        print("taxbench: TRACE_PRODUCTION is not YES; tracing costs time",
+                file=sys.stderr)
+    dBaseline = None
+    if mydCli["sBaselineFile"]:
+        with open(mydCli["sBaselineFile"], "r") as fhIn:
+            dBaseline = json.load(fhIn)
+        if dBaseline.get("trace_production") != bProduction:
+            print("taxbench: baseline %s was run with TRACE_PRODUCTION "
+                "%s; not comparable" % (mydCli["sBaselineFile"],
+                "YES" if dBaseline.get("trace_production") else "not YES"),
+                file=sys.stderr)
+            return 2
+    os.makedirs(mydCli["sWorkdir"], exist_ok=True)
+    dResults = fndRunScenarios(mydCli["lSizes"], mydCli["lKinds"],
+                                mydCli["nRepeat"], mydCli["sWorkdir"])
+    nRegressed = 0
+    if dBaseline is None:
+        print("%-20s %12s %s" % ("scenario", "throughput", "unit"))
+        for sScenario, dNow in dResults.items():
+            print("%-20s %12.1f %s" % (sScenario, dNow["throughput"],
+                                        dNow["unit"]))
+    else:
+        print("%-20s %12s %12s %8s  %-10s %s" % ("scenario", "baseline",
+                "now", "change", "unit", "status"))
+        for (sScenario, sUnit, fBase, fNow, fChange, sStatus) in \
+                fnlCompare(dResults, dBaseline["scenarios"],
+                            mydCli["fTolerance"]):
+            print("%-20s %12s %12.1f %8s  %-10s %s" % (sScenario,
+                    "" if fBase is None else "%.1f" % fBase, fNow,
+                    "" if fChange is None else "%+.1f%%" % (100 * fChange),
+                    sUnit, sStatus))
+            if sStatus == "REGRESSED":
+                nRegressed += 1
+                print("taxbench: stage %s regressed %.1f%%, more than the "
+                        "tolerance of %.1f%%" % (sScenario, -100 * fChange,
+                        100 * mydCli["fTolerance"]), file=sys.stderr)
+    if mydCli["sSaveFile"]:
+        dSave = {"python": platform.python_version(),
+                "machine": platform.platform(),
+                "trace_production": bProduction,
+                "scenarios": dResults}
+        with open(mydCli["sSaveFile"], "w") as fhOut:
+            json.dump(dSave, fhOut, indent=2)
+            fhOut.write("\n")
+    return 1 if nRegressed else 0
+
+
+# E N T R Y   P O I N T
+if __name__ == "__main__":
+    sys.exit(main(fndCliParse()))
+
+
+# Edit history:
+# 20261019  RBL Original version.
+#
+#
+
+#END
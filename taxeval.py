@@ -0,0 +1,306 @@
+#/usr/bin/python3
+# taxeval.py
+#
+#                               RBLandau 20261019
+#
+# Evaluate the taxonomy against a labeled sample: a CSV of members whose
+#  categories have been checked by hand.  Precision, recall and F1 for
+#  each category and overall, and which categories get mistaken for
+#  which, instead of eyeballing the output.
+#
+
+'''
+theory:
+
+the gold file is a member export (CSV or JSON Lines) with the bio and
+ the right categories; the easy way to make one is to correct the
+ "Taxonomy terms" column of taxit output by hand, so that is the
+ default gold column
+for each member, categories are found from the bio with CTaxify, as
+ taxit does (same options: taxonomy file, ancestors, fuzzy, stop stems)
+each set of categories is a bitset, one bit per category (the taxer's
+ numbering, and more bits for gold names that the taxonomy lacks):
+ true positives = gold & found, false positives = found & ~gold,
+ false negatives = gold & ~found
+the bitsets are counted by distinct value first; bits are taken apart
+ only once per distinct bitset, and there are few of those, so the
+ arithmetic for 100k members is a fraction of a second (finding the
+ categories is most of the time)
+confusion pairs: for a member, each category missed against each one
+ found wrongly; counted by distinct (missed, wrong) pair of bitsets
+
+precision = tp / (tp + fp), recall = tp / (tp + fn),
+F1 = 2 P R / (P + R); overall both micro (sums of the counts over
+ categories) and macro (mean of the categories' numbers)
+
+'''
+
+import sys
+import argparse
+from collections import Counter
+from NewTracep3 import NTRC, ntrace, ntracef
+from memberio import fngReadMembers
+from taxit_03 import CTaxify, fntBioTaxons
+from fuzzyfix import CFuzzyFixer, fnlTaxonomyKeywords, fnlReadWords
+
+
+# f n l B i t s
+def fnlBits(mynMask):
+    ''' Return the list of the bit numbers set in the bitset. '''
+    lBits = []
+    nBit = 0
+    while mynMask:
+        if mynMask & 1:
+            lBits.append(nBit)
+        mynMask >>= 1
+        nBit += 1
+    return lBits
+
+
+# f n t P R F
+def fntPRF(mynTP, mynFP, mynFN):
+    ''' Return (precision, recall, F1); zero where undefined. '''
+    fP = mynTP / (mynTP + mynFP) if mynTP + mynFP else 0.0
+    fR = mynTP / (mynTP + mynFN) if mynTP + mynFN else 0.0
+    fF = 2 * fP * fR / (fP + fR) if fP + fR else 0.0
+    return (fP, fR, fF)
+
+
+# c l a s s   C T a x E v a l
+class CTaxEval():
+    ''' Class that compares found categories with gold ones, member by
+         member, as bitsets.
+    '''
+
+
+    def __init__(self, mydTax2Bit, mybBitNumbers=False):
+        ''' CTaxEval init: Start from the taxer's bit numbering.
+
+            mydTax2Bit is the taxer's, category name -> mask; or, with 
+             mybBitNumbers, name -> bit number, as the dTax2Bit of 
+             another CTaxEval (whose numbering is to be kept).
+        '''
+        if mybBitNumbers:
+            self.dTax2Bit = dict(mydTax2Bit)
+        else:
+            self.dTax2Bit = {sTax: nMask.bit_length() - 1
+                            for sTax, nMask in mydTax2Bit.items()}
+        self.cTP = Counter()
+        self.cFP = Counter()
+        self.cFN = Counter()
+        self.cPairs = Counter()
+        self.nMembers = 0
+
+
+# m n M a s k
+    def mnMask(self, mylTaxons):
+        ''' Return the bitset of the category names; a name never seen
+             before gets the next bit.
+        '''
+        nMask = 0
+        dTax2Bit = self.dTax2Bit
+        for sTax in mylTaxons:
+            nBit = dTax2Bit.get(sTax)
+            if nBit is None:
+                nBit = dTax2Bit[sTax] = len(dTax2Bit)
+            nMask |= 1 << nBit
+        return nMask
+
+
+# m v A d d
+    def mvAdd(self, mylGold, mylFound):
+        ''' Count one member. '''
+        self.mvAddMasks(self.mnMask(mylGold), self.mnMask(mylFound))
+
+
+# m v A d d M a s k s
+    def mvAddMasks(self, mynGold, mynFound):
+        ''' Count one member, given as bitsets in this numbering. '''
+        self.nMembers += 1
+        self.cTP[mynGold & mynFound] += 1
+        nFP = mynFound & ~mynGold
+        nFN = mynGold & ~mynFound
+        self.cFP[nFP] += 1
+        self.cFN[nFN] += 1
+        if nFP and nFN:
+            self.cPairs[(nFN, nFP)] += 1
+
+
+# m l t R e p o r t
+    @ntrace
+    def mltReport(self):
+        ''' Return a list of (category, gold, found, tp, fp, fn), sorted
+             by category.
+        '''
+        lNames = sorted(self.dTax2Bit, key=self.dTax2Bit.get)
+        lTP = [0] * len(lNames)
+        lFP = [0] * len(lNames)
+        lFN = [0] * len(lNames)
+        for (cCounts, lSums) in ((self.cTP, lTP), (self.cFP, lFP),
+                                (self.cFN, lFN)):
+            for nMask, nMembers in cCounts.items():
+                for nBit in fnlBits(nMask):
+                    lSums[nBit] += nMembers
+        return sorted((lNames[nBit], lTP[nBit] + lFN[nBit],
+                        lTP[nBit] + lFP[nBit], lTP[nBit], lFP[nBit],
+                        lFN[nBit]) for nBit in range(len(lNames)))
+
+
+# m d S u m m a r y
+    def mdSummary(self, myltReport=None):
+        ''' Return the overall numbers, over the categories in gold or
+             found: the summed counts (tp, fp, fn), micro precision, 
+             recall and F1, and macro precision, recall and F1.
+            myltReport is the list from mltReport, if the caller has it.
+        '''
+        if myltReport is None:
+            myltReport = self.mltReport()
+        ltRows = [tRow for tRow in myltReport if tRow[1] or tRow[2]]
+        (nTP, nFP, nFN) = (sum(tRow[3] for tRow in ltRows),
+                            sum(tRow[4] for tRow in ltRows),
+                            sum(tRow[5] for tRow in ltRows))
+        (fP, fR, fF) = fntPRF(nTP, nFP, nFN)
+        ltPRF = [fntPRF(*tRow[3:6]) for tRow in ltRows]
+        (fMacroP, fMacroR, fMacroF) = (sum(tPRF[nItem] for tPRF in ltPRF)
+                                        / len(ltPRF) if ltPRF else 0.0
+                                        for nItem in range(3))
+        return {"tp": nTP, "fp": nFP, "fn": nFN,
+                "precision": fP, "recall": fR, "f1": fF, 
+                "macro_precision": fMacroP, "macro_recall": fMacroR,
+                "macro_f1": fMacroF}
+
+
+# m l t P a i r s
+    def mltPairs(self):
+        ''' Return a list of (count, missed category, category found
+             instead), most common first.
+        '''
+        lNames = sorted(self.dTax2Bit, key=self.dTax2Bit.get)
+        cPairs = Counter()
+        for (nFN, nFP), nMembers in self.cPairs.items():
+            for nMissed in fnlBits(nFN):
+                for nWrong in fnlBits(nFP):
+                    cPairs[(lNames[nMissed], lNames[nWrong])] += nMembers
+        return sorted(((nCount, sMissed, sWrong) for (sMissed, sWrong),
+                        nCount in cPairs.items()),
+                        key=lambda tPair: (-tPair[0], tPair[1], tPair[2]))
+
+
+# m v W r i t e R e p o r t
+    def mvWriteReport(self, mynPairs=20, myfhOut=sys.stdout):
+        ''' Write the table of categories, the totals, and the most
+             common confusion pairs.
+        '''
+        ltReport = self.mltReport()
+        ltRows = [tRow for tRow in ltReport if tRow[1] or tRow[2]]
+        myfhOut.write("%-40s %6s %6s %6s %6s %6s %6s\n" % ("category",
+                        "gold", "found", "tp", "prec", "recall", "f1"))
+        for (sTax, nGold, nFound, nTP, nFP, nFN) in ltRows:
+            myfhOut.write("%-40s %6d %6d %6d %6.3f %6.3f %6.3f\n"
+                        % ((sTax, nGold, nFound, nTP) 
+                        + fntPRF(nTP, nFP, nFN)))
+        dSummary = self.mdSummary(ltReport)
+        myfhOut.write("%-40s %6d %6d %6d %6.3f %6.3f %6.3f\n"
+                    % ("micro (all categories)", 
+                    dSummary["tp"] + dSummary["fn"], 
+                    dSummary["tp"] + dSummary["fp"], dSummary["tp"],
+                    dSummary["precision"], dSummary["recall"], 
+                    dSummary["f1"]))
+        if ltRows:
+            myfhOut.write("%-40s %6s %6s %6s %6.3f %6.3f %6.3f\n"
+                        % ("macro (mean of categories)", "", "", "",
+                        dSummary["macro_precision"], 
+                        dSummary["macro_recall"], dSummary["macro_f1"]))
+        myfhOut.write("%8d members\n" % self.nMembers)
+        ltPairs = self.mltPairs()[:mynPairs]
+        if ltPairs:
+            myfhOut.write("\n%6s %-40s %s\n" % ("count", "missed",
+                            "found instead"))
+            for (nCount, sMissed, sWrong) in ltPairs:
+                myfhOut.write("%6d %-40s %s\n" % (nCount, sMissed, sWrong))
+
+
+# f n l G o l d T a x o n s
+def fnlGoldTaxons(myxGold):
+    ''' Return the gold categories of a member as a list: from a string
+         separated by vertical bars (CSV) or a list (JSON).
+    '''
+    if isinstance(myxGold, list):
+        return myxGold
+    return [sTax.strip() for sTax in (myxGold or "").split("|")
+            if sTax.strip()]
+
+
+# f n d C l i P a r s e
+def fndCliParse():
+    ''' Parse the command line.  Return a dict of the options. '''
+    cParse = argparse.ArgumentParser(
+        description="Precision, recall and F1 of the taxonomy categories "
+            "against members labeled by hand.")
+    cParse.add_argument("lFiles", metavar="gold", nargs="+",
+        help="gold member file(s), CSV or JSON Lines, with the bio and "
+            "the right categories")
+    cParse.add_argument("--gold-column", dest="sGoldColumn",
+        default="Taxonomy terms", metavar="COL",
+        help="column with the right categories, separated by vertical "
+            "bars (default \"Taxonomy terms\")")
+    cParse.add_argument("--taxonomy", dest="sTaxonomyFile",
+        default="TaxonomyList.txt", metavar="FILE",
+        help="taxonomy file to evaluate (default TaxonomyList.txt)")
+    cParse.add_argument("--pairs", dest="nPairs", type=int, default=20,
+        metavar="N",
+        help="list the N most common confusion pairs (default 20)")
+    cParse.add_argument("--ancestors", dest="sAncestors", default="exclude",
+        choices=["include", "exclude"],
+        help="as for taxit")
+    cParse.add_argument("--fuzzy", dest="bFuzzy", action="store_true",
+        help="as for taxit")
+    cParse.add_argument("--stop-stems", dest="bStopStems",
+        action="store_true",
+        help="as for taxit")
+    return vars(cParse.parse_args())
+
+
+# M A I N
+@ntrace
+def main(mydCli):
+    ''' MAIN: Find the categories of the gold members, compare, report. '''
+    cTaxer = CTaxify("StopWordList.txt", mydCli["sTaxonomyFile"])
+    cTaxer.mvAncestors(mydCli["sAncestors"] == "include")
+    if mydCli["bFuzzy"]:
+        cTaxer.mvUseFixer(CFuzzyFixer(
+                    fnlTaxonomyKeywords(mydCli["sTaxonomyFile"]),
+                    fnlReadWords("sourcedata/voc.txt"), cTaxer.setStoplist))
+    if mydCli["bStopStems"]:
+        cTaxer.mvUseStopStems()
+    cEval = CTaxEval(cTaxer.dTax2Bit)
+    sGoldColumn = mydCli["sGoldColumn"]
+    for sFile in mydCli["lFiles"]:
+        for dMember in fngReadMembers(sFile):
+            for sColumn in (sGoldColumn, "Short bio"):
+                if sColumn not in dMember:
+                    print("taxeval: %s has no column %s" % (sFile, sColumn),
+                            file=sys.stderr)
+                    return 2
+            (sTaxons, _, _) = fntBioTaxons(dMember["Short bio"] or "",
+                                            cTaxer)
+            cEval.mvAdd(fnlGoldTaxons(dMember[sGoldColumn]),
+                        sTaxons.split("|") if sTaxons else [])
+    cEval.mvWriteReport(mydCli["nPairs"])
+    return 0
+
+
+# E N T R Y   P O I N T
+if __name__ == "__main__":
+    sys.exit(main(fndCliParse()))
+
+
+# Edit history:
+# 20261019  RBL Original version.
+#               A gold file without a bio column is an error, too.
+#               CTaxEval can start from another one's bit numbering.
+#               The report's totals come from mdSummary.
+#
+#
+
+#END
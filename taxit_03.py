@@ -20,16 +20,135 @@ sanitize, tokenize
 stem words
 if word is in mapping dict, add categories for that word to member list
 
+fused run (--stems FILE):
+share the read, sanitize, tokenize and stem work with showstems'
+ CStemWords accumulator, so one pass gives both the enriched CSV and
+ the stem listing
+--histogram FILE: count members by number of categories as we go,
+ instead of awk over the output afterwards; and by category, and bio
+ lengths, too (see taxstats); --stats-json FILE: the same, as JSON
+
+--output FILE: write the CSV through a big buffer to a temp file, and
+ rename it into place only when complete, so that a crash never leaves
+ a half-written CSV to be imported
+
+compressed exports (.gz, .bz2, .xz) are read as they are, and --output
+ to such a name compresses; see memberio
+
+several exports:
+one CSV out, with one header: the columns of the first file, then any
+ new ones from the later files (blank for members that lack them)
+read and parse the files concurrently (--readers), taxify in one stage
+report the number of members from each file on stderr
+
+fast path for files whose columns are the output columns:
+don't make a dict of every record, nor write it back through DictWriter
+find the "Short bio" and "Taxonomy terms" columns once, from the header
+a record with no quotes in it is just split on commas as far as the
+ later of the two, and joined back with the new categories in place;
+ the rest of the record goes out exactly as it came in
+a record with quotes (or the wrong number of fields) goes the slow way,
+ through DictReader and DictWriter, so the output is the same either way
+
+JSON Lines (--format jsonl, or an --output name ending .jsonl):
+one member per line, the member dict as it was read, with 
+ "Taxonomy terms" as a real JSON array, not a string with bars
+input files named .jsonl are read as JSON Lines (see memberio); 
+ JSON in, CSV out works for members whose values are all strings
+--chunk-rows N: split the --output into files of N members each, 
+ sized for the bulk importer, each one complete when it appears
+stdout gets the same big buffer as --output
+
+member database (--db FILE): read the bios straight from the SQLite 
+ member table and write the categories back into it; see memberdb
+--changed-only: only members whose bio changed since the last run 
+ (by a hash of the bio), or --since-column COL: only members whose
+ timestamp column is newer than on the last run
+
+checkpoints (--checkpoint-secs N, with --output to a plain CSV file):
+the output goes to PATH.partial, a fixed name, instead of a random temp
+the files are read one at a time, slice by slice, in this process
+every N seconds, at the end of a slice (not in the middle of a record):
+ fsync the partial output and note its size; then save, in PATH.ckpt,
+ that size, the input file and byte offset where the next slice starts,
+ the counts so far, and the stem caches and stem counts (a snapshot of
+ the CTaxify and CStemWords state that later output depends on)
+--resume: load PATH.ckpt, check that the input files are the same ones,
+ cut PATH.partial back to the saved size (dropping whatever was written
+ after the checkpoint), and go on from the saved input offset
+the partial output plus what follows is then byte for byte what an
+ uninterrupted run writes; the checkpoint goes away when the output is
+ renamed into place
+
+--scoring tfidf: instead of every category that any stem hits, score
+ the categories of all members at once, TF-IDF weighted, and keep
+ those with --min-score or more, at most --top-categories of them for
+ a member; see taxscore (needs numpy)
+ this needs all the members before any can be written: they are held
+ in memory, and written after the scoring
+
+--top-categories N and --min-score S also work without tfidf: the 
+ score of a category is then the number of bio words that hit it, 
+ over the number of words in the bio, counted in the same loop that
+ finds the categories
+--scores: add a "Taxonomy scores" column (right after "Taxonomy terms"),
+ the scores of the categories, in the same order, separated by bars
+
+parent categories: the first word of a taxonomy file line can be
+ Child>Parent1,Parent2 (a parent needs no line of its own); 
+ TaxonomyList.txt stays flat, for the older taxit versions; 
+ TaxonomyListParents.txt is the same with some parents declared, for
+ --taxonomy
+at load, categories are numbered and each gets the bitset of itself
+ and all its ancestors, once; each stem gets the bitset of its 
+ categories, with the ancestors (--ancestors include) or without 
+ (exclude, the default); a bio's categories are the OR of its stems'
+ bitsets, and the names of a bitset are cached
+what goes in "Taxonomy terms" is what OpenScholar search indexes, so
+ the one switch does for both
+
+stopwords: a frozenset, loaded from StopWordList.pickle if stoplist.py
+ has compiled it, else read from StopWordList.txt; --stop-stems also
+ drops, after stemming, any stem that is the stem of a stop word
+
+--variants: other taxonomy files, tried on the same stems in the same
+ pass, one lookup per stem for all of them (see taxvariants), and 
+ through the same --top-categories and --min-score selection; a column
+ for each, after the others, or (--variant-diff) a report of which
+ members gain and lose which categories with each
+
+--fuzzy: a bio word that is not a known word (taxonomy keyword, 
+ sourcedata/voc.txt, stopword) is replaced by the one taxonomy keyword
+ closest to it, if that is near enough for its length, before stemming;
+ see fuzzyfix; the --stems listing still has the word as in the bio
+ the lookup of each distinct word is cached, so the cost is mostly
+ building the index, under a second
+
 '''
 
 from nltk.stem import PorterStemmer
 from collections import defaultdict
 import sys
+import os
+import time
 import csv
+import json
 import re
 import copy
+import pickle
+import argparse
 # Sorry, NewTrace is not python3 yet.
 from NewTracep3 import NTRC, ntrace, ntracef
+from showstems import CStemWords, fnvDumpSortedWords
+from memberio import (fnlReadColumns, fngConcurrentMembers, 
+                        fngRecordSlices, CAtomicWriter, CChunkedWriter, 
+                        fnsFormat, fnbPlainCsv, nBufferBytes)
+from memberdb import CMemberDb
+from taxstats import CTaxStats
+import taxscore
+from stoplist import fntLoadStoplist, fnsetStemStoplist
+from taxvariants import CTaxVariants, fnlVariantNames
+from fuzzyfix import CFuzzyFixer, fnlTaxonomyKeywords, fnlReadWords
 
 
 # c l a s s   C T a x i f y 
@@ -43,46 +162,186 @@ class CTaxify():
         ''' CTaxify init: Get the stopword list from user-specified file.  
              Get the taxonomy list from user-specified file.
 
-            Store stopwords as a dict because it's faster to lookup.
+            Stopwords come as a frozenset, from the compiled artifact
+             if there is one (see stoplist), with their stems.
             Store taxonomies in dict.
             Ignore blank lines and comment lines in both files.
             Taxonomy list file format is now
             <taxonomyname> \s <listofwords>
+            or, for a category with parent categories,
+            <taxonomyname>><parentname>,<parentname> \s <listofwords>
+            A parent need not have a line, or words, of its own.
+            If there is a tab, the name is all before it (and may have
+             blanks in it).
         '''
         self.ps = PorterStemmer()
+        # Each distinct word gets stemmed only once.  
+        self.dWord2Stem = dict()
 
         # Get stop-word list.  
-        self.dStoplist = dict()
-        with open(mysStopwordFilename, "r") as fhIn:
-            for sLine in fhIn:
-                sWord = sLine.strip()
-                if sWord and not sWord.startswith("#"):
-                    self.dStoplist[sWord] = len(sWord)
-            # Yes, this could be done as a one-liner, but uuuuugly.
-            #self.dStoplist = {w.strip():len(w.strip()) for w in fhIn
-            #               if w.strip() and not w.strip().startswith("#")}
-            # And slower, too, going thru .strip() four times.
-        NTRC.ntrace(3, "proc stopword list|%s|" % (list(self.dStoplist.keys())))
+        (self.setStoplist, self.setStopStems) = fntLoadStoplist(
+                                                    mysStopwordFilename)
+        NTRC.ntrace(3, "proc stopword list|%s|" % (sorted(self.setStoplist)))
+        # Stems to drop after stemming, if wanted.
+        self.setStemFilter = None
+
+        # Which categories to keep: all, or the best, with scores or not.
+        self.nTop = 0
+        self.fMinScore = 0.0
+        self.bScores = False
+        # Spelling correction before stemming, if wanted.
+        self.cFixer = None
+        # Other taxonomies to try on the same stems, if wanted.
+        self.cVariants = None
 
         # Get taxonomy category list.
         #  A word stem can map to one or more categories.
-        self.dStem2Tax = defaultdict(list)
-        with open(mysTaxonomyFilename, "r") as fhIn:
+        #  A category can have one or more parent categories.
+        self.dStem2Leaf = defaultdict(list)
+        self.dTax2Parents = dict()
+        with open(mysTaxonomyFilename, "r", errors="replace") as fhIn:
             for sLineRaw in fhIn:
-                sLine = sLineRaw.strip()
+                # A stray byte that is not UTF-8 (a Latin-1 no-break 
+                #  space, in an old variant) counts as a blank.
+                sLine = sLineRaw.replace("\ufffd", " ").strip()
                 if sLine and not sLine.startswith("#"):
-                    lWordsAll = re.split(r'\s+', sLine)
+                    (sHead, sTab, sRest) = sLine.partition("\t")
+                    lWordsAll = ([sHead.strip()] + sRest.split() if sTab
+                                else re.split(r'\s+', sLine))
                     NTRC.ntrace(5, "proc lWords|{}|".format(lWordsAll))
-                    (sTaxName, lWords) = (lWordsAll[0].replace("%20"," ")
+                    (sTaxHead, lWords) = (lWordsAll[0].replace("%20"," ")
                                         , lWordsAll[1:]
                                         )
+                    (sTaxName, _, sParents) = sTaxHead.partition(">")
+                    self.dTax2Parents.setdefault(sTaxName, []).extend(
+                            sParent for sParent in sParents.split(",") 
+                            if sParent)
                     lStems = [self.ps.stem(sWord.lower()) for sWord in lWords]
                     for sStem in lStems:
-                        self.dStem2Tax[sStem].append(sTaxName)
-                        self.dStem2Tax[sStem] = list(set(self.dStem2Tax[sStem]))
+                        self.dStem2Leaf[sStem].append(sTaxName)
+                        self.dStem2Leaf[sStem] = list(set(self.dStem2Leaf[sStem]))
+        self.mvClosure()
+        self.mvAncestors(False)
         NTRC.ntrace(3, "proc stem2tax dict|%s|" % (self.dStem2Tax))
 
 
+# m v C l o s u r e 
+    @ntrace
+    def mvClosure(self):
+        ''' Number the categories, alphabetically, and compute, once, 
+             the ancestor closure of each as a bitset: the bits of the
+             category itself and of all its ancestors.
+            Raise ValueError if the parents go around in a circle.
+        '''
+        setNames = set(self.dTax2Parents)
+        for lParents in self.dTax2Parents.values():
+            setNames.update(lParents)
+        self.lTaxNames = sorted(sName for sName in setNames if sName)
+        # Names that CSV would have to quote rule out the fast path.
+        self.bPlainNames = not any("," in sName or '"' in sName 
+                                    for sName in self.lTaxNames)
+        dTax2Bit = {sName: 1 << nBit 
+                    for nBit, sName in enumerate(self.lTaxNames)}
+        self.dTax2Closure = dict()
+        setVisiting = set()
+        def fnnClosure(sName):
+            nMask = self.dTax2Closure.get(sName)
+            if nMask is not None:
+                return nMask
+            if sName in setVisiting:
+                raise ValueError("taxonomy category %s is its own ancestor"
+                                % sName)
+            setVisiting.add(sName)
+            nMask = dTax2Bit[sName]
+            for sParent in self.dTax2Parents.get(sName, []):
+                nMask |= fnnClosure(sParent)
+            setVisiting.discard(sName)
+            self.dTax2Closure[sName] = nMask
+            return nMask
+        for sName in self.lTaxNames:
+            fnnClosure(sName)
+        self.dTax2Bit = dTax2Bit
+        NTRC.ntrace(3, "proc taxonomy categories|%d| with parents|%d|" 
+                    % (len(self.lTaxNames), sum(1 for lParents 
+                    in self.dTax2Parents.values() if lParents)))
+
+
+# m v A n c e s t o r s 
+    def mvAncestors(self, mybInclude):
+        ''' Assign the ancestors of each category found, too, or not.
+        
+            Each stem gets the bitset of its categories, with or without
+             their ancestors, so a hit costs one OR.  dStem2Tax has the
+             same, as lists of names, for scoring.
+        '''
+        self.bAncestors = mybInclude
+        dTax2Mask = (self.dTax2Closure if mybInclude else self.dTax2Bit)
+        self.dStem2Mask = dict()
+        for sStem, lTaxons in self.dStem2Leaf.items():
+            nMask = 0
+            for sTax in lTaxons:
+                nMask |= dTax2Mask.get(sTax, 0)
+            self.dStem2Mask[sStem] = nMask
+        self.dMask2Taxons = {0: []}
+        self.dStem2Tax = defaultdict(list, ((sStem, self.mlMaskTaxons(nMask))
+                            for sStem, nMask in self.dStem2Mask.items()))
+
+
+# m l M a s k T a x o n s 
+    def mlMaskTaxons(self, mynMask):
+        ''' Return the sorted list of the names of the categories in the
+             bitset.  Cached: there are few distinct sets.
+        '''
+        lTaxons = self.dMask2Taxons.get(mynMask)
+        if lTaxons is None:
+            lTaxons = self.dMask2Taxons[mynMask] = [sName for nBit, sName 
+                        in enumerate(self.lTaxNames) if mynMask >> nBit & 1]
+        return lTaxons
+
+
+# m v S e l e c t 
+    def mvSelect(self, mynTop=0, myfMinScore=0.0, mybScores=False):
+        ''' Keep only the mynTop best categories of a bio, and only those
+             that score at least myfMinScore; with mybScores, the caller
+             wants the scores, too.  By default, keep all, no scores.
+        '''
+        self.nTop = mynTop
+        self.fMinScore = myfMinScore
+        self.bScores = mybScores
+
+
+# m v U s e F i x e r 
+    def mvUseFixer(self, mycFixer):
+        ''' Correct misspelled bio words with mycFixer (a CFuzzyFixer)
+             before stemming them.
+        '''
+        self.cFixer = mycFixer
+
+
+# m v U s e V a r i a n t s 
+    def mvUseVariants(self, mycVariants):
+        ''' Also find the categories of each bio with the taxonomy 
+             variants of mycVariants (a CTaxVariants), from its stems.
+        '''
+        self.cVariants = mycVariants
+
+
+# m v U s e S t o p S t e m s 
+    def mvUseStopStems(self):
+        ''' Drop the stems of stop words, too, after stemming: catches
+             the inflections of stop words that are not in the list.
+        '''
+        if self.setStopStems is None:
+            self.setStopStems = fnsetStemStoplist(self.setStoplist, self.ps)
+        self.setStemFilter = self.setStopStems
+
+
+# m b S c o r i n g 
+    def mbScoring(self):
+        ''' Return True if categories must be scored, not just found. '''
+        return bool(self.nTop or self.fMinScore or self.bScores)
+
+
 # m s C l e a n S t r i n g 
     @ntrace
     def msCleanString(self, mysInput):
@@ -96,7 +355,7 @@ class CTaxify():
         lTokens2 = [word for word in lTokens1 
                     if word and word[0] not in ',.' ]
         NTRC.ntrace(4, "proc lTokens2|{}|".format(lTokens2))
-        lTokens3 = [word for word in lTokens2 if word not in self.dStoplist]
+        lTokens3 = [word for word in lTokens2 if word not in self.setStoplist]
         sResult = ' '.join(lTokens3)
         return sResult
 
@@ -108,113 +367,759 @@ class CTaxify():
         
             Just for cleanliness, sort the list of taxonomy category names.
         '''
-        lStems = [self.ps.stem(word) for word in mysInput.split()]
+        lStems = self.mlStemWords(mysInput.split())
+        return self.mlStems2Taxons(lStems)
+
+
+# m l S t e m W o r d s 
+    def mlStemWords(self, mylWords):
+        ''' Return the list of stems of the words, via the stem cache. 
+
+            With a fixer, a word is corrected before it is stemmed, and the
+             cache holds the stem of the correction: a word already seen 
+             costs nothing more.
+        '''
+        dWord2Stem = self.dWord2Stem
+        lStems = []
+        for sWord in mylWords:
+            sStem = dWord2Stem.get(sWord)
+            if sStem is None:
+                sStem = dWord2Stem[sWord] = self.ps.stem(
+                        self.cFixer.msFixWord(sWord) if self.cFixer 
+                        else sWord)
+            lStems.append(sStem)
+        return lStems
+
+
+# m l S t e m s 2 T a x o n s 
+    @ntrace
+    def mlStems2Taxons(self, mylStems):
+        ''' Find the categories for a bio already stemmed.  
+            Return a sorted list of unique names.
+        '''
+        lStems = mylStems
         NTRC.ntrace(4, "proc lStems|{}|".format(lStems))
-        lTaxons = []
+        dStem2Mask = self.dStem2Mask
+        nMask = 0
         for sStem in lStems:
-            if sStem in self.dStem2Tax:
-                lTaxons.extend(self.dStem2Tax[sStem])
-                NTRC.ntrace(5, "proc taxonmatch from|{}| to|{}|"
-                    .format(sStem, self.dStem2Tax[sStem]))
-        return sorted([item for item in set(lTaxons) if item])
+            if sStem in dStem2Mask:
+                nMask |= dStem2Mask[sStem]
+        NTRC.ntrace(5, "proc taxonmatch mask|{:x}|".format(nMask))
+        return list(self.mlMaskTaxons(nMask))
+
+
+# m l t S t e m s 2 S c o r e d T a x o n s 
+    @ntrace
+    def mltStems2ScoredTaxons(self, mylStems):
+        ''' Find and score the categories for a bio already stemmed.
+            Return a list of (name, score), sorted by name, of the best 
+             mynTop of them (all, if zero) that score at least fMinScore.
+
+            The score is the count of stems that hit the category, over 
+             the count of stems in the bio; the counts are taken in the 
+             one loop over the stems.  Ties for the last place go to the
+             alphabetically first.
+        '''
+        dStem2Tax = self.dStem2Tax
+        dCounts = defaultdict(int)
+        for sStem in mylStems:
+            if sStem in dStem2Tax:
+                for sTax in dStem2Tax[sStem]:
+                    dCounts[sTax] += 1
+        fPerStem = 1.0 / max(len(mylStems), 1)
+        ltScored = [(sTax, nCount * fPerStem) 
+                    for (sTax, nCount) in dCounts.items()
+                    if sTax and nCount * fPerStem >= self.fMinScore]
+        if self.nTop and len(ltScored) > self.nTop:
+            ltScored.sort(key=lambda tScored: (-tScored[1], tScored[0]))
+            del ltScored[self.nTop:]
+        return sorted(ltScored)
 
 
-# f n v P r o c e s s F i l e 
+# Slices are smaller when checkpointing, so there are more places
+#  to checkpoint; 1 MB is a few seconds of work.
+nCheckpointSliceBytes = 1024 * 1024
+
+
+# c l a s s   C C h e c k p o i n t 
+class CCheckpoint():
+    ''' Class that saves and restores the state of a run over files, 
+         so that an interrupted run can be resumed.
+    '''
+
+
+    @ntrace
+    def __init__(self, mysOutputFile, mylFilenames, mynSeconds, 
+                cTaxer, cStemmer=None, mycStats=None):
+        ''' CCheckpoint init: Name the files; nothing saved yet. '''
+        self.sCkptFile = mysOutputFile + ".ckpt"
+        self.sPartialFile = mysOutputFile + ".partial"
+        self.lFilenames = mylFilenames
+        self.nSeconds = mynSeconds
+        self.cTaxer = cTaxer
+        self.cStemmer = cStemmer
+        self.cStats = mycStats
+        self.fhOut = None
+        self.lCounts = None
+        # Where to start: file index, byte offset, and output bytes.
+        (self.nFile, self.nOffset, self.nOutBytes) = (0, 0, 0)
+        self.fLastSave = time.monotonic()
+        self.nSaves = 0
+
+
+# m l F i l e S t a m p s 
+    def mlFileStamps(self):
+        ''' Return what identifies the input files: name, size, mtime. '''
+        return [(sFile, os.stat(sFile).st_size, os.stat(sFile).st_mtime_ns)
+                for sFile in self.lFilenames]
+
+
+# m b R e s t o r e 
+    @ntrace
+    def mbRestore(self):
+        ''' Load the last checkpoint, if there is one, into the taxer,
+             stemmer and histogram.  Return True if there was one.
+            Raise ValueError if it was for other input files.  
+        '''
+        if not os.path.exists(self.sCkptFile):
+            return False
+        with open(self.sCkptFile, "rb") as fhIn:
+            dState = pickle.load(fhIn)
+        if dState["lFileStamps"] != self.mlFileStamps():
+            raise ValueError("checkpoint %s is for other input files" 
+                            % self.sCkptFile)
+        (self.nFile, self.nOffset, self.nOutBytes) = dState["tWhere"]
+        self.lCounts = dState["lCounts"]
+        # The stem cache holds corrected stems with --fuzzy: keep it only 
+        #  if the run before was the same kind.
+        if dState.get("bFuzzy", False) == bool(self.cTaxer.cFixer):
+            self.cTaxer.dWord2Stem.update(dState["dWord2Stem"])
+        if self.cStemmer:
+            self.cStemmer.mvMergePartial(dState["tStems"])
+        if self.cStats is not None:
+            self.cStats.mvMerge(dState["cStats"])
+        NTRC.ntrace(0, "proc resume from|%s| file|%d| offset|%d| "
+                    "outbytes|%d|" % (self.sCkptFile, self.nFile, 
+                    self.nOffset, self.nOutBytes))
+        return True
+
+
+# m v M a y b e S a v e 
+    def mvMaybeSave(self, mynFile, mynOffset):
+        ''' Save a checkpoint if it is time.  All the output for the
+             input before (file, offset) has been written.
+        '''
+        if time.monotonic() - self.fLastSave >= self.nSeconds:
+            self.mvSave(mynFile, mynOffset)
+
+
+# m v S a v e 
+    @ntrace
+    def mvSave(self, mynFile, mynOffset):
+        ''' Make the output durable, then save the state that goes with 
+             it, atomically.
+        '''
+        dState = {
+            "lFileStamps": self.mlFileStamps(),
+            "tWhere": (mynFile, mynOffset, self.fhOut.mnCheckpoint()),
+            "lCounts": list(self.lCounts),
+            "dWord2Stem": self.cTaxer.dWord2Stem,
+            "bFuzzy": bool(self.cTaxer.cFixer),
+            "tStems": ((self.cStemmer.cWordsNocc, self.cStemmer.dWord2Stem,
+                        dict(self.cStemmer.dWords)) 
+                        if self.cStemmer else None),
+            "cStats": self.cStats,
+            }
+        sTmpFile = self.sCkptFile + ".tmp"
+        with open(sTmpFile, "wb") as fhCkpt:
+            pickle.dump(dState, fhCkpt, protocol=pickle.HIGHEST_PROTOCOL)
+            fhCkpt.flush()
+            os.fsync(fhCkpt.fileno())
+        os.replace(sTmpFile, self.sCkptFile)
+        self.nSaves += 1
+        self.fLastSave = time.monotonic()
+        NTRC.ntrace(3, "proc checkpoint file|%d| offset|%d| outbytes|%d|"
+                    % dState["tWhere"])
+
+
+# m v D o n e 
+    def mvDone(self):
+        ''' The output is in place; the checkpoint is no longer needed. '''
+        if os.path.exists(self.sCkptFile):
+            os.remove(self.sCkptFile)
+
+
+# f n g C h e c k p o i n t e d R e c o r d s 
+def fngCheckpointedRecords(mycCheckpoint):
+    ''' Generate (file index, record line) for all the files, in order,
+         from where the checkpoint says to start, and let it save a 
+         checkpoint at the end of each slice that ends a record.
+        By the time a slice's end is reached again here, the caller has
+         written (and counted) all of its members.
+    '''
+    cCkpt = mycCheckpoint
+    for nFile in range(cCkpt.nFile, len(cCkpt.lFilenames)):
+        nStart = cCkpt.nOffset if nFile == cCkpt.nFile else 0
+        for (nOffset, lRecords) in fngRecordSlices(cCkpt.lFilenames[nFile], 
+                                        nStart, nCheckpointSliceBytes):
+            for sRecord in lRecords:
+                yield (nFile, sRecord)
+            if nOffset is not None:
+                cCkpt.mvMaybeSave(nFile, nOffset)
+
+
+# f n l P r o c e s s F i l e s 
 #@ntrace
-def fnvProcessFile(mysFilename, cTaxer):
-    ''' For a file, get all the lines, render them into ASCII-7 for 
-         easier handling, get the member dict for each member. 
+def fnlProcessFiles(mylFilenames, cTaxer, cStemmer=None, mycStats=None,
+                    myfhOut=None, mynReaders=4, mysFormat="csv",
+                    mycCheckpoint=None, mycScorer=None):
+    ''' For all the files, get all the lines, render them into ASCII-7 
+         for easier handling, get the member dict for each member. 
          Process each member to get taxonomy categories, then output
-         the enhanced member list.
+         the enhanced member list, as one CSV.
+        Return the list of counts of members from each file.
+        If a CStemWords is given, its stem counts are gathered from the 
+         same pass.  If a CTaxStats is given, it counts the members' 
+         categories and bio lengths.  
+        Output goes to the given file, or stdout, as CSV or as JSON Lines.
+        With a CCheckpoint, the files are read in this thread, from where
+         it says, and it saves checkpoints along the way.
+        With a CTaxScorer, the categories come from it, for all the 
+         members at once, after they have all been read.
     '''
-    # NB: File must be opened in read-binary mode.  This avoids UTF-8 decoding
-    #  problems and makes it easier to sanitize to pure ASCII-7.
-    with open(mysFilename, 'rb') as fhIn:
-        lLinesRaw = [sLine.strip() for sLine in fhIn]
-    # Save the order of columns for output.
-    lColumns = lLinesRaw[0].decode('utf-8').strip().split(",")
-    lLines = [fnsSanitize(sLine) for sLine in lLinesRaw if sLine.strip()]
-    ldMembers = csv.DictReader(lLines)
-    ldMembersPlusTax = []
-    # Get new info for all members.
-    for dMember in ldMembers:
-#        NTRC.ntrace(3, "proc member|%s|" % (dMember))
-        if debug: print(".", end="")
-        dMemberPlusTax = fndProcessMember(dMember, cTaxer)
-        ldMembersPlusTax.append(dMemberPlusTax)
-    nResult = fnnWriteMembers(ldMembersPlusTax, lColumns)
-    return nResult
-
-
-# f n s S a n i t i z e 
-@ntrace
-def fnsSanitize(mysInput):
-    ''' Ensure that the input string becomes pure ASCII-7 for easy handling.  
-    
-        Map any higher characters into underscores.  This is necessary to
-         avoid problems with ISO Latin-1 and Unicode typographic characters
-         that are put into the text by word processors, especially on Macs.
+    # NB: The files are read as bytes (memory-mapped).  This avoids UTF-8 
+    #  decoding problems and makes it easier to sanitize to pure ASCII-7.
+    # Save the order of columns for output: all those of the first file, 
+    #  then any new ones from the others.  
+    llFileColumns = [fnlReadColumns(sFile) for sFile in mylFilenames]
+    lColumns = []
+    for lFileColumns in llFileColumns:
+        lColumns.extend(sColumn for sColumn in lFileColumns
+                        if sColumn not in lColumns)
+    if cTaxer.bScores and "Taxonomy scores" not in lColumns:
+        lColumns.insert(lColumns.index("Taxonomy terms") + 1 
+                        if "Taxonomy terms" in lColumns else len(lColumns),
+                        "Taxonomy scores")
+    # Taxonomy variant columns go last, so records can still be projected.
+    lVariantColumns = []
+    if cTaxer.cVariants and not cTaxer.cVariants.bDiff:
+        lVariantColumns = cTaxer.cVariants.lColumns
+    lColumnsIn = list(lColumns)
+    lColumns.extend(sColumn for sColumn in lVariantColumns 
+                    if sColumn not in lColumnsIn)
+    # Files that can take the fast path come as raw record lines.
+    bProjectable = ("Short bio" in lColumns and "Taxonomy terms" in lColumns
+                    and not any('"' in sColumn for sColumn in lColumns)
+                    and cTaxer.bPlainNames 
+                    and (not cTaxer.cVariants 
+                        or cTaxer.cVariants.bPlainNames)
+                    and mysFormat == "csv"
+                    and len(lColumns) == len(lColumnsIn) + len(lVariantColumns))
+    lbRaw = [bProjectable and lFileColumns == lColumnsIn
+                and fnsFormat(sFile) == "csv"
+                for sFile, lFileColumns in zip(mylFilenames, llFileColumns)]
+    if bProjectable:
+        tProjection = (len(lColumnsIn), lColumns.index("Short bio"), 
+                        lColumns.index("Taxonomy terms"), 
+                        lColumns.index("Taxonomy scores") 
+                            if cTaxer.bScores else None,
+                        bool(lVariantColumns))
+    lCounts = [0] * len(mylFilenames)
+    if mycCheckpoint:
+        # Records, not dicts, from all files; and counts from before.
+        itMembers = fngCheckpointedRecords(mycCheckpoint)
+        lCounts = mycCheckpoint.lCounts or lCounts
+        mycCheckpoint.lCounts = lCounts
+    elif mycScorer:
+        itMembers = fngConcurrentMembers(mylFilenames, mynReaders)
+    else:
+        itMembers = fngConcurrentMembers(mylFilenames, mynReaders, lbRaw)
+    def fngScoredMembers():
+        # All the members first, then their categories all at once.
+        ltMembers = []
+        for (nFile, dMember) in itMembers:
+            mycScorer.mnAddMember(fnlBioStems(dMember["Short bio"] or "", 
+                                                cTaxer, cStemmer))
+            ltMembers.append((nFile, dMember))
+        ltTaxons = mycScorer.mltTaxonStrings(fnsScore if cTaxer.bScores 
+                                                else None)
+        for (nFile, dMember), (sTaxons, sScores) in zip(ltMembers, ltTaxons):
+            dMember["Taxonomy terms"] = sTaxons
+            if sScores is not None:
+                dMember["Taxonomy scores"] = sScores
+            yield (nFile, dMember, sTaxons, len(dMember["Short bio"] or ""))
+    def fngMembersPlusTax():
+        # Get new info for all members.
+        for (nFile, xMember) in itMembers:
+#            NTRC.ntrace(3, "proc member|%s|" % (xMember))
+            if debug: print(".", end="")
+            tProjected = None
+            if isinstance(xMember, str):
+                if lbRaw[nFile]:
+                    tProjected = fntProjectRecord(xMember, tProjection, 
+                                                    cTaxer, cStemmer)
+                if tProjected is None:
+                    # Slow way for this one.
+                    xMember = next(csv.DictReader([xMember], 
+                                    fieldnames=llFileColumns[nFile]))
+            if tProjected:
+                yield (nFile,) + tProjected
+            else:
+                dMemberPlusTax = fndProcessMember(xMember, cTaxer, cStemmer)
+                yield (nFile, dMemberPlusTax, 
+                        dMemberPlusTax["Taxonomy terms"],
+                        len(dMemberPlusTax["Short bio"] or ""))
+    def fngCounted(myitMembersPlusTax):
+        # Count a member once it has been written.
+        for (nFile, xMemberPlusTax, sTaxons, nBioLength) \
+                in myitMembersPlusTax:
+            yield xMemberPlusTax
+            lCounts[nFile] += 1
+            if mycStats is not None:
+                mycStats.mvAdd(sTaxons, nBioLength)
+    itOut = fngCounted(fngScoredMembers() if mycScorer 
+                        else fngMembersPlusTax())
+    if mysFormat == "jsonl":
+        fnnWriteJsonMembers(itOut, myfhOut)
+    elif lColumns:
+        # A resumed run's output has its header already.
+        fnnWriteMembers(itOut, lColumns, myfhOut, 
+                mybHeader=not (mycCheckpoint and mycCheckpoint.nOutBytes))
+    return lCounts
+
+
+# f n n P r o c e s s D b 
+#@ntrace
+def fnnProcessDb(cDb, cTaxer, cStemmer=None, mycStats=None):
+    ''' Taxify the bios from the member database, and write the 
+         categories back to it.  Return count of members updated.
+    '''
+    def fngRowsPlusTax():
+        for (nRowid, sBio, sHash) in cDb.mgReadBios():
+            (sTaxons, sScores, _) = fntBioTaxons(sBio, cTaxer, cStemmer)
+            if mycStats is not None:
+                mycStats.mvAdd(sTaxons, len(sBio))
+            yield (nRowid, sTaxons, sHash)
+    return cDb.mnWriteTaxons(fngRowsPlusTax())
+
+
+# f n t P r o j e c t R e c o r d 
+def fntProjectRecord(mysRecord, mytProjection, cTaxer, cStemmer=None):
+    ''' Fast path: add taxonomic categories to a raw member record line.
+        Return (output line, categories string, bio length), or None if 
+         the record must go the slow way (quotes, or the wrong number of 
+         fields); that is decided before the bio is stemmed, so a bio is
+         never taxified (or counted) twice.
+
+        mytProjection is (number of columns, bio index, taxonomy index,
+         scores index or None, True if taxonomy variant columns are to 
+         be appended).  The number of columns is that of the record.
+        With no quotes, splitting on commas is the CSV parse, and joining
+         with commas is what DictWriter would write: no field needs 
+         quoting, and sanitized lines have no CR or LF in them.  The
+         category names need no quoting either: the caller takes this 
+         path only if the taxonomies have no commas or quotes in them.
+    '''
+    (nColumns, nBio, nTax, nScores, bVariants) = mytProjection
+    if '"' in mysRecord or mysRecord.count(",") != nColumns - 1:
+        return None
+    lFields = mysRecord.split(",", max(nBio, nTax, nScores or 0) + 1)
+    (sTaxons, sScores, lVariants) = fntBioTaxons(lFields[nBio], 
+                                                cTaxer, cStemmer)
+    lFields[nTax] = sTaxons
+    if nScores is not None:
+        lFields[nScores] = sScores
+    if bVariants:
+        lFields.extend(lVariants)
+    return (",".join(lFields) + "\r\n", sTaxons, len(lFields[nBio]))
+
+
+# f n l B i o S t e m s 
+def fnlBioStems(mysBio, cTaxer, cStemmer=None):
+    ''' Return the list of stems of the words of a bio, stopwords out.
+        With a CStemWords, let it do the stemming (and counting).
+        Misspelled words are corrected first, if the taxer has a fixer,
+         by the taxer's stem cache; a CStemWords still lists and counts
+         the words as they are in the bio.
+        Stems of stop words are dropped after, if the taxer says so.
+    '''
+    sBioRaw = mysBio.lower()
+    if not sBioRaw:
+        return []
+    sBio = cTaxer.msCleanString(sBioRaw)
+    if cStemmer:
+        ltStemWords = cStemmer.mlProcessString(sBio)
+        if cTaxer.cFixer:
+            msFixWord = cTaxer.cFixer.msFixWord
+            lStems = [sStem if msFixWord(sWord) == sWord 
+                        else cTaxer.mlStemWords([sWord])[0]
+                        for (sStem, sWord) in ltStemWords]
+        else:
+            lStems = [sStem for (sStem, sWord) in ltStemWords]
+    else:
+        lStems = cTaxer.mlStemWords(sBio.split())
+    if cTaxer.setStemFilter:
+        setStemFilter = cTaxer.setStemFilter
+        lStems = [sStem for sStem in lStems if sStem not in setStemFilter]
+    return lStems
+
+
+# f n t B i o T a x o n s 
+def fntBioTaxons(mysBio, cTaxer, cStemmer=None):
+    ''' Return the taxonomic categories for a bio, as a string with 
+         multiple entries separated by vertical bar, and their scores,
+         the same way, or None if the taxer does not want scores, and 
+         the list of the strings of the categories with each taxonomy
+         variant, or None if the taxer has none (or keeps a diff).
     '''
-    lString = [chr(cint) if (cint>=32 and cint<=126) else "_"
-                for cint in mysInput]
-    sResult = "".join(lString)
-    return sResult
+    lStems = fnlBioStems(mysBio, cTaxer, cStemmer)
+    sScores = None
+    if cTaxer.mbScoring():
+        ltScored = cTaxer.mltStems2ScoredTaxons(lStems)
+        sTaxons = "|".join(sTax for (sTax, fScore) in ltScored)
+        if cTaxer.bScores:
+            sScores = "|".join(fnsScore(fScore) 
+                                for (sTax, fScore) in ltScored)
+    else:
+        sTaxons = "|".join(cTaxer.mlStems2Taxons(lStems))
+    lVariants = (cTaxer.cVariants.mlTaxons(lStems, sTaxons) 
+                    if cTaxer.cVariants else None)
+    NTRC.ntrace(4, "proc sTaxons|{}| sScores|{}|".format(sTaxons, sScores))
+    return (sTaxons, sScores, lVariants)
+
+
+# f n s S c o r e 
+def fnsScore(myfScore):
+    ''' Return a category score as text for the output. '''
+    return "%.4f" % myfScore
 
 
 # f n d P r o c e s s M e m b e r 
 @ntrace
-def fndProcessMember(mydMember, cTaxer):
+def fndProcessMember(mydMember, cTaxer, cStemmer=None):
     ''' Try to add taxonomic categories to member dict.
         Return the member dict with enhancement, if any were generated.  
         
         Taxonomic categories will be added to the "Taxonomy terms" field of
          the member record, as a string with multiple entries separated by 
-         vertical bar.
+         vertical bar.  Their scores, if wanted, go in "Taxonomy scores".
+         Those of the taxonomy variants, if any, go in their columns.
     '''
-    sBioRaw = mydMember["Short bio"].lower()
-    lTaxons = []
-    if sBioRaw:
-        sBio = cTaxer.msCleanString(sBioRaw)
-        lTaxons = cTaxer.mlString2Taxons(sBio)
-    sTaxons = "|".join(lTaxons)
-    NTRC.ntrace(4, "proc sTaxons|{}|".format(sTaxons))
+    (sTaxons, sScores, lVariants) = fntBioTaxons(
+                            mydMember["Short bio"] or "", cTaxer, cStemmer)
     dMemberPlusTax = copy.deepcopy(mydMember)
     dMemberPlusTax["Taxonomy terms"] = sTaxons
+    if sScores is not None:
+        dMemberPlusTax["Taxonomy scores"] = sScores
+    if lVariants is not None:
+        dMemberPlusTax.update(zip(cTaxer.cVariants.lColumns, lVariants))
     return dMemberPlusTax
 
 
 # f n n W r i t e M e m b e r s 
 @ntrace
-def fnnWriteMembers(myldMembers, mylColumns):
-    ''' Write CSV output of all members to stdout.
+def fnnWriteMembers(myldMembers, mylColumns, myfhOut=None, mybHeader=True):
+    ''' Write CSV output of all members to the file, or stdout.
         Return count of member records written.
         
         Manually write header line first, then write members thru CSV pkg.
+        A member that is already a CSV line (from the fast path) is 
+         written as is.
     '''
     sColumnList = ",".join(mylColumns)
     nOut = 0
-    fhWriter = csv.DictWriter(sys.stdout, mylColumns)
-    fhWriter.writeheader()
+    fhOut = myfhOut or sys.stdout
+    fhWriter = csv.DictWriter(fhOut, mylColumns)
+    if mybHeader:
+        fhWriter.writeheader()
+    for xMember in myldMembers:
+        if isinstance(xMember, str):
+            fhOut.write(xMember)
+        else:
+            fhWriter.writerow(xMember)
+        nOut += 1
+    return nOut
+
+
+# f n n W r i t e J s o n M e m b e r s 
+@ntrace
+def fnnWriteJsonMembers(myldMembers, myfhOut=None):
+    ''' Write JSON Lines output of all members to the file, or stdout.
+        Return count of member records written.
+
+        One write() per member, with "Taxonomy terms" (and those of any
+         taxonomy variants) as a list, and "Taxonomy scores", if there, 
+         as a list of numbers.
+    '''
+    nOut = 0
+    fhOut = myfhOut or sys.stdout
+    fnsDumps = json.JSONEncoder(separators=(",", ":")).encode
     for dMember in myldMembers:
-        fhWriter.writerow(dMember)
+        for sColumn in dMember:
+            if sColumn.startswith("Taxonomy terms"):
+                sTaxons = dMember[sColumn]
+                if isinstance(sTaxons, str):
+                    dMember[sColumn] = sTaxons.split("|") if sTaxons else []
+        sScores = dMember.get("Taxonomy scores")
+        if isinstance(sScores, str):
+            dMember["Taxonomy scores"] = ([float(sScore) for sScore in 
+                                        sScores.split("|")] if sScores 
+                                        else [])
+        fhOut.write(fnsDumps(dMember) + "\n")
         nOut += 1
     return nOut
 
 
+# f n d C l i P a r s e 
+def fndCliParse():
+    ''' Parse the command line.  Return a dict of the options. '''
+    cParse = argparse.ArgumentParser(
+        description="Add taxonomy categories to member records, "
+            "based on the words of their bios.  CSV to stdout.")
+    cParse.add_argument("lFiles", metavar="file", nargs="*",
+        help="member export CSV file(s)")
+    cParse.add_argument("--stems", dest="sStemsFile", default=None,
+        metavar="FILE",
+        help="also write the showstems stem listing to FILE, "
+            "from the same pass over the bios")
+    cParse.add_argument("--histogram", dest="sHistogramFile", 
+        default=None, metavar="FILE",
+        help="also write the histogram of categories per member to FILE,"
+            " with members per category and bio length quantiles")
+    cParse.add_argument("--stats-json", dest="sStatsFile", default=None,
+        metavar="FILE",
+        help="also write those statistics to FILE as JSON")
+    cParse.add_argument("--readers", dest="nReaders", type=int, default=4,
+        metavar="N",
+        help="read up to N input files at the same time (default 4)")
+    cParse.add_argument("--output", dest="sOutputFile", default=None,
+        metavar="PATH",
+        help="write the CSV to PATH (atomically, when complete) "
+            "instead of stdout")
+    cParse.add_argument("--format", dest="sFormat", default=None,
+        choices=["csv", "jsonl"],
+        help="output format (default: from the --output name, else csv)")
+    cParse.add_argument("--chunk-rows", dest="nChunkRows", type=int, 
+        default=0, metavar="N",
+        help="split the --output into numbered files of N members each")
+    cParse.add_argument("--db", dest="sDb", default=None, metavar="FILE",
+        help="read the bios from, and write the categories back to, "
+            "the member table of this SQLite database, instead of files")
+    cParse.add_argument("--table", dest="sTable", default="members",
+        help="member table in the --db (default members)")
+    cParse.add_argument("--changed-only", dest="bChangedOnly", 
+        action="store_true",
+        help="with --db, only members whose bio changed since the last "
+            "run (kept as a hash of the bio)")
+    cParse.add_argument("--since-column", dest="sSinceColumn", 
+        default=None, metavar="COL",
+        help="with --db, only members whose timestamp column COL is "
+            "newer than on the last run")
+    cParse.add_argument("--checkpoint-secs", dest="nCheckpointSecs", 
+        type=int, default=0, metavar="N",
+        help="save a checkpoint of the run every N seconds, in "
+            "PATH.ckpt, for --resume (needs --output to a plain CSV file)")
+    cParse.add_argument("--resume", dest="bResume", action="store_true",
+        help="go on from the last checkpoint of an interrupted run "
+            "with the same files and --output")
+    cParse.add_argument("--scoring", dest="sScoring", default="match",
+        choices=["match", "tfidf"],
+        help="match: every category that any bio word hits (default); "
+            "tfidf: score categories over the whole export (numpy)")
+    cParse.add_argument("--top-categories", dest="nTopCategories", 
+        type=int, default=0, metavar="N",
+        help="at most the N best categories for a member")
+    cParse.add_argument("--min-score", dest="fMinScore", type=float, 
+        default=0.0, metavar="S",
+        help="only categories that score S or more")
+    cParse.add_argument("--scores", dest="bScores", action="store_true",
+        help="add a \"Taxonomy scores\" column with the scores of the "
+            "categories")
+    cParse.add_argument("--fuzzy", dest="bFuzzy", action="store_true",
+        help="correct misspelled taxonomy keywords in the bios first "
+            "(words not in sourcedata/voc.txt, one or two edits away)")
+    cParse.add_argument("--taxonomy", dest="sTaxonomyFile", 
+        default="TaxonomyList.txt", metavar="FILE",
+        help="taxonomy file (default TaxonomyList.txt; "
+            "TaxonomyListParents.txt has parent categories)")
+    cParse.add_argument("--ancestors", dest="sAncestors", default="exclude",
+        choices=["include", "exclude"],
+        help="include: a member gets the parent categories (and theirs) "
+            "of the categories found, too; exclude: not (default)")
+    cParse.add_argument("--stop-stems", dest="bStopStems", 
+        action="store_true",
+        help="after stemming, also drop the stems of stop words")
+    cParse.add_argument("--variants", dest="lVariants", action="append",
+        default=None, metavar="FILE",
+        help="also find the categories with this taxonomy file, from the "
+            "same stems, in a \"Taxonomy terms (FILE)\" column; give it "
+            "once for each file")
+    cParse.add_argument("--variant-diff", dest="sVariantDiffFile", 
+        default=None, metavar="FILE",
+        help="instead of the --variants columns, write to FILE which "
+            "members gain or lose which categories with each variant")
+    dCli = vars(cParse.parse_args())
+    if dCli["lVariants"]:
+        if dCli["sScoring"] == "tfidf" or dCli["sDb"]:
+            cParse.error("--variants works on files, without tfidf")
+        if dCli["sVariantDiffFile"] and dCli["nCheckpointSecs"]:
+            cParse.error("--variant-diff works without checkpoints")
+        try:
+            fnlVariantNames(dCli["lVariants"])
+        except ValueError as eErr:
+            cParse.error("--variants: %s" % eErr)
+    elif dCli["sVariantDiffFile"]:
+        cParse.error("--variant-diff needs --variants")
+    if dCli["sScoring"] == "tfidf":
+        if taxscore.np is None:
+            cParse.error("--scoring tfidf needs the numpy package")
+        if dCli["sDb"] or dCli["nCheckpointSecs"] or dCli["bResume"]:
+            cParse.error("--scoring tfidf works on files, "
+                        "without checkpoints")
+    if dCli["sDb"] and dCli["bScores"]:
+        cParse.error("--scores works on files")
+    if dCli["nCheckpointSecs"] or dCli["bResume"]:
+        if (not dCli["sOutputFile"] or dCli["nChunkRows"] 
+                or fnsFormat(dCli["sOutputFile"]) != "csv"
+                or (dCli["sFormat"] or "csv") != "csv"):
+            cParse.error("--checkpoint-secs and --resume need --output "
+                        "to a CSV file, not chunked")
+        for sFile in dCli["lFiles"]:
+            try:
+                bPlainCsv = fnbPlainCsv(sFile)
+            except OSError as eErr:
+                cParse.error("cannot read %s: %s" % (sFile, eErr.strerror))
+            if not bPlainCsv:
+                cParse.error("--checkpoint-secs and --resume need CSV "
+                            "input files, not compressed: %s" % sFile)
+        dCli["nCheckpointSecs"] = dCli["nCheckpointSecs"] or 60
+    if dCli["sDb"] and (dCli["lFiles"] or dCli["sOutputFile"]):
+        cParse.error("--db takes no files and no --output")
+    if ((dCli["bChangedOnly"] or dCli["sSinceColumn"]) 
+            and not dCli["sDb"]):
+        cParse.error("--changed-only and --since-column need --db")
+    if dCli["nChunkRows"] and not dCli["sOutputFile"]:
+        cParse.error("--chunk-rows needs --output")
+    if not dCli["sFormat"]:
+        dCli["sFormat"] = (fnsFormat(dCli["sOutputFile"]) 
+                            if dCli["sOutputFile"] else "csv")
+    return dCli
+
+
 # M A I N 
 @ntrace
-def main(cTaxer):
+def main(cTaxer, mydCli):
     ''' MAIN: Process any files on the command line.  Dump results. '''
-    for sFile in sys.argv[1:]:
-        fnvProcessFile(sFile, cTaxer)
+    cStemmer = (CStemWords("StopWordList.txt") if mydCli["sStemsFile"]
+                else None)
+    cStats = (CTaxStats() 
+                if mydCli["sHistogramFile"] or mydCli["sStatsFile"] 
+                else None)
+    lFiles = mydCli["lFiles"]
+    sFormat = mydCli["sFormat"]
+    lCounts = []
+    cScorer = None
+    cTaxer.mvAncestors(mydCli["sAncestors"] == "include")
+    if mydCli["bFuzzy"]:
+        cTaxer.mvUseFixer(CFuzzyFixer(
+                    fnlTaxonomyKeywords(mydCli["sTaxonomyFile"]),
+                    fnlReadWords("sourcedata/voc.txt"), cTaxer.setStoplist))
+    if mydCli["bStopStems"]:
+        cTaxer.mvUseStopStems()
+    if mydCli["lVariants"]:
+        cTaxer.mvUseVariants(CTaxVariants(mydCli["lVariants"], CTaxify, 
+                    "StopWordList.txt", mydCli["sAncestors"] == "include",
+                    bool(mydCli["sVariantDiffFile"])))
+    if mydCli["sScoring"] == "match":
+        cTaxer.mvSelect(mydCli["nTopCategories"], mydCli["fMinScore"], 
+                        mydCli["bScores"])
+        if cTaxer.cVariants:
+            cTaxer.cVariants.mvSelect(mydCli["nTopCategories"], 
+                                        mydCli["fMinScore"])
+    else:
+        # Only for the scores column; the scorer does the selecting.
+        cTaxer.mvSelect(mybScores=mydCli["bScores"])
+        cScorer = taxscore.CTaxScorer(cTaxer.dStem2Tax, 
+                            mydCli["nTopCategories"], mydCli["fMinScore"])
+    if mydCli["sDb"]:
+        cDb = CMemberDb(mydCli["sDb"], mydCli["sTable"])
+        if mydCli["bChangedOnly"]:
+            cDb.mvUseHash()
+        if mydCli["sSinceColumn"]:
+            cDb.mvUseSince(mydCli["sSinceColumn"])
+        fnnProcessDb(cDb, cTaxer, cStemmer, cStats)
+        cDb.mvClose()
+        print("%8d members read, %d unchanged, %d updated in %s" 
+                % (cDb.nRead, cDb.nSkipped, cDb.nUpdated, mydCli["sDb"]),
+                file=sys.stderr)
+    elif mydCli["nCheckpointSecs"]:
+        cCkpt = CCheckpoint(mydCli["sOutputFile"], lFiles, 
+                    mydCli["nCheckpointSecs"], cTaxer, cStemmer, cStats)
+        if mydCli["bResume"] and not cCkpt.mbRestore():
+            NTRC.ntrace(0, "proc no checkpoint|%s|, starting over" 
+                        % (cCkpt.sCkptFile))
+        with CAtomicWriter(mydCli["sOutputFile"], 
+                            mysTmpFilename=cCkpt.sPartialFile, 
+                            mynResumeAt=cCkpt.nOutBytes) as fhOut:
+            cCkpt.fhOut = fhOut
+            lCounts = fnlProcessFiles(lFiles, cTaxer, cStemmer, cStats,
+                                        fhOut, mycCheckpoint=cCkpt)
+        cCkpt.mvDone()
+        NTRC.ntrace(0, "proc wrote rows|%d| checkpoints|%d| to|%s|" 
+                    % (sum(lCounts), cCkpt.nSaves, mydCli["sOutputFile"]))
+    elif mydCli["sOutputFile"]:
+        if mydCli["nChunkRows"]:
+            fhOut = CChunkedWriter(mydCli["sOutputFile"], 
+                        mydCli["nChunkRows"], mybHeader=(sFormat == "csv"))
+        else:
+            fhOut = CAtomicWriter(mydCli["sOutputFile"])
+        with fhOut:
+            lCounts = fnlProcessFiles(lFiles, cTaxer, cStemmer, cStats,
+                                        fhOut, mydCli["nReaders"], sFormat,
+                                        mycScorer=cScorer)
+        nRows = sum(lCounts)
+        NTRC.ntrace(0, "proc wrote rows|%d| bytes|%d| filebytes|%d| "
+                    "secs|%.3f| MB/s|%.1f| to|%s|" 
+                    % (nRows, fhOut.nBytes, fhOut.nFileBytes, 
+                    fhOut.fSeconds, 
+                    fhOut.nBytes / 1e6 / max(fhOut.fSeconds, 1e-6), 
+                    " ".join(getattr(fhOut, "lFilenames", 
+                                        [mydCli["sOutputFile"]]))))
+    else:
+        # Same big buffer for stdout; newline="" keeps CSV's "\r\n".
+        sys.stdout.flush()
+        with open(sys.stdout.fileno(), "w", buffering=nBufferBytes, 
+                encoding="utf-8", newline="", closefd=False) as fhOut:
+            lCounts = fnlProcessFiles(lFiles, cTaxer, cStemmer, cStats,
+                                        fhOut, mydCli["nReaders"], sFormat,
+                                        mycScorer=cScorer)
+    # Stdout may be the CSV, so the summary goes to stderr.
+    if len(lFiles) > 1:
+        for sFile, nCount in zip(lFiles, lCounts):
+            print("%8d members from %s" % (nCount, sFile), file=sys.stderr)
+        print("%8d members in all" % (sum(lCounts)), file=sys.stderr)
+    if cStemmer:
+        with open(mydCli["sStemsFile"], "w") as fhStems:
+            fnvDumpSortedWords(cStemmer.mgGetSortedWordStemCrop(), fhStems)
+    if cTaxer.cFixer:
+        print("%8d words looked up, %d corrected" 
+                % (cTaxer.cFixer.nLookups, cTaxer.cFixer.nFixed), 
+                file=sys.stderr)
+    if mydCli["sHistogramFile"]:
+        cStats.mvWriteText(mydCli["sHistogramFile"])
+    if mydCli["sStatsFile"]:
+        cStats.mvWriteJson(mydCli["sStatsFile"])
+    if mydCli["sVariantDiffFile"]:
+        cTaxer.cVariants.mvWriteDiff(mydCli["sVariantDiffFile"])
     return
 
 
 # E N T R Y   P O I N T 
 if __name__ == "__main__":
     debug = 0
-    cTax = CTaxify("StopWordList.txt", "TaxonomyList.txt")
-    sys.exit(main(cTax))
+    dCli = fndCliParse()
+    cTax = CTaxify("StopWordList.txt", dCli["sTaxonomyFile"])
+    sys.exit(main(cTax, dCli))
 
 
 # Edit history:
@@ -225,6 +1130,53 @@ if __name__ == "__main__":
 #                do extracting it from the spreadsheet is
 #                <categoryname> <tab> <blankseparatedlistofwords>
 #               Change tokenizer to strip punctuation after splitting.  
+# 20261019  RBL Cache the stem of each distinct word.  
+#               Add --stems and --histogram: one pass over the bios gives
+#                the enriched CSV, the stem listing (via showstems' 
+#                CStemWords), and the categories-per-member histogram.
+#               Read the export through the memberio mmap reader, which
+#                strips and sanitizes big slices at a time.  
+#               Add --output: buffered, fsynced, atomically renamed CSV.
+#               Read and write gzip/bz2/xz transparently (memberio).
+#               Several input files make one CSV with one header, the 
+#                union of their columns; the files are read by a pool of
+#                threads.  Members are written as they are done, not
+#                all kept until the end.  
+#               Fast path for records without quotes: no dict, no 
+#                DictWriter; only the bio is looked at, and the rest of
+#                the record is copied through.  
+#                The fast path is chosen from the category names,
+#                before stemming, so no bio is taxified twice.
+#               Add JSON Lines input and output (--format jsonl), and 
+#                --chunk-rows for output in numbered chunk files.  
+#                Big buffer for stdout, too.  
+#               Add --db: read bios from and write categories back to 
+#                the SQLite member table (memberdb), optionally only for
+#                members changed since the last run.  
+#               Add --checkpoint-secs and --resume (CCheckpoint).
+#               Add --scoring tfidf, --top-categories, --min-score: 
+#                categories scored over the whole export (taxscore).
+#               --top-categories and --min-score for the plain match, too,
+#                by hits over bio length; --scores adds the scores column.
+#               --histogram adds members per category and bio length 
+#                quantiles (taxstats); --stats-json, the same as JSON.
+#               Add --fuzzy: misspelled bio words are corrected before 
+#                they are stemmed (fuzzyfix).
+#               Parent categories in the TaxonomyList file, closure as
+#                bitsets, --ancestors include|exclude.
+#               Stopwords from the compiled stoplist artifact; add 
+#                --stop-stems.
+#               Add --variants and --variant-diff: K taxonomy files on 
+#                the same stems, in one pass (taxvariants).  A tab ends
+#                the category name in the taxonomy file.
+#               Checkpoints refuse JSON Lines and compressed input.
+#               tfidf scores formatted by fnsScore, as match scores are.
+#               --fuzzy corrects to taxonomy keywords only; --stems lists
+#                the words as in the bio.
+#               Add --taxonomy; parent categories in their own file.
+#               --variants once per file; the variants get the same 
+#                --top-categories and --min-score selection.
+#               --variants refuses a file given twice.
 # 
 # 
 
@@ -0,0 +1,181 @@
+#/usr/bin/python3
+# taxscore.py
+#
+#                               RBLandau 20261019
+#
+# Score taxonomy categories for a whole export at once, TF-IDF weighted,
+#  so that a member gets the categories that the bio is mostly about,
+#  not every category that any one of its words happens to hit.
+#
+
+'''
+theory:
+
+collect, for each member, the stems of the bio that are in the taxonomy
+ (the same stems that taxit already makes; nothing is stemmed again)
+ as one row of a member x stem count matrix, in CSR form:
+ indptr (where each member's row starts), indices (stem numbers),
+ and the count of bio tokens, for normalizing
+at the end, for the whole export:
+tf(member, stem) = occurrences / tokens in the bio
+idf(stem) = log((1 + members) / (1 + members with the stem)) + 1
+stem x taxon weight matrix W, from TaxonomyList: 1 if the stem is one
+ of the category's words; also CSR, since a stem has only a category 
+ or two
+scores = (tf * idf) . W, members x categories, one sparse product done
+ with flat arrays: expand every stem occurrence into its categories, 
+ weight them, and sum them into (member, category) cells with one
+ np.bincount; nothing as big as occurrences x categories is made
+select with array operations: a category is kept if its score is
+ positive and at least the minimum score, and, with a top N, if it is
+ among the member's N best (ties to the alphabetically first)
+only turning the kept categories into strings is done per member,
+ and that through a cache of the distinct patterns (but the scores, 
+ if wanted, are different for every member)
+
+With no minimum and no top N, the categories are exactly those of the
+ plain any-word match.
+
+numpy is needed only for this; without it, taxit works as before.
+
+'''
+
+import array
+from NewTracep3 import NTRC, ntrace, ntracef
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# c l a s s   C T a x S c o r e r
+class CTaxScorer():
+    ''' Class that collects the taxonomy stems of all the bios, then
+         scores and selects the categories for all of them at once.
+    '''
+
+
+    @ntrace
+    def __init__(self, mydStem2Tax, mynTop=0, myfMinScore=0.0):
+        ''' CTaxScorer init: Number the categories and the stems, and
+             build the stem x category weight matrix.
+        '''
+        if np is None:
+            raise RuntimeError("TF-IDF scoring needs the numpy package")
+        self.lTaxNames = sorted({sTax for lTaxons in mydStem2Tax.values()
+                                for sTax in lTaxons if sTax})
+        dTax2Id = {sTax: nId for nId, sTax in enumerate(self.lTaxNames)}
+        self.dStem2Id = {}
+        for sStem, lTaxons in mydStem2Tax.items():
+            if any(lTaxons):
+                self.dStem2Id[sStem] = len(self.dStem2Id)
+        # W in CSR form: the categories of stem n are 
+        #  aWTax[aWIndptr[n]:aWIndptr[n+1]], all with weight 1.
+        llStemTax = [sorted({dTax2Id[sTax] for sTax in mydStem2Tax[sStem]
+                            if sTax}) for sStem in self.dStem2Id]
+        self.aWIndptr = np.cumsum([0] + [len(lTax) for lTax in llStemTax])
+        self.aWTax = np.array([nTax for lTax in llStemTax for nTax in lTax],
+                                dtype=np.int64)
+        self.nTop = mynTop
+        self.fMinScore = myfMinScore
+        # The CSR rows of the members, growing, as C arrays.
+        self.aIndptr = array.array("q", [0])
+        self.aIndices = array.array("q")
+        self.aTokens = array.array("q")
+
+
+# m n A d d M e m b e r
+    def mnAddMember(self, mylStems):
+        ''' Add the stems of one bio.  Return its row number. '''
+        dStem2Id = self.dStem2Id
+        self.aIndices.extend([dStem2Id[sStem] for sStem in mylStems
+                                if sStem in dStem2Id])
+        self.aIndptr.append(len(self.aIndices))
+        self.aTokens.append(len(mylStems))
+        return len(self.aTokens) - 1
+
+
+# m a S c o r e s
+    @ntrace
+    def maScores(self):
+        ''' Return the members x categories matrix of TF-IDF scores. '''
+        nMembers = len(self.aTokens)
+        nStems = len(self.dStem2Id)
+        nTaxa = len(self.lTaxNames)
+        aIndptr = np.frombuffer(self.aIndptr, dtype=np.int64)
+        aIndices = np.frombuffer(self.aIndices, dtype=np.int64)
+        aTokens = np.frombuffer(self.aTokens, dtype=np.int64)
+        aRows = np.repeat(np.arange(nMembers), np.diff(aIndptr))
+        # Document frequency: members with the stem, counted once each.
+        aDistinct = np.unique(aRows * nStems + aIndices) % nStems
+        aDf = np.bincount(aDistinct, minlength=nStems)
+        aIdf = np.log((1.0 + nMembers) / (1.0 + aDf)) + 1.0
+        # Each occurrence adds idf / tokens to each of its stem's
+        #  categories.  Expand the occurrences by their categories.
+        aWLen = np.diff(self.aWIndptr)[aIndices]
+        aOcc = np.repeat(np.arange(len(aIndices)), aWLen)
+        aStart = np.repeat(np.cumsum(aWLen) - aWLen, aWLen)
+        aTax = self.aWTax[self.aWIndptr[aIndices[aOcc]]
+                            + np.arange(len(aOcc)) - aStart]
+        aWeight = aIdf[aIndices[aOcc]] / np.maximum(aTokens, 1)[aRows[aOcc]]
+        aScores = np.bincount(aRows[aOcc] * nTaxa + aTax, weights=aWeight,
+                            minlength=nMembers * nTaxa)
+        NTRC.ntrace(3, "proc scored members|%d| stems|%d| nnz|%d|"
+                    % (nMembers, nStems, len(aIndices)))
+        return aScores.reshape(nMembers, nTaxa)
+
+
+# m a S e l e c t
+    def maSelect(self, myaScores):
+        ''' Return the boolean members x categories matrix of the
+             categories kept, by minimum score and top N.
+        '''
+        aKeep = (myaScores > 0.0) & (myaScores >= self.fMinScore)
+        if self.nTop and self.nTop < myaScores.shape[1]:
+            # Stable sort: equal scores keep alphabetical order.
+            aBest = np.argsort(-myaScores, axis=1, kind="stable")
+            aTop = np.zeros_like(aKeep)
+            np.put_along_axis(aTop, aBest[:, :self.nTop], True, axis=1)
+            aKeep &= aTop
+        return aKeep
+
+
+# m l t T a x o n S t r i n g s
+    @ntrace
+    def mltTaxonStrings(self, myfnScore=None):
+        ''' Score and select for all the members added.  Return the list
+             of (categories, scores) strings, names sorted and joined with
+             vertical bars, in the order the members were added.  The 
+             scores string is None unless a myfnScore is given to format
+             each score (taxit's fnsScore, so both scorings write them
+             the same way).
+        '''
+        if not self.aTokens:
+            return []
+        aScores = self.maScores()
+        aKeep = self.maSelect(aScores)
+        aPacked = np.packbits(aKeep, axis=1)
+        dPattern2String = {}
+        lStrings = []
+        for nMember, bPattern in enumerate(map(bytes, aPacked)):
+            sTaxons = dPattern2String.get(bPattern)
+            if sTaxons is None:
+                sTaxons = dPattern2String[bPattern] = "|".join(
+                            self.lTaxNames[nTax]
+                            for nTax in np.flatnonzero(aKeep[nMember]))
+            sScores = None
+            if myfnScore:
+                sScores = "|".join(map(myfnScore, 
+                                    aScores[nMember][aKeep[nMember]]))
+            lStrings.append((sTaxons, sScores))
+        return lStrings
+
+
+# Edit history:
+# 20261019  RBL Original version.
+#               Scores, too, if wanted.
+#               Scores formatted by the caller's function.
+#
+#
+
+#END
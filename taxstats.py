@@ -0,0 +1,206 @@
+#/usr/bin/python3
+# taxstats.py
+#
+#                               RBLandau 20261019
+#
+# Statistics about the categories given to members, kept as the members
+#  go by, so that nobody has to awk the output afterwards and plot a
+#  histogram by hand.
+#
+
+'''
+theory:
+
+for each member, as it is written: its categories string and the length
+ of its bio
+keep:
+ members by number of categories (the old histogram; zero included)
+ members by category
+ bio lengths, in a quantile sketch: counts in buckets whose bounds grow
+  geometrically, so any quantile is known to within 1% of its value,
+  in memory that depends on the range of the lengths, not their number
+  (the DDSketch idea); sketches add, bucket by bucket
+at the end, the same numbers two ways: a text report (the histogram as
+ before, then the rest) and JSON
+
+'''
+
+import math
+import json
+from collections import Counter
+from NewTracep3 import NTRC, ntrace, ntracef
+
+
+# The quantiles of bio length to report.
+lQuantiles = [0.05, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99]
+
+
+# c l a s s   C Q u a n t i l e S k e t c h
+class CQuantileSketch():
+    ''' Class that estimates quantiles of a stream of numbers >= 0 to
+         within a relative accuracy, in a few hundred counters.
+    '''
+
+
+    def __init__(self, myfAccuracy=0.01):
+        ''' CQuantileSketch init: Empty; buckets grow by gamma. '''
+        self.fGamma = (1.0 + myfAccuracy) / (1.0 - myfAccuracy)
+        self.fLnGamma = math.log(self.fGamma)
+        self.cBuckets = Counter()
+        self.nZeros = 0
+        self.nCount = 0
+        self.fSum = 0.0
+        self.fMin = math.inf
+        self.fMax = -math.inf
+
+
+# m v A d d
+    def mvAdd(self, myfValue):
+        ''' Count one value. '''
+        if myfValue <= 0:
+            self.nZeros += 1
+        else:
+            self.cBuckets[math.ceil(math.log(myfValue) / self.fLnGamma)] += 1
+        self.nCount += 1
+        self.fSum += myfValue
+        self.fMin = min(self.fMin, myfValue)
+        self.fMax = max(self.fMax, myfValue)
+
+
+# m v M e r g e
+    def mvMerge(self, mycOther):
+        ''' Add the counts of another sketch with the same accuracy. '''
+        self.cBuckets.update(mycOther.cBuckets)
+        self.nZeros += mycOther.nZeros
+        self.nCount += mycOther.nCount
+        self.fSum += mycOther.fSum
+        self.fMin = min(self.fMin, mycOther.fMin)
+        self.fMax = max(self.fMax, mycOther.fMax)
+
+
+# m f Q u a n t i l e
+    def mfQuantile(self, myfQ):
+        ''' Return the estimate of the myfQ quantile, or None if empty. '''
+        if not self.nCount:
+            return None
+        nRank = myfQ * (self.nCount - 1)
+        nSeen = self.nZeros
+        if nRank < nSeen:
+            return 0.0
+        for nBucket in sorted(self.cBuckets):
+            nSeen += self.cBuckets[nBucket]
+            if nRank < nSeen:
+                # The middle of the bucket, in the relative sense.
+                fValue = (2.0 * self.fGamma ** nBucket
+                            / (self.fGamma + 1.0))
+                return min(max(fValue, self.fMin), self.fMax)
+        return self.fMax
+
+
+# c l a s s   C T a x S t a t s
+class CTaxStats():
+    ''' Class that keeps the statistics of a taxify run. '''
+
+
+    def __init__(self):
+        ''' CTaxStats init: Nothing counted yet. '''
+        self.nMembers = 0
+        self.cPerMember = Counter()
+        self.cPerCategory = Counter()
+        self.cBioLength = CQuantileSketch()
+
+
+# m v A d d
+    def mvAdd(self, mysTaxons, mynBioLength):
+        ''' Count one member: its categories string and bio length. '''
+        lTaxons = mysTaxons.split("|") if mysTaxons else []
+        self.nMembers += 1
+        self.cPerMember[len(lTaxons)] += 1
+        self.cPerCategory.update(lTaxons)
+        self.cBioLength.mvAdd(mynBioLength)
+
+
+# m v M e r g e
+    def mvMerge(self, mycOther):
+        ''' Add the counts of another CTaxStats, e.g., from a checkpoint. '''
+        self.nMembers += mycOther.nMembers
+        self.cPerMember.update(mycOther.cPerMember)
+        self.cPerCategory.update(mycOther.cPerCategory)
+        self.cBioLength.mvMerge(mycOther.cBioLength)
+
+
+# m d R e p o r t
+    def mdReport(self):
+        ''' Return the statistics as a dict, ready for JSON. '''
+        cSketch = self.cBioLength
+        nCats = sum(nTaxons * nMembers
+                    for nTaxons, nMembers in self.cPerMember.items())
+        return {
+            "members": self.nMembers,
+            "members_without_categories": self.cPerMember[0],
+            "mean_categories_per_member":
+                        (nCats / self.nMembers if self.nMembers else 0.0),
+            "members_by_number_of_categories":
+                        {str(nTaxons): self.cPerMember[nTaxons] for nTaxons
+                        in range(max(self.cPerMember, default=-1) + 1)},
+            "members_by_category": dict(sorted(self.cPerCategory.items())),
+            "bio_length": {
+                "min": cSketch.fMin if cSketch.nCount else None,
+                "max": cSketch.fMax if cSketch.nCount else None,
+                "mean": (cSketch.fSum / cSketch.nCount
+                            if cSketch.nCount else None),
+                "quantiles": {"p%g" % (fQ * 100): cSketch.mfQuantile(fQ)
+                                for fQ in lQuantiles},
+                },
+            }
+
+
+# m v W r i t e J s o n
+    @ntrace
+    def mvWriteJson(self, mysFilename):
+        ''' Write the statistics to a JSON file. '''
+        with open(mysFilename, "w") as fhOut:
+            json.dump(self.mdReport(), fhOut, indent=2)
+            fhOut.write("\n")
+
+
+# m v W r i t e T e x t
+    @ntrace
+    def mvWriteText(self, mysFilename):
+        ''' Write the statistics as text: first the number of members
+             with each number of categories, as a bar chart, then the
+             rest.
+        '''
+        dReport = self.mdReport()
+        cPerMember = self.cPerMember
+        nMax = max(cPerMember.values(), default=0)
+        with open(mysFilename, "w") as fhOut:
+            fhOut.write("%5s %8s\n" % ("nCats", "nMembers"))
+            for nCats in range(max(cPerMember, default=-1) + 1):
+                nMembers = cPerMember[nCats]
+                sBar = "#" * ((50 * nMembers + nMax - 1) // nMax)
+                fhOut.write("%5d %8d %s\n" % (nCats, nMembers, sBar))
+            fhOut.write("\n%8d members, %d without categories, "
+                        "%.2f categories per member\n"
+                        % (self.nMembers, cPerMember[0],
+                        dReport["mean_categories_per_member"]))
+            nMax = max(self.cPerCategory.values(), default=0)
+            fhOut.write("\n%8s %s\n" % ("nMembers", "Category"))
+            for sTax, nMembers in self.cPerCategory.most_common():
+                sBar = "#" * ((50 * nMembers + nMax - 1) // nMax)
+                fhOut.write("%8d %-40s %s\n" % (nMembers, sTax, sBar))
+            dLength = dReport["bio_length"]
+            if self.cBioLength.nCount:
+                fhOut.write("\nbio length (characters): min %d, "
+                            "mean %.1f, max %d\n" % (dLength["min"],
+                            dLength["mean"], dLength["max"]))
+                for sQ, fValue in dLength["quantiles"].items():
+                    fhOut.write("%8s %8.0f\n" % (sQ, fValue))
+
+
+# Edit history:
+# 20261019  RBL Original version.
+#
+#
+
+#END
@@ -0,0 +1,406 @@
+#/usr/bin/python3
+# taxsweep.py
+#
+#                               RBLandau 20261019
+#
+# Try a grid of taxonomy edits ("remove program from Computer science")
+#  and selection settings (minimum hits, minimum score, top N) on a
+#  corpus of bios, all at once, and tabulate what each would do, with
+#  F1 if the corpus is labeled.
+#
+
+'''
+theory:
+
+the corpus is tokenized and stemmed once, as taxit does (CTaxify, same
+ stop words), and each distinct stem gets an integer ID; each member is
+ then a run of stem IDs in one flat array, CSR style: aIndptr (where
+ each member's run starts), aIds, and aTokens (stems in the bio, for
+ scores); gold categories, if there is a gold column, go along
+that is cached in a pickle (--cache FILE), good as long as the input
+ files, stopword and taxonomy files, stop words as loaded (a hash: the
+ compiled StopWordList.pickle may differ from the text), and gold 
+ column are the same
+then the IDs are cut down to the stems that some configuration can
+ hit, which makes the runs much shorter
+
+a configuration = a set of edits x minimum hits x minimum score x top N
+edits, one set per line of --edits FILE (or per --edit), ";" between
+ edits: "Computer science -= program, programs; Writing += memoir"
+ words are stemmed like the taxonomy's; the unedited taxonomy is
+ always configuration 0
+each configuration compiles its table: stem ID -> bitset of categories
+ (with ancestors, if --ancestors include), built from the taxer's stem
+ -> categories map with the edits made
+the configurations go out to a pool of processes; each worker has the
+ corpus (sent once, to start it) and does, per member:
+ no thresholds: OR the bitsets of its stems
+ else: count the hits of each category; keep those with at least the
+  minimum hits and minimum score (hits / stems, as taxit), then the N
+  best (ties to the alphabetically first)
+ and counts categories, members without any, and gold/found bitsets in
+  a CTaxEval (taxeval), for precision, recall and F1
+
+'''
+
+import os
+import re
+import sys
+import pickle
+import hashlib
+import argparse
+import itertools
+from array import array
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from NewTracep3 import NTRC, ntrace, ntracef
+from memberio import fngReadMembers
+from taxit_03 import CTaxify, fnlBioStems
+from taxeval import CTaxEval, fnlGoldTaxons, fnlBits
+
+
+# The corpus, in each worker: set once, by fnvInitWorker.
+gtCorpus = None
+
+
+# f n l S t a m p s
+def fnlStamps(mylFilenames):
+    ''' Return what identifies the files: name, size, mtime. '''
+    return [(sFile, os.stat(sFile).st_size, os.stat(sFile).st_mtime_ns)
+            for sFile in mylFilenames]
+
+
+# f n s S t o p H a s h
+def fnsStopHash(mysetStoplist):
+    ''' Return a short, stable hash of a set of stop words. '''
+    return hashlib.blake2b("\n".join(sorted(mysetStoplist)).encode("utf-8"),
+                            digest_size=8).hexdigest()
+
+
+# f n d B u i l d C o r p u s
+@ntrace
+def fndBuildCorpus(mylFilenames, cTaxer, mysGoldColumn=None):
+    ''' Tokenize and stem all the bios, once.  Return the corpus as a
+         dict: stem of each ID, CSR arrays of stem IDs, stems per bio,
+         and gold category lists (or None).
+    '''
+    dStem2Id = dict()
+    aIndptr = array("q", [0])
+    aIds = array("i")
+    aTokens = array("i")
+    llGold = [] if mysGoldColumn else None
+    for sFile in mylFilenames:
+        for dMember in fngReadMembers(sFile):
+            lStems = fnlBioStems(dMember.get("Short bio") or "", cTaxer)
+            for sStem in lStems:
+                nId = dStem2Id.get(sStem)
+                if nId is None:
+                    nId = dStem2Id[sStem] = len(dStem2Id)
+                aIds.append(nId)
+            aIndptr.append(len(aIds))
+            aTokens.append(len(lStems))
+            if llGold is not None:
+                llGold.append(fnlGoldTaxons(dMember.get(mysGoldColumn)))
+    return {"lStems": list(dStem2Id), "aIndptr": aIndptr, "aIds": aIds,
+            "aTokens": aTokens, "llGold": llGold}
+
+
+# f n d L o a d C o r p u s
+def fndLoadCorpus(mylFilenames, cTaxer, mysGoldColumn, mysCacheFile,
+                mylSideFiles):
+    ''' Return the corpus from the cache file, if it is for the same
+         files and gold column; else build it, and cache it if asked.
+    '''
+    # The stop words as loaded, too: the compiled artifact may change
+    #  (stoplist.py --merge) while the text file stays the same.
+    lStamps = fnlStamps(mylFilenames + mylSideFiles)
+    lStamps.append(fnsStopHash(cTaxer.setStoplist))
+    if mysCacheFile and os.path.exists(mysCacheFile):
+        with open(mysCacheFile, "rb") as fhIn:
+            dCorpus = pickle.load(fhIn)
+        if (dCorpus["lStamps"] == lStamps
+                and dCorpus["sGoldColumn"] == mysGoldColumn):
+            NTRC.ntrace(3, "proc corpus from cache|%s|" % mysCacheFile)
+            return dCorpus
+    dCorpus = fndBuildCorpus(mylFilenames, cTaxer, mysGoldColumn)
+    dCorpus["lStamps"] = lStamps
+    dCorpus["sGoldColumn"] = mysGoldColumn
+    if mysCacheFile:
+        sTmpFile = mysCacheFile + ".tmp"
+        with open(sTmpFile, "wb") as fhOut:
+            pickle.dump(dCorpus, fhOut, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(sTmpFile, mysCacheFile)
+    return dCorpus
+
+
+# f n l P a r s e E d i t s
+def fnlParseEdits(mysEdits, cTaxer):
+    ''' Return the list of (category, "+" or "-", list of stems) of a set
+         of edits: "Category -= word, word; Category += word".
+        Raise ValueError for an edit that cannot be read, or an unknown
+         category.
+    '''
+    ltEdits = []
+    for sEdit in mysEdits.split(";"):
+        if not sEdit.strip():
+            continue
+        oMatch = re.fullmatch(r"\s*(.+?)\s*([+-])=\s*(.+?)\s*", sEdit)
+        if not oMatch:
+            raise ValueError("cannot read taxonomy edit |%s|" % sEdit)
+        (sTax, sOp, sWords) = oMatch.groups()
+        sTax = sTax.replace("%20", " ")
+        if sTax not in cTaxer.dTax2Bit:
+            raise ValueError("no taxonomy category |%s|" % sTax)
+        lStems = [cTaxer.ps.stem(sWord.lower())
+                    for sWord in re.split(r"[,\s]+", sWords) if sWord]
+        ltEdits.append((sTax, sOp, lStems))
+    return ltEdits
+
+
+# f n d S t e m M a s k s
+def fndStemMasks(mycTaxer, myltEdits, mybAncestors):
+    ''' Return the table of stem -> bitset of categories of the taxonomy,
+         with the edits made.
+    '''
+    dStem2Taxons = {sStem: set(lTaxons)
+                    for sStem, lTaxons in mycTaxer.dStem2Leaf.items()}
+    for (sTax, sOp, lStems) in myltEdits:
+        for sStem in lStems:
+            if sOp == "+":
+                dStem2Taxons.setdefault(sStem, set()).add(sTax)
+            else:
+                dStem2Taxons.get(sStem, set()).discard(sTax)
+    dTax2Mask = mycTaxer.dTax2Closure if mybAncestors else mycTaxer.dTax2Bit
+    dStem2Mask = dict()
+    for sStem, setTaxons in dStem2Taxons.items():
+        nMask = 0
+        for sTax in setTaxons:
+            nMask |= dTax2Mask.get(sTax, 0)
+        if nMask:
+            dStem2Mask[sStem] = nMask
+    return dStem2Mask
+
+
+# f n t C o m p a c t C o r p u s
+@ntrace
+def fntCompactCorpus(mydCorpus, mysetStems):
+    ''' Return the corpus cut down to the stems in mysetStems, renumbered:
+         (stems of the new IDs, aIndptr, aIds, aTokens).
+    '''
+    lOld2New = [-1] * len(mydCorpus["lStems"])
+    lStems = []
+    for nOld, sStem in enumerate(mydCorpus["lStems"]):
+        if sStem in mysetStems:
+            lOld2New[nOld] = len(lStems)
+            lStems.append(sStem)
+    aOldIndptr = mydCorpus["aIndptr"]
+    aOldIds = mydCorpus["aIds"]
+    aIndptr = array("q", [0])
+    aIds = array("i")
+    for nMember in range(len(aOldIndptr) - 1):
+        aIds.extend(nNew for nNew in (lOld2New[nOld] for nOld
+                    in aOldIds[aOldIndptr[nMember]:aOldIndptr[nMember + 1]])
+                    if nNew >= 0)
+        aIndptr.append(len(aIds))
+    return (lStems, aIndptr, aIds, mydCorpus["aTokens"])
+
+
+# f n v I n i t W o r k e r
+def fnvInitWorker(mytCorpus):
+    ''' Start a worker: keep the corpus for all its configurations. '''
+    global gtCorpus
+    gtCorpus = mytCorpus
+
+
+# f n d R u n C o n f i g
+def fndRunConfig(mytTask):
+    ''' Run one configuration over the corpus.  Return its stats. '''
+    (nConfig, lStemMasks, nMinHits, fMinScore, nTop) = mytTask
+    (aIndptr, aIds, aTokens, lGoldMasks, dEvalTax2Bit) = gtCorpus
+    bCount = nMinHits > 1 or fMinScore > 0.0 or nTop > 0
+    cEval = None
+    if lGoldMasks is not None:
+        cEval = CTaxEval(dEvalTax2Bit, mybBitNumbers=True)
+    dMask2Bits = dict()
+    nCats = 0
+    nZero = 0
+    nMembers = len(aTokens)
+    for nMember in range(nMembers):
+        nMask = 0
+        if not bCount:
+            for nId in aIds[aIndptr[nMember]:aIndptr[nMember + 1]]:
+                nMask |= lStemMasks[nId]
+        else:
+            dHits = defaultdict(int)
+            for nId in aIds[aIndptr[nMember]:aIndptr[nMember + 1]]:
+                nStemMask = lStemMasks[nId]
+                lBits = dMask2Bits.get(nStemMask)
+                if lBits is None:
+                    lBits = dMask2Bits[nStemMask] = fnlBits(nStemMask)
+                for nBit in lBits:
+                    dHits[nBit] += 1
+            # Same arithmetic as CTaxify.mltStems2ScoredTaxons.
+            fPerStem = 1.0 / max(aTokens[nMember], 1)
+            ltKept = [(nBit, nHits) for (nBit, nHits) in dHits.items()
+                        if nHits >= nMinHits
+                        and nHits * fPerStem >= fMinScore]
+            if nTop and len(ltKept) > nTop:
+                ltKept.sort(key=lambda tKept: (-tKept[1], tKept[0]))
+                del ltKept[nTop:]
+            for (nBit, nHits) in ltKept:
+                nMask |= 1 << nBit
+        nFound = nMask.bit_count()
+        nCats += nFound
+        nZero += not nFound
+        if cEval:
+            cEval.mvAddMasks(lGoldMasks[nMember], nMask)
+    dStats = {"config": nConfig, "members": nMembers,
+                "mean_categories": nCats / nMembers if nMembers else 0.0,
+                "zero_categories": nZero}
+    if cEval:
+        dStats.update(cEval.mdSummary())
+    return dStats
+
+
+# f n l C o n f i g s
+def fnlConfigs(mylEditSets, mylMinHits, mylMinScores, mylTops):
+    ''' Return the grid: a list of (edits, min hits, min score, top N);
+         the unedited taxonomy first.
+    '''
+    lEditSets = [""] + [sEdits for sEdits in mylEditSets if sEdits.strip()]
+    return list(itertools.product(lEditSets, mylMinHits, mylMinScores,
+                                    mylTops))
+
+
+# f n v W r i t e T a b l e
+def fnvWriteTable(myltConfigs, myldStats, myfhOut=sys.stdout):
+    ''' Write one line per configuration. '''
+    bGold = any("f1" in dStats for dStats in myldStats)
+    sHead = "%4s %5s %6s %4s %8s %7s" % ("cfg", "hits", "score", "top",
+                                        "cats/mbr", "zero")
+    if bGold:
+        sHead += " %6s %6s %6s %6s" % ("prec", "recall", "f1", "macro")
+    myfhOut.write(sHead + "  edits\n")
+    for (sEdits, nMinHits, fMinScore, nTop), dStats in zip(myltConfigs,
+                                                            myldStats):
+        sLine = "%4d %5d %6.3f %4d %8.3f %7d" % (dStats["config"],
+                nMinHits, fMinScore, nTop, dStats["mean_categories"],
+                dStats["zero_categories"])
+        if bGold:
+            sLine += " %6.3f %6.3f %6.3f %6.3f" % (dStats["precision"],
+                    dStats["recall"], dStats["f1"], dStats["macro_f1"])
+        myfhOut.write(sLine + "  " + (sEdits.strip() or "(none)") + "\n")
+
+
+# f n d C l i P a r s e
+def fndCliParse():
+    ''' Parse the command line.  Return a dict of the options. '''
+    cParse = argparse.ArgumentParser(
+        description="Try a grid of taxonomy edits and selection settings "
+            "on a corpus of bios, in parallel; one line of stats each.")
+    cParse.add_argument("lFiles", metavar="file", nargs="+",
+        help="member export file(s), CSV or JSON Lines")
+    cParse.add_argument("--edits", dest="sEditsFile", default=None,
+        metavar="FILE",
+        help="one set of edits per line, e.g. "
+            "\"Computer science -= program; Writing += memoir\"")
+    cParse.add_argument("--edit", dest="lEdits", action="append",
+        default=[], metavar="EDITS",
+        help="one more set of edits (may be repeated)")
+    cParse.add_argument("--min-hits", dest="lMinHits", type=int,
+        nargs="+", default=[1], metavar="N",
+        help="minimum bio stems hitting a category (default 1)")
+    cParse.add_argument("--min-score", dest="lMinScores", type=float,
+        nargs="+", default=[0.0], metavar="S",
+        help="minimum score, hits over bio stems (default 0)")
+    cParse.add_argument("--top-categories", dest="lTops", type=int,
+        nargs="+", default=[0], metavar="N",
+        help="at most the N best categories (default 0, all)")
+    cParse.add_argument("--gold-column", dest="sGoldColumn", default=None,
+        metavar="COL",
+        help="the corpus is labeled: the right categories are in COL; "
+            "add precision, recall and F1")
+    cParse.add_argument("--taxonomy", dest="sTaxonomyFile",
+        default="TaxonomyList.txt", metavar="FILE",
+        help="taxonomy file to edit (default TaxonomyList.txt)")
+    cParse.add_argument("--ancestors", dest="sAncestors", default="exclude",
+        choices=["include", "exclude"],
+        help="as for taxit")
+    cParse.add_argument("--cache", dest="sCacheFile", default=None,
+        metavar="FILE",
+        help="keep the stemmed corpus in FILE, for the next sweep")
+    cParse.add_argument("--jobs", dest="nJobs", type=int,
+        default=os.cpu_count() or 1, metavar="N",
+        help="worker processes (default: one per CPU)")
+    dCli = vars(cParse.parse_args())
+    if dCli["sEditsFile"]:
+        with open(dCli["sEditsFile"], "r") as fhIn:
+            dCli["lEdits"] = [sLine.strip() for sLine in fhIn
+                                if sLine.strip()
+                                and not sLine.startswith("#")
+                                ] + dCli["lEdits"]
+    return dCli
+
+
+# M A I N
+@ntrace
+def main(mydCli):
+    ''' MAIN: Stem the corpus once, compile the configurations, run them
+         in parallel, tabulate.
+    '''
+    cTaxer = CTaxify("StopWordList.txt", mydCli["sTaxonomyFile"])
+    bAncestors = mydCli["sAncestors"] == "include"
+    ltConfigs = fnlConfigs(mydCli["lEdits"], mydCli["lMinHits"],
+                            mydCli["lMinScores"], mydCli["lTops"])
+    # Each set of edits once, however many settings it is tried with.
+    dEdits2Masks = dict()
+    for (sEdits, _, _, _) in ltConfigs:
+        if sEdits not in dEdits2Masks:
+            try:
+                ltEdits = fnlParseEdits(sEdits, cTaxer)
+            except ValueError as eBad:
+                print("taxsweep: %s" % eBad, file=sys.stderr)
+                return 2
+            dEdits2Masks[sEdits] = fndStemMasks(cTaxer, ltEdits, bAncestors)
+    dCorpus = fndLoadCorpus(mydCli["lFiles"], cTaxer, mydCli["sGoldColumn"],
+                    mydCli["sCacheFile"],
+                    ["StopWordList.txt", mydCli["sTaxonomyFile"]])
+    setStems = set()
+    for dStem2Mask in dEdits2Masks.values():
+        setStems.update(dStem2Mask)
+    (lStems, aIndptr, aIds, aTokens) = fntCompactCorpus(dCorpus, setStems)
+    lGoldMasks = None
+    dEvalTax2Bit = None
+    if dCorpus["llGold"] is not None:
+        cEval = CTaxEval(cTaxer.dTax2Bit)
+        lGoldMasks = [cEval.mnMask(lGold) for lGold in dCorpus["llGold"]]
+        dEvalTax2Bit = cEval.dTax2Bit
+    ltTasks = [(nConfig, [dEdits2Masks[sEdits].get(sStem, 0)
+                            for sStem in lStems],
+                nMinHits, fMinScore, nTop)
+                for nConfig, (sEdits, nMinHits, fMinScore, nTop)
+                in enumerate(ltConfigs)]
+    NTRC.ntrace(3, "proc sweep configs|%d| members|%d| stems|%d| ids|%d|"
+                % (len(ltTasks), len(aTokens), len(lStems), len(aIds)))
+    tCorpus = (aIndptr, aIds, aTokens, lGoldMasks, dEvalTax2Bit)
+    with ProcessPoolExecutor(max_workers=max(1, min(mydCli["nJobs"],
+                            len(ltTasks))), initializer=fnvInitWorker,
+                            initargs=(tCorpus,)) as cPool:
+        ldStats = list(cPool.map(fndRunConfig, ltTasks))
+    fnvWriteTable(ltConfigs, ldStats)
+    return 0
+
+
+# E N T R Y   P O I N T
+if __name__ == "__main__":
+    sys.exit(main(fndCliParse()))
+
+
+# Edit history:
+# 20261019  RBL Original version.
+#               The corpus cache is stamped with the stop words as 
+#                loaded, too.  CTaxEval takes the bit numbering as is.
+#
+#
+
+#END
@@ -0,0 +1,199 @@
+#/usr/bin/python3
+# taxvariants.py
+#
+#                               RBLandau 20261019
+#
+# Find the categories of each bio with several taxonomy files at once,
+#  from the one set of stems, to compare the variants of the taxonomy
+#  without one full taxit run for each.
+#
+
+'''
+theory:
+
+each variant taxonomy file is loaded by its own CTaxify (same stop
+ words; ancestors or not, as for the main taxonomy), which numbers its
+ categories and gives each stem a bitset
+compile the K variants into one table: stem -> one big int, with
+ variant k's bitset shifted into bits k*W and up (W = the most
+ categories of any variant)
+for a bio, the stems come from the main taxer, once; each stem found
+ costs one dict lookup and one OR, for all K variants together
+then cut the big int into K bitsets, and name each through its
+ variant's cache of bitset -> names
+with --top-categories or --min-score, a variant's categories must be 
+ scored and selected as the main ones are: each variant's taxer does
+ that from the same stems (one lookup per stem per variant, then)
+
+output, either:
+one more column per variant, "Taxonomy terms (name)", name being the
+ file name without directory or extension (with as much of the 
+ directory as it takes to tell apart files of the same name; the same 
+ file twice is an error); appended after the other columns, so the 
+ fast path of taxit still works
+or a diff report: for each variant, how many members gain or lose
+ categories compared to the main taxonomy, the count for each category
+ gained and lost, and then, member by member (by row number in the
+ output), what is gained (+) and lost (-)
+
+'''
+
+import os
+from collections import Counter
+from NewTracep3 import NTRC, ntrace, ntracef
+
+
+# f n l V a r i a n t N a m e s
+def fnlVariantNames(mylFilenames):
+    ''' Return a name for each variant taxonomy file, for its column and
+         in the diff report: the file name without extension, and as 
+         many of its directories as it takes to make all names unique
+         (the whole path, extension and all, if even that is not enough).
+        Raise ValueError if a file is given twice.
+    '''
+    llParts = [os.path.normpath(os.path.splitext(sFile)[0]).split(os.sep)
+                for sFile in mylFilenames]
+    lnParts = [1] * len(llParts)
+    while True:
+        lNames = ["/".join(lParts[-nParts:]) 
+                    for lParts, nParts in zip(llParts, lnParts)]
+        cNames = Counter(lNames)
+        lnMore = [nParts + 1 if cNames[sName] > 1 and nParts < len(lParts)
+                    else nParts
+                    for lParts, nParts, sName in zip(llParts, lnParts, lNames)]
+        if lnMore == lnParts:
+            break
+        lnParts = lnMore
+    lNames = [os.path.normpath(sFile) if cNames[sName] > 1 else sName
+                for sFile, sName in zip(mylFilenames, lNames)]
+    lTwice = sorted(sName for sName, nCount in Counter(lNames).items() 
+                    if nCount > 1)
+    if lTwice:
+        raise ValueError("taxonomy file given twice: %s" % ", ".join(lTwice))
+    return lNames
+
+
+# c l a s s   C T a x V a r i a n t s
+class CTaxVariants():
+    ''' Class that finds the categories of a bio for K taxonomy variants
+         at once, and compares them with the main taxonomy.
+    '''
+
+
+    @ntrace
+    def __init__(self, mylFilenames, mycTaxifyClass, mysStopwordFilename,
+                mybAncestors=False, mybDiff=False):
+        ''' CTaxVariants init: Load the variants, compile their table.
+
+            mycTaxifyClass is CTaxify (passed in: it lives in taxit).
+            With mybDiff, keep the gains and losses for a report instead
+             of returning the variants' categories.
+        '''
+        self.lNames = fnlVariantNames(mylFilenames)
+        self.lColumns = ["Taxonomy terms (%s)" % sName
+                        for sName in self.lNames]
+        self.lTaxers = []
+        for sFile in mylFilenames:
+            cTaxer = mycTaxifyClass(mysStopwordFilename, sFile)
+            cTaxer.mvAncestors(mybAncestors)
+            self.lTaxers.append(cTaxer)
+        self.nWidth = max(len(cTaxer.lTaxNames) for cTaxer in self.lTaxers)
+        self.bPlainNames = all(cTaxer.bPlainNames for cTaxer in self.lTaxers)
+        self.nFull = (1 << self.nWidth) - 1
+        self.dStem2Masks = dict()
+        for nVariant, cTaxer in enumerate(self.lTaxers):
+            nShift = nVariant * self.nWidth
+            for sStem, nMask in cTaxer.dStem2Mask.items():
+                self.dStem2Masks[sStem] = (self.dStem2Masks.get(sStem, 0)
+                                            | nMask << nShift)
+        self.bSelect = False
+        self.bDiff = mybDiff
+        self.nMembers = 0
+        self.lcGained = [Counter() for _ in self.lNames]
+        self.lcLost = [Counter() for _ in self.lNames]
+        self.lnChanged = [0] * len(self.lNames)
+        self.ltChanges = []
+        NTRC.ntrace(3, "proc variants|%s| width|%d| stems|%d|"
+                    % (self.lNames, self.nWidth, len(self.dStem2Masks)))
+
+
+# m v S e l e c t
+    def mvSelect(self, mynTop=0, myfMinScore=0.0):
+        ''' Keep only the best categories with each variant, as the main
+             taxer does; see CTaxify.mvSelect.
+        '''
+        for cTaxer in self.lTaxers:
+            cTaxer.mvSelect(mynTop, myfMinScore)
+        self.bSelect = bool(mynTop or myfMinScore)
+
+
+# m l T a x o n s
+    def mlTaxons(self, mylStems, mysTaxons):
+        ''' Return the categories strings of the bio for each variant,
+             from its stems.  mysTaxons are its main categories, for the
+             diff; with the diff, return None.
+        '''
+        llTaxons = []
+        if self.bSelect:
+            for cTaxer in self.lTaxers:
+                llTaxons.append([sTax for (sTax, fScore) 
+                                in cTaxer.mltStems2ScoredTaxons(mylStems)])
+        else:
+            dStem2Masks = self.dStem2Masks
+            nMasks = 0
+            for sStem in mylStems:
+                if sStem in dStem2Masks:
+                    nMasks |= dStem2Masks[sStem]
+            for cTaxer in self.lTaxers:
+                llTaxons.append(cTaxer.mlMaskTaxons(nMasks & self.nFull))
+                nMasks >>= self.nWidth
+        self.nMembers += 1
+        if not self.bDiff:
+            return ["|".join(lTaxons) for lTaxons in llTaxons]
+        setMain = set(mysTaxons.split("|")) if mysTaxons else set()
+        for nVariant, lTaxons in enumerate(llTaxons):
+            setVariant = set(lTaxons)
+            if setVariant != setMain:
+                lGained = sorted(setVariant - setMain)
+                lLost = sorted(setMain - setVariant)
+                self.lcGained[nVariant].update(lGained)
+                self.lcLost[nVariant].update(lLost)
+                self.lnChanged[nVariant] += 1
+                self.ltChanges.append((self.nMembers, nVariant,
+                                        lGained, lLost))
+        return None
+
+
+# m v W r i t e D i f f
+    @ntrace
+    def mvWriteDiff(self, mysFilename):
+        ''' Write the report of what each variant changes. '''
+        with open(mysFilename, "w") as fhOut:
+            fhOut.write("%8d members\n" % self.nMembers)
+            for nVariant, sName in enumerate(self.lNames):
+                cGained = self.lcGained[nVariant]
+                cLost = self.lcLost[nVariant]
+                fhOut.write("\nvariant %s: %d members changed\n"
+                            % (sName, self.lnChanged[nVariant]))
+                fhOut.write("%8s %8s %s\n" % ("gained", "lost",
+                            "category"))
+                for sTax in sorted(set(cGained) | set(cLost)):
+                    fhOut.write("%8d %8d %s\n" % (cGained[sTax],
+                                cLost[sTax], sTax))
+            fhOut.write("\n%8s %-20s %s\n" % ("member", "variant",
+                        "changes"))
+            for (nMember, nVariant, lGained, lLost) in self.ltChanges:
+                fhOut.write("%8d %-20s %s\n" % (nMember,
+                            self.lNames[nVariant],
+                            "|".join(["+" + sTax for sTax in lGained]
+                                    + ["-" + sTax for sTax in lLost])))
+
+
+# Edit history:
+# 20261019  RBL Original version.
+#               mvSelect: top N and minimum score, as for the main column.
+#               Unique variant names, from the directories if need be.
+#
+#
+
+#END
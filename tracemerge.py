@@ -0,0 +1,84 @@
+#/usr/bin/python3
+# tracemerge.py
+#
+#                               RBLandau 20261019
+#
+# Merge the per-process trace files written with TRACE_SPLIT=YES
+#  back into one trace, ordered by timestamp.
+#
+
+'''
+theory:
+
+each split trace file is already in time order
+k-way merge all of them by the timestamp at the start of each line
+lines without a timestamp (continuations of a multi-line trace string)
+ stay glued to the line before them
+stream it: only one pending line per input file is in memory
+
+'''
+
+import sys
+import glob
+import heapq
+import re
+
+
+# Timestamp at the start of a trace line, with or without the
+#  microsecond fraction.  Fixed width, so text order is time order.
+reTimestamp = re.compile(r'\d{8}_\d{6}(\.\d{6})?')
+
+
+# f n g K e y e d L i n e s
+def fngKeyedLines(mysFilename, mynFileIndex):
+    ''' Generate (timestamp, fileindex, linenumber, line) for one trace file.
+
+        Continuation lines inherit the timestamp of the line before,
+         and the line number keeps them in their original order.
+    '''
+    sKey = ""
+    with open(mysFilename, "r", errors="replace") as fhIn:
+        for nLine, sLine in enumerate(fhIn):
+            mTime = reTimestamp.match(sLine)
+            if mTime:
+                sKey = mTime.group(0)
+            yield (sKey, mynFileIndex, nLine, sLine)
+
+
+# f n n M e r g e T r a c e s
+def fnnMergeTraces(mylFilenames, myfhOut):
+    ''' Merge the trace files into one stream.  Return count of lines. '''
+    lStreams = [fngKeyedLines(sFile, nIdx)
+                for nIdx, sFile in enumerate(mylFilenames)]
+    nOut = 0
+    for (sKey, nFile, nLine, sLine) in heapq.merge(*lStreams):
+        myfhOut.write(sLine if sLine.endswith("\n") else sLine + "\n")
+        nOut += 1
+    return nOut
+
+
+# M A I N
+def main():
+    ''' MAIN: Merge files named on the command line, or, if none,
+         all the split trace files that match the default name.
+    '''
+    lFiles = sys.argv[1:] or sorted(glob.glob("newtrace_p*_w*.log"))
+    if not lFiles:
+        print("usage: python tracemerge.py tracefile... > merged.log",
+                file=sys.stderr)
+        return 1
+    fnnMergeTraces(lFiles, sys.stdout)
+    return 0
+
+
+# E N T R Y   P O I N T
+if __name__ == "__main__":
+    sys.exit(main())
+
+
+# Edit history:
+# 20261019  RBL Original version.
+#
+#
+
+#END